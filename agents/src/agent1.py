@@ -1,11 +1,14 @@
 import asyncio
-import json
-from openai import AzureOpenAI
-from fastmcp import Client
-from mcp_client_utilities import get_tools, tool_to_openai, call_tool_async
+from mcp_session_pool import mcp_session_pool
+from tool_registry import ToolRegistry
+from tool_executor import ToolCallExecutor
 from common_utility import get_secret
+from completion_cache import completion_cache_for
+from llm_client import AsyncChatClient, async_input, complete_chat_turn
+from conversation_history import TokenBudgetedHistory
+from tracing import tracer
 
-light_mcp_client = Client('http://localhost:8000/mcp')
+light_mcp_url = 'http://localhost:8000/mcp'
 
 endpoint = "https://eastus.api.cognitive.microsoft.com/"
 model_name = "gpt-4.1"
@@ -14,92 +17,53 @@ deployment = "gpt-4.1"
 subscription_key = get_secret('AzureOpenAiApiKey')
 api_version = "2024-12-01-preview"
 
-client = AzureOpenAI(
+client = AsyncChatClient(
+    deployment,
+    endpoint=endpoint,
     api_version=api_version,
-    azure_endpoint=endpoint,
     api_key=subscription_key,
+    completion_cache=completion_cache_for(deployment),
+    # Status questions and tool planning want the same answer every time; at
+    # temperature 0 repeated requests are served from the completion cache
+    temperature=0.0,
 )
 
-message_history = [{
+message_history = TokenBudgetedHistory([{
     "role": "system",
     "content": "You are a helpful assistant."
-}]
+}], token_budget=16000)
 
 # MAIN ASYNC FUNCTION
 async def main():
-    async with light_mcp_client:
-        light_tool_list = await get_tools(light_mcp_client)
-
-        tools_to_client = {}
-        for tool in light_tool_list:
-            tools_to_client[tool.name] = light_mcp_client
-        
-        tool_list = light_tool_list
-        openai_tools = [tool_to_openai(tool) for tool in tool_list]
-        print("Available tools ({0}): ".format(len(tool_list)))
-        for tool in tool_list:
-            print(f"- {tool.name}: {tool.description}")
-
+    async with mcp_session_pool:
+        light_mcp_client = await mcp_session_pool.get(light_mcp_url)
+        tool_registry = ToolRegistry()
+        tool_registry.add_server(light_mcp_client, "lights")
+        openai_tools = await tool_registry.discover()
+
+        tool_executor = ToolCallExecutor(tool_registry)
+        print("Available tools ({0}): ".format(len(openai_tools)))
+        for tool_spec in openai_tools:
+            print(f"- {tool_spec['function']['name']}: {tool_spec['function']['description']}")
+
+        turn = 0
         while True:
-            loop = asyncio.get_event_loop()
-            user_input = await loop.run_in_executor(None, input, "User> ")
+            user_input = await async_input("User> ")
             if user_input.lower() in ['exit', 'quit']:
                 break
 
-            message_history.append({
-                "role": "user",
-                "content": user_input
-            })
-            response = client.chat.completions.create(
-                model=deployment,
-                messages=message_history,
-                tools=openai_tools
-            )
-
-            selected_response_message = response.choices[0].message
-
-            if selected_response_message.content is not None:
-                print(f"Assistant> {selected_response_message.content}")
+            turn += 1
+            # One trace per turn: completions and tool calls below become its child spans
+            with tracer.span("agent.turn", **{"pyagent.turn": turn}):
                 message_history.append({
-                    "role": selected_response_message.role,
-                    "content": selected_response_message.content
+                    "role": "user",
+                    "content": user_input
                 })
-
-            if selected_response_message.tool_calls is not None:
-                message_history.append({
-                    "role": "assistant",
-                    "content": selected_response_message.content,
-                    "tool_calls": selected_response_message.tool_calls
-                })
-
-                tool_results = []
-                for tool_call in selected_response_message.tool_calls:
-                    result = await call_tool_async(
-                        tools_to_client[tool_call.function.name],
-                        tool_call.function.name,
-                        json.loads(tool_call.function.arguments)
-                    )
-
-                    message_history.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "name": tool_call.function.name,
-                        "content": str(result)
-                    })
-
-                followup_response = client.chat.completions.create(
-                    model=deployment,
-                    messages=message_history,
-                    tools=openai_tools
-                )
-
-                followup_response = followup_response.choices[0].message
-                if followup_response.content is not None:
-                    print(f"Assistant> {followup_response.content}")
-                    message_history.append({
-                        "role": "assistant",
-                        "content": followup_response.content
-                    })
+                await message_history.compact()
+                print(message_history.report())
+                await complete_chat_turn(client, message_history, tools=openai_tools, tool_executor=tool_executor)
+                if client.completion_cache is not None:
+                    print("Completion cache:", client.completion_cache.stats())
 
 
 if __name__ == "__main__":
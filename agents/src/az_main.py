@@ -2,10 +2,13 @@ import asyncio
 from openai import AzureOpenAI
 from fastmcp import Client
 from mcp.types import Tool
-from common_utility import get_secret
+from common_utility import get_secret, get_tools as common_get_tools
+from tool_catalog_cache import tool_catalog_cache
 
-mcp_client = Client("http://localhost:8000/mcp")
-playwright_mcp_client = Client('http://localhost:8931/mcp')
+mcp_url = "http://localhost:8000/mcp"
+playwright_mcp_url = 'http://localhost:8931/mcp'
+mcp_client = Client(mcp_url, message_handler=tool_catalog_cache.list_changed_handler(mcp_url))
+playwright_mcp_client = Client(playwright_mcp_url, message_handler=tool_catalog_cache.list_changed_handler(playwright_mcp_url))
 
 endpoint = "https://eastus.api.cognitive.microsoft.com/"
 model_name = "gpt-4.1"
@@ -59,15 +62,17 @@ def convert_fastapi_to_openai_tools(tool_list: list) -> list:
     return openai_tools
 
 async def get_tools():
-    async with mcp_client, playwright_mcp_client:
-        tools = await mcp_client.list_tools()
-        tools = []
-        tools.extend(await playwright_mcp_client.list_tools())
-        print("Tools:", len(tools))
-        # print("Tools:", tools)
-        tool_specs = convert_fastapi_to_openai_tools(tools)
-        # print("Converted Tool Specs:", tool_specs)
-        return tool_specs
+    # Serve the playwright tool list from the catalog cache so startup does not
+    # need to connect just to list tools; only connect on a miss. This one-shot run
+    # keeps no session open, so nothing hears tools/list_changed: the entry is
+    # refreshed only when its TTL expires.
+    tool_specs = tool_catalog_cache.lookup(playwright_mcp_url)
+    if tool_specs is None:
+        async with playwright_mcp_client:
+            tool_specs = await common_get_tools(playwright_mcp_client)
+    print("Tools:", len(tool_specs))
+    # print("Converted Tool Specs:", tool_specs)
+    return tool_specs
         # tool_specs = [
         #     {
         #         "type": "function",
@@ -0,0 +1,187 @@
+"""Benchmark: the agent turn loops against the mock LLM and the lights MCP server.
+
+Usage:
+  python bench_agent_loop.py [sessions] [turns] [latency_seconds] [token_interval_seconds]
+  python bench_agent_loop.py --url http://localhost:8000/mcp [sessions] [turns] ...
+  add --save to record this run as the baseline
+
+Runs `sessions` concurrent conversations of `turns` user turns each, once through
+`complete_chat_turn` and once through `stream_chat_turn`, with `ToolCallExecutor`
+running the tool calls. Completions come from `MockLLMServer` with `LIGHTS_SCRIPT`,
+so most turns call lighting tools. Tools are served by the real lights MCP server:
+in-process by default (mcp-servers/src must be importable with its dependencies),
+or a running one with `--url`.
+
+Reports turns/s, tool calls/s and p50/p99 turn latency per loop and compares them
+with the saved baseline for the same settings (BENCH_BASELINE_PATH). Anything more
+than REGRESSION_TOLERANCE worse is flagged and the exit status is 1.
+"""
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+from fastmcp import Client
+from openai import AsyncOpenAI
+from llm_client import AsyncChatClient, complete_chat_turn, stream_chat_turn
+from mock_llm_server import MockLLMServer
+from tool_executor import ToolCallExecutor
+from tool_registry import ToolRegistry
+from tracing import tracer
+
+BASELINE_PATH_ENV = "BENCH_BASELINE_PATH"
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_agent_loop.baseline.json")
+# A throughput drop or p99 rise beyond this fraction of the baseline is a regression
+REGRESSION_TOLERANCE = 0.10
+MCP_SERVERS_SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "mcp-servers", "src")
+
+LIGHTS_SCRIPT = [
+    {"match": "which lights", "tool_calls": [{"name": "get_lights", "arguments": {"state": "on"}}]},
+    {"match": "toggle", "tool_calls": [
+        {"name": "change_state", "arguments": {"location": "office"}},
+        {"name": "change_state", "arguments": {"location": "reception"}},
+    ]},
+    {"match": "conference rooms", "reply": "Checking both rooms.", "tool_calls": [
+        {"name": "get_lights", "arguments": {"state": "on"}},
+        {"name": "get_lights", "arguments": {"state": "off"}},
+    ]},
+    {"match": "usage", "tool_calls": [{"name": "get_light_usage", "arguments": {"hours": 1}}]},
+]
+PROMPTS = [
+    "Which lights are on?",
+    "Toggle the office and reception lights.",
+    "Are the conference rooms lit?",
+    "How does light usage look for the last hour?",
+    "Thanks, that is all.",
+]
+LOOPS = {"complete": complete_chat_turn, "stream": stream_chat_turn}
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def lights_client(url: str | None) -> Client:
+    if url:
+        return Client(url)
+    sys.path.insert(0, os.path.abspath(MCP_SERVERS_SRC))
+    from lights_mcp_server import mcp
+    return Client(mcp)
+
+
+async def session(loop, client: AsyncChatClient, registry: ToolRegistry, session_id: int, turns: int) -> list[tuple]:
+    """Run one conversation; returns (seconds, tool calls) per turn."""
+    message_history = [{"role": "system", "content": "You are a helpful assistant."}]
+    tool_executor = ToolCallExecutor(registry)
+    results = []
+    for turn in range(turns):
+        message_history.append({"role": "user", "content": PROMPTS[(session_id + turn) % len(PROMPTS)]})
+        turn_start = len(message_history)
+        started = time.perf_counter()
+        with tracer.span("agent.turn", **{"pyagent.turn": turn + 1}):
+            await loop(client, message_history, tools=registry.tool_specs, tool_executor=tool_executor)
+        elapsed = time.perf_counter() - started
+        tool_calls = sum(message.get("role") == "tool" for message in message_history[turn_start:])
+        results.append((elapsed, tool_calls))
+    return results
+
+
+async def run_loop(name: str, client: AsyncChatClient, registry: ToolRegistry, sessions: int, turns: int) -> dict:
+    loop = LOOPS[name]
+    # The agents print every reply; send that to /dev/null rather than leave it out
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        await session(loop, client, registry, 0, 1)  # warm up connections
+        start = time.perf_counter()
+        results = await asyncio.gather(*(session(loop, client, registry, i, turns) for i in range(sessions)))
+        elapsed = time.perf_counter() - start
+    latencies = [seconds for turns_run in results for seconds, _ in turns_run]
+    tool_calls = sum(calls for turns_run in results for _, calls in turns_run)
+    return {
+        "turns_per_s": round(len(latencies) / elapsed, 2),
+        "tool_calls_per_s": round(tool_calls / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def regressions(result: dict, baseline: dict) -> list[str]:
+    found = []
+    for key in ("turns_per_s", "tool_calls_per_s"):
+        if baseline.get(key) and result[key] < baseline[key] * (1 - REGRESSION_TOLERANCE):
+            found.append(key)
+    if baseline.get("p99_ms") and result["p99_ms"] > baseline["p99_ms"] * (1 + REGRESSION_TOLERANCE):
+        found.append("p99_ms")
+    return found
+
+
+def load_baselines(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def change(value: float, baseline: float | None) -> str:
+    return f"{(value - baseline) / baseline:+.0%}" if baseline else "-"
+
+
+async def main(sessions: int, turns: int, latency: float, token_interval: float, url: str | None, save: bool):
+    baseline_path = os.environ.get(BASELINE_PATH_ENV, DEFAULT_BASELINE_PATH)
+    baselines = load_baselines(baseline_path)
+    server_label = url or "in-process"
+    results = {}
+    async with MockLLMServer(latency=latency, token_interval=token_interval, script=LIGHTS_SCRIPT) as llm_server:
+        client = AsyncChatClient("mock-model", client=AsyncOpenAI(base_url=llm_server.base_url, api_key="mock"))
+        async with lights_client(url) as mcp_client:
+            registry = ToolRegistry(cache=None)
+            registry.add_server(mcp_client, "lights")
+            await registry.discover()
+            for name in LOOPS:
+                results[name] = await run_loop(name, client, registry, sessions, turns)
+        await client.close()
+
+    print(f"{sessions} sessions x {turns} turns, mock latency {latency * 1000:.0f} ms, "
+          f"{token_interval * 1000:.1f} ms per chunk, lights server {server_label}")
+    print(f"{'loop':<10}{'turns/s':>10}{'calls/s':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}"
+          f"{'vs baseline (turns/s, calls/s, p99)':>38}")
+    flagged = False
+    for name, result in results.items():
+        key = f"{name} sessions={sessions} turns={turns} latency={latency} token_interval={token_interval} server={server_label}"
+        baseline = baselines.get(key, {})
+        found = regressions(result, baseline)
+        flagged = flagged or bool(found)
+        comparison = ", ".join(change(result[field], baseline.get(field))
+                               for field in ("turns_per_s", "tool_calls_per_s", "p99_ms"))
+        print(f"{name:<10}{result['turns_per_s']:>10.1f}{result['tool_calls_per_s']:>10.1f}"
+              f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}{comparison:>38}"
+              + (f"  REGRESSION: {', '.join(found)}" if found else ""))
+        if save:
+            baselines[key] = dict(result, saved=time.strftime("%Y-%m-%dT%H:%M:%S"))
+
+    if save:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {baseline_path}")
+    elif not baselines:
+        print(f"No baseline at {baseline_path}; run with --save to record one.")
+    return not flagged
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    save = "--save" in args
+    if save:
+        args.remove("--save")
+    url = None
+    if "--url" in args:
+        index = args.index("--url")
+        url = args[index + 1]
+        del args[index:index + 2]
+    sessions = int(args[0]) if len(args) > 0 else 10
+    turns = int(args[1]) if len(args) > 1 else 20
+    latency = float(args[2]) if len(args) > 2 else 0.02
+    token_interval = float(args[3]) if len(args) > 3 else 0.001
+    passed = asyncio.run(main(sessions, turns, latency, token_interval, url, save))
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,104 @@
+"""Benchmark: N chat sessions in one process against a local mock endpoint.
+
+Usage:
+  python bench_concurrent_sessions.py [sessions] [turns] [latency_seconds]
+
+Runs the same workload twice: once with the synchronous OpenAI client called
+from inside the event loop (how the agents used to work) and once through
+`AsyncChatClient`. A heartbeat task stands in for MCP pings and records the
+worst event-loop stall seen during each run. The mock runs on its own event loop
+in a separate thread, so the blocking client stalls the agent's loop but can
+still be answered.
+"""
+import asyncio
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from openai import AsyncOpenAI, OpenAI
+from llm_client import AsyncChatClient
+from mock_llm_server import MockLLMServer
+
+
+@contextmanager
+def mock_server_thread(latency: float):
+    """Run a `MockLLMServer` on its own event loop in a daemon thread."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = asyncio.run_coroutine_threadsafe(MockLLMServer(latency=latency).start(), loop).result()
+    try:
+        yield server
+    finally:
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+async def heartbeat(stop: asyncio.Event, interval: float = 0.01) -> float:
+    worst_gap = 0.0
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        now = time.perf_counter()
+        worst_gap = max(worst_gap, now - last - interval)
+        last = now
+    return worst_gap
+
+
+async def blocking_session(client: OpenAI, session_id: int, turns: int):
+    message_history = [{"role": "system", "content": "You are a helpful assistant."}]
+    for turn in range(turns):
+        message_history.append({"role": "user", "content": f"session {session_id} turn {turn}"})
+        response = client.chat.completions.create(model="mock-model", messages=message_history)
+        message_history.append({"role": "assistant", "content": response.choices[0].message.content})
+
+
+async def async_session(client: AsyncChatClient, session_id: int, turns: int):
+    message_history = [{"role": "system", "content": "You are a helpful assistant."}]
+    for turn in range(turns):
+        message_history.append({"role": "user", "content": f"session {session_id} turn {turn}"})
+        response = await client.complete(message_history)
+        message_history.append({"role": "assistant", "content": response.choices[0].message.content})
+
+
+async def run_mode(name: str, sessions: list):
+    stop = asyncio.Event()
+    heartbeat_task = asyncio.create_task(heartbeat(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*sessions)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    worst_stall = await heartbeat_task
+    return name, elapsed, worst_stall
+
+
+async def main(session_count: int, turns: int, latency: float):
+    with mock_server_thread(latency) as server:
+        sync_client = OpenAI(base_url=server.base_url, api_key="mock")
+        async_client = AsyncChatClient("mock-model", client=AsyncOpenAI(base_url=server.base_url, api_key="mock"))
+
+        results = []
+        results.append(await run_mode("blocking (sync client)", [
+            blocking_session(sync_client, i, turns) for i in range(session_count)
+        ]))
+        results.append(await run_mode("async (AsyncChatClient)", [
+            async_session(async_client, i, turns) for i in range(session_count)
+        ]))
+
+        sync_client.close()
+        await async_client.close()
+
+    total_turns = session_count * turns
+    print(f"{session_count} sessions x {turns} turns, mock latency {latency * 1000:.0f} ms")
+    print(f"{'mode':<26}{'wall (s)':>10}{'turns/s':>10}{'max stall (ms)':>16}")
+    for name, elapsed, worst_stall in results:
+        print(f"{name:<26}{elapsed:>10.2f}{total_turns / elapsed:>10.1f}{worst_stall * 1000:>16.1f}")
+
+
+if __name__ == "__main__":
+    session_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.2
+    asyncio.run(main(session_count, turns, latency))
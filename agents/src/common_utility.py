@@ -1,7 +1,9 @@
+import asyncio
 import json
 import os
 from fastmcp import Client
 from mcp.types import Tool
+from tool_catalog_cache import ToolCatalogCache, tool_catalog_cache
 
 def get_secret(secret_key_id:str) -> str | None :
     sec_file_path = os.path.join(
@@ -17,27 +19,54 @@ def get_secret(secret_key_id:str) -> str | None :
     return None
 
 
-async def get_tools(*mcp_client_list: tuple[Client]):
+async def get_tools(*mcp_client_list: tuple[Client], cache: ToolCatalogCache | None = tool_catalog_cache):
     """
     Retrieves and aggregates tools from a list of MCP client instances.
 
     Args:
         mcp_clients: A list of client objects (e.g., mcp_client, playwright_mcp_client)
                      that sup`port the 'list_tools()' asynchronous method.
+        cache: Tool catalog cache to serve translated specs from; None always calls list_tools().
     """
 
-    tools = []
+    async def fetch(client):
+        if cache is None:
+            return await fetch_tool_specs(client)
+        return await cache.get_tool_specs(client, lambda: fetch_tool_specs(client))
 
-    for client in mcp_client_list:
-        client_tools = await client.list_tools()
-        tools.extend(client_tools)
+    # List every server concurrently; startup is bounded by the slowest one
+    tool_specs = []
+    for client_specs in await asyncio.gather(*(fetch(client) for client in mcp_client_list)):
+        tool_specs.extend(client_specs)
 
-    print("Total Tools:", len(tools))
+    print("Total Tools:", len(tool_specs))
+    if cache is not None:
+        print("Tool catalog cache:", cache.stats())
 
-    tool_specs = translate_mcp_tool_to_llm_tool_spec(tools)
     return tool_specs
 
 
+async def fetch_tool_specs(client: Client) -> list:
+    """Lists tools on a single connected client and translates them to OpenAI specs."""
+    return translate_mcp_tool_to_llm_tool_spec(await client.list_tools())
+
+
+async def fetch_tool_catalog(client: Client) -> tuple[list, list]:
+    """Lists tools on a connected client; returns their OpenAI specs and the names of read-only tools."""
+    tool_list = await client.list_tools()
+    return translate_mcp_tool_to_llm_tool_spec(tool_list), read_only_tool_names(tool_list)
+
+
+def read_only_tool_names(tool_list: list[Tool]) -> list:
+    """Names of the tools whose server declares them read-only (MCP `readOnlyHint`)."""
+    names = []
+    for mcp_tool in tool_list:
+        annotations = getattr(mcp_tool, "annotations", None)
+        if annotations is not None and getattr(annotations, "readOnlyHint", None):
+            names.append(mcp_tool.name)
+    return names
+
+
 def translate_mcp_tool_to_llm_tool_spec(tool_list: list[Tool]) -> list:
     """
     Converts a list of Tool objects/dicts (like those from FastAPI/FastMCP)
@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from openai.types.chat import ChatCompletion
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".pyagent", "completion_cache.sqlite3")
+# Comma-separated deployment names that opt in to the completion cache, e.g. "gpt-4.1,gpt-5-nano"
+CACHE_DEPLOYMENTS_ENV = "PYAGENT_COMPLETION_CACHE_DEPLOYMENTS"
+# The chat API samples with temperature 1.0 when none is given
+DEFAULT_TEMPERATURE = 1.0
+
+
+def _to_jsonable(value):
+    if hasattr(value, "model_dump"):
+        return value.model_dump(exclude_none=True)
+    return str(value)
+
+
+def request_hash(request: dict) -> str:
+    """SHA-256 of the request with keys sorted and whitespace removed."""
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_to_jsonable)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """Two-tier cache of chat completions keyed by the canonical request hash.
+
+    A bounded in-memory LRU sits in front of a SQLite table, so identical requests
+    (regression runs, repeated status questions) skip the model call entirely,
+    also across processes. Requests that sample (temperature > 0, which includes
+    the API default) bypass the cache unless the caller forces it. From async code
+    the SQLite reads and writes run in a worker thread; memory hits stay on the loop.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH, max_memory_entries: int = 256):
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.latency_saved = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, latency REAL NOT NULL, created REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def is_cacheable(request: dict) -> bool:
+        # An explicit None means the API default, like leaving it out
+        temperature = request.get("temperature")
+        if temperature is None:
+            temperature = DEFAULT_TEMPERATURE
+        return not request.get("stream") and temperature <= 0
+
+    def _remember(self, key: str, entry: tuple):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+    def _get_memory(self, key: str) -> tuple | None:
+        with self._lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+            return entry
+
+    def _get_disk(self, key: str) -> tuple | None:
+        with self._lock:
+            row = self._db.execute("SELECT response, latency FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._remember(key, row)
+            return row
+
+    def get(self, key: str) -> tuple | None:
+        """Return `(response_json, latency)` for `key`, checking memory then disk."""
+        entry = self._get_memory(key)
+        return entry if entry is not None else self._get_disk(key)
+
+    def _put_disk(self, key: str, response_json: str, latency: float):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO completions (key, response, latency, created) VALUES (?, ?, ?, ?)",
+                (key, response_json, latency, time.time()),
+            )
+            self._db.commit()
+
+    def put(self, key: str, response_json: str, latency: float):
+        with self._lock:
+            self._remember(key, (response_json, latency))
+        self._put_disk(key, response_json, latency)
+
+    async def get_or_create(self, request: dict, create, force: bool = False):
+        """Return a cached `ChatCompletion` for `request`, or `await create()` and cache it."""
+        if not force and not self.is_cacheable(request):
+            self.bypasses += 1
+            return await create()
+
+        key = request_hash(request)
+        entry = self._get_memory(key)
+        if entry is None:
+            entry = await asyncio.to_thread(self._get_disk, key)
+        if entry is not None:
+            self.hits += 1
+            self.latency_saved += entry[1]
+            return ChatCompletion.model_validate_json(entry[0])
+
+        self.misses += 1
+        start = time.perf_counter()
+        response = await create()
+        latency = time.perf_counter() - start
+        response_json = response.model_dump_json()
+        with self._lock:
+            self._remember(key, (response_json, latency))
+        await asyncio.to_thread(self._put_disk, key, response_json, latency)
+        return response
+
+    def clear(self):
+        with self._lock:
+            self.memory.clear()
+            self._db.execute("DELETE FROM completions")
+            self._db.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "latency_saved_seconds": round(self.latency_saved, 3),
+            "memory_entries": len(self.memory),
+        }
+
+
+_shared_cache = None
+
+
+def completion_cache_for(deployment: str) -> CompletionCache | None:
+    """Shared cache if `deployment` is listed in PYAGENT_COMPLETION_CACHE_DEPLOYMENTS, else None."""
+    global _shared_cache
+    enabled = {name.strip() for name in os.environ.get(CACHE_DEPLOYMENTS_ENV, "").split(",") if name.strip()}
+    if deployment not in enabled:
+        return None
+    if _shared_cache is None:
+        _shared_cache = CompletionCache()
+    return _shared_cache
@@ -0,0 +1,179 @@
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Rough per-message framing overhead used by the chat format
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+def _get_encoder(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def _field(message, name: str):
+    if isinstance(message, dict):
+        return message.get(name)
+    return getattr(message, name, None)
+
+
+class TokenBudgetedHistory(list):
+    """Conversation history that keeps its token count under a budget.
+
+    Behaves like the plain `message_history` list the agents already use. Call
+    `trim()` (or `await compact()` to also summarize) before each completion:
+    - system messages are always kept;
+    - tool outputs from earlier turns are clipped to `max_tool_output_tokens`;
+    - whole user turns are evicted oldest-first, so an assistant `tool_calls`
+      message is never separated from its `role: tool` replies;
+    - the latest turn is never evicted.
+    Token counts use tiktoken when installed, otherwise ~4 characters per token.
+    """
+
+    def __init__(self, messages=(), token_budget: int = 16000, max_tool_output_tokens: int | None = 1000,
+                 summarizer=None, model: str = "gpt-4.1"):
+        super().__init__(messages)
+        self.token_budget = token_budget
+        self.max_tool_output_tokens = max_tool_output_tokens
+        self.summarizer = summarizer
+        self._encoder = _get_encoder(model)
+        self._token_cache = {}
+        self._summary_message = None
+        self.evicted = []
+        self.last_stats = None
+
+    # -----------------------------
+    # Token counting
+    # -----------------------------
+    def _count_text(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoder is not None:
+            return len(self._encoder.encode(text))
+        return (len(text) + 3) // 4
+
+    def count_tokens(self, message) -> int:
+        cached = self._token_cache.get(id(message))
+        if cached is not None and cached[0] is message:
+            return cached[1]
+        tokens = MESSAGE_OVERHEAD_TOKENS + self._count_text(str(_field(message, "content") or ""))
+        for tool_call in _field(message, "tool_calls") or []:
+            function = _field(tool_call, "function")
+            tokens += self._count_text(str(_field(function, "name") or ""))
+            tokens += self._count_text(str(_field(function, "arguments") or ""))
+        # Hold a reference to the message so its id() cannot be reused while cached
+        self._token_cache[id(message)] = (message, tokens)
+        return tokens
+
+    def total_tokens(self) -> int:
+        return sum(self.count_tokens(message) for message in self)
+
+    # -----------------------------
+    # Compaction
+    # -----------------------------
+    def _turn_groups(self) -> tuple[list, list]:
+        """Split history into pinned system messages and user-led turn groups."""
+        pinned = []
+        groups = []
+        for message in self:
+            role = _field(message, "role")
+            if role == "system":
+                pinned.append(message)
+            elif role == "user" or not groups:
+                groups.append([message])
+            else:
+                groups[-1].append(message)
+        return pinned, groups
+
+    def _clip_tool_output(self, message):
+        if self.max_tool_output_tokens is None or not isinstance(message, dict) or message.get("role") != "tool":
+            return message
+        if self.count_tokens(message) - MESSAGE_OVERHEAD_TOKENS <= self.max_tool_output_tokens:
+            return message
+        content = str(_field(message, "content") or "")
+        keep_chars = self.max_tool_output_tokens * 4
+        clipped = dict(message)
+        clipped["content"] = content[:keep_chars] + f"\n...[truncated {len(content) - keep_chars} characters]"
+        return clipped
+
+    def trim(self) -> dict:
+        """Clip old tool outputs and evict the oldest turns until under budget.
+
+        With a summarizer set, evicted messages are kept in `self.evicted` for `compact()`.
+        Returns (and stores in `last_stats`) the before/after token counts.
+        """
+        tokens_before = self.total_tokens()
+        pinned, groups = self._turn_groups()
+
+        for group in groups[:-1]:
+            group[:] = [self._clip_tool_output(message) for message in group]
+
+        total = sum(self.count_tokens(message) for message in pinned)
+        total += sum(self.count_tokens(message) for group in groups for message in group)
+        evicted_now = []
+        while len(groups) > 1 and total > self.token_budget:
+            group = groups.pop(0)
+            total -= sum(self.count_tokens(message) for message in group)
+            evicted_now.extend(group)
+        if self.summarizer is not None:
+            self.evicted.extend(evicted_now)
+
+        self[:] = pinned + [message for group in groups for message in group]
+        live_ids = {id(message) for message in self}
+        self._token_cache = {key: value for key, value in self._token_cache.items() if key in live_ids}
+
+        tokens_after = self.total_tokens()
+        self.last_stats = {
+            "tokens_before": tokens_before,
+            "tokens_after": tokens_after,
+            "tokens_saved": tokens_before - tokens_after,
+            "evicted_messages": len(evicted_now),
+        }
+        return self.last_stats
+
+    async def compact(self) -> dict:
+        """`trim()`, then fold any evicted turns into a running summary via `summarizer`."""
+        stats = self.trim()
+        if self.summarizer is None or not self.evicted:
+            return stats
+
+        evicted = self.evicted
+        self.evicted = []
+        if self._summary_message is not None and self._summary_message in self:
+            evicted = [self._summary_message] + evicted
+            self.remove(self._summary_message)
+
+        summary = await self.summarizer(evicted)
+        self._summary_message = {"role": "system", "content": SUMMARY_PREFIX + summary}
+        system_count = sum(1 for message in self if _field(message, "role") == "system")
+        self.insert(system_count, self._summary_message)
+
+        stats["tokens_after"] = self.total_tokens()
+        stats["tokens_saved"] = stats["tokens_before"] - stats["tokens_after"]
+        return stats
+
+    def report(self) -> str:
+        if self.last_stats is None:
+            return "History: not compacted yet"
+        return "History: {tokens_after} tokens (saved {tokens_saved} this turn)".format(**self.last_stats)
+
+
+def llm_summarizer(client, max_completion_tokens: int = 300):
+    """Summarizer for `TokenBudgetedHistory` that asks an `AsyncChatClient` for a short recap."""
+    async def summarize(messages: list) -> str:
+        transcript = "\n".join(
+            f"{_field(message, 'role')}: {_field(message, 'content') or _field(message, 'tool_calls')}"
+            for message in messages
+        )
+        response = await client.complete([
+            {"role": "system", "content": "Summarize this conversation excerpt in a few sentences, keeping facts, decisions and open questions."},
+            {"role": "user", "content": transcript},
+        ], max_completion_tokens=max_completion_tokens)
+        return response.choices[0].message.content or ""
+    return summarize
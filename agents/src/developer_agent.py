@@ -1,12 +1,20 @@
 import asyncio
-from openai import AzureOpenAI
 from openai.types.chat import chat_completion_message
 from fastmcp import Client
 from mcp.types import Tool
 from common_utility import get_secret, get_tools
-
-mcp_client = Client("http://localhost:8000/mcp")
-playwright_mcp_client = Client('http://localhost:8931/mcp')
+from tool_executor import ToolCallExecutor
+from tool_registry import ToolRegistry
+from mcp_session_pool import mcp_session_pool
+from tool_catalog_cache import tool_catalog_cache
+from conversation_history import TokenBudgetedHistory
+from completion_cache import completion_cache_for
+from llm_client import AsyncChatClient, async_input, stream_chat_turn
+
+mcp_url = "http://localhost:8000/mcp"
+playwright_mcp_url = 'http://localhost:8931/mcp'
+mcp_client = Client(mcp_url, message_handler=tool_catalog_cache.list_changed_handler(mcp_url))
+playwright_mcp_client = Client(playwright_mcp_url, message_handler=tool_catalog_cache.list_changed_handler(playwright_mcp_url))
 
 endpoint = "https://eastus.api.cognitive.microsoft.com/"
 model_name = "gpt-4.1"
@@ -15,44 +23,55 @@ deployment = "gpt-4.1"
 subscription_key = get_secret('AzureOpenAiApiKey')
 api_version = "2024-12-01-preview"
 
-client = AzureOpenAI(
+client = AsyncChatClient(
+    deployment,
+    endpoint=endpoint,
     api_version=api_version,
-    azure_endpoint=endpoint,
     api_key=subscription_key,
+    completion_cache=completion_cache_for(deployment),
+    max_completion_tokens=13107,
+    temperature=1.0,
+    top_p=1.0,
+    frequency_penalty=0.0,
+    presence_penalty=0.0,
 )
 
 async def llm_chat():
-    message_history = [{
+    message_history = TokenBudgetedHistory([{
         "role": "system",
         "content": "You are a world-class software engineer.",
-    }]
+    }], token_budget=16000)
 
     # async with mcp_client, playwright_mcp_client:
     #     tool_specs = await get_tools(mcp_client, playwright_mcp_client)
 
-    async with mcp_client:
-        tool_specs = await get_tools(mcp_client)
+    async with mcp_session_pool:
+        light_session = await mcp_session_pool.get(mcp_url)
+        tool_registry = ToolRegistry()
+        tool_registry.add_server(light_session, "lights")
+        tool_specs = await tool_registry.discover()
+        tool_executor = ToolCallExecutor(tool_registry)
         user_input = ""
 
+        # Print tokens as they arrive instead of waiting for the full completion
+        stream_mode = True
+
         while user_input.lower() != "/bye":
 
-            user_input = input("User> ")
+            user_input = await async_input("User> ")
 
             message_history.append({
                 "role": "user",
                 "content": user_input,
             })
+            await message_history.compact()
+            print(message_history.report())
+
+            if stream_mode:
+                await stream_chat_turn(client, message_history, tools=tool_specs, tool_executor=tool_executor)
+                continue
 
-            response = client.chat.completions.create(
-                messages=message_history,
-                max_completion_tokens=13107,
-                temperature=1.0,
-                top_p=1.0,
-                frequency_penalty=0.0,
-                presence_penalty=0.0,
-                model=deployment,
-                tools=tool_specs,  # Pass the tool schema here
-            )
+            response = await client.complete(message_history, tools=tool_specs)
 
             if len(response.choices) > 0:
                 if len(response.choices) > 1:
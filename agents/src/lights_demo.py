@@ -1,12 +1,22 @@
 import asyncio
-from openai import AzureOpenAI
 from openai.types.chat import chat_completion_message
 from fastmcp import Client
 from mcp.types import Tool
-from common_utility import get_secret, get_tools
-
-mcp_client = Client("http://localhost:8000/mcp")
-playwright_mcp_client = Client('http://localhost:8931/mcp')
+from common_utility import get_secret
+from tool_catalog_cache import tool_catalog_cache
+from conversation_history import TokenBudgetedHistory
+from completion_cache import completion_cache_for
+from llm_client import AsyncChatClient, async_input, stream_chat_turn
+from tool_executor import ToolCallExecutor
+from tool_registry import ToolRegistry
+from mcp_session_pool import mcp_session_pool
+from lights_mirror import LightsMirror
+from tracing import tracer
+
+mcp_url = "http://localhost:8000/mcp"
+playwright_mcp_url = 'http://localhost:8931/mcp'
+mcp_client = Client(mcp_url, message_handler=tool_catalog_cache.list_changed_handler(mcp_url))
+playwright_mcp_client = Client(playwright_mcp_url, message_handler=tool_catalog_cache.list_changed_handler(playwright_mcp_url))
 
 endpoint = "https://eastus.api.cognitive.microsoft.com/"
 model_name = "gpt-4.1"
@@ -18,20 +28,33 @@ deployment = "gpt-4.1"
 subscription_key = get_secret('AzureOpenAiApiKey')
 api_version = "2024-12-01-preview"
 
-client = AzureOpenAI(
+client = AsyncChatClient(
+    deployment,
+    endpoint=endpoint,
     api_version=api_version,
-    azure_endpoint=endpoint,
     api_key=subscription_key,
+    completion_cache=completion_cache_for(deployment),
+    max_completion_tokens=13107,
+    temperature=1.0,
+    top_p=1.0,
+    frequency_penalty=0.0,
+    presence_penalty=0.0,
 )
 
 async def llm_chat():
-    async with mcp_client:
-        tool_specs = await get_tools(mcp_client)
+    async with mcp_session_pool:
+        light_session = await mcp_session_pool.get(mcp_url)
+        # Light status is answered from a local copy kept current by server notifications
+        lights_mirror = LightsMirror(light_session)
+        await lights_mirror.start()
+        tool_registry = ToolRegistry()
+        tool_registry.add_server(lights_mirror, "lights")
+        tool_specs = await tool_registry.discover()
         
-        message_history = [{
+        message_history = TokenBudgetedHistory([{
             "role": "system",
             "content": "You are a helpful assistant.",
-        }]
+        }], token_budget=16000)
 
         user_input = ""
 
@@ -41,91 +64,86 @@ async def llm_chat():
         # print_tool_result = input().strip().lower() == "y"
         multi_tool_mode = False
         print_tool_result = True
+        # Print tokens as they arrive and start tool calls while the response streams
+        stream_mode = True
+        tool_executor = ToolCallExecutor(tool_registry)
 
+        turn = 0
         while user_input.lower() != "/bye":
-            user_input = input("User> ")
-            message_history.append({
-                "role": "user",
-                "content": user_input,
-            })
-
-            response = client.chat.completions.create(
-                messages=message_history,
-                max_completion_tokens=13107,
-                temperature=1.0,
-                top_p=1.0,
-                frequency_penalty=0.0,
-                presence_penalty=0.0,
-                model=deployment,
-                tools=tool_specs,
-            )
-
-            if len(response.choices) > 0:
-                if len(response.choices) > 1:
-                    print("Warning: Multiple responses received, only the first will be processed.")
-                chosen_response = response.choices[0]
-                # print(chosen_response)
-                if isinstance(chosen_response.message, chat_completion_message.ChatCompletionMessage):
-                    chosen_response_message = chosen_response.message
-                    # Ensure assistant content is a non-null string
-                    assistant_content = chosen_response_message.content if chosen_response_message.content is not None else ""
-                    print(assistant_content)
-                    message_history.append({
-                        "role": "assistant",
-                        "content": assistant_content,
-                    })
-
-                    # Tool call support
-                    tool_calls = getattr(chosen_response_message, "tool_calls", None)
-                    if tool_calls:
-                        if not multi_tool_mode:
-                            tool_calls = [tool_calls[0]]
-                        import json
-                        for tool_call in tool_calls:
-                            tool_name = tool_call.function.name
-                            tool_args_raw = tool_call.function.arguments
-                            try:
-                                # Parse arguments from JSON string to dict
-                                if isinstance(tool_args_raw, str):
-                                    tool_args = json.loads(tool_args_raw)
-                                else:
-                                    tool_args = tool_args_raw
-                                tool_result = await mcp_client.call_tool(tool_name, tool_args)
-                                if print_tool_result:
-                                    print(f"Tool '{tool_name}' result: {tool_result}")
-                                # OpenAI expects 'tool_call_id' and string 'content' for tool messages
-                                tool_call_id = getattr(tool_call, "id", None)
-                                # Ensure tool content is a non-null string
-                                tool_content = str(tool_result) if tool_result is not None else ""
+            user_input = await async_input("User> ")
+            turn += 1
+            # One trace per turn: completions and tool calls below become its child spans
+            with tracer.span("agent.turn", **{"pyagent.turn": turn}):
+                message_history.append({
+                    "role": "user",
+                    "content": user_input,
+                })
+                await message_history.compact()
+                print(message_history.report())
+
+                if stream_mode:
+                    await stream_chat_turn(client, message_history, tools=tool_specs, tool_executor=tool_executor)
+                    continue
+
+                response = await client.complete(message_history, tools=tool_specs)
+
+                if len(response.choices) > 0:
+                    if len(response.choices) > 1:
+                        print("Warning: Multiple responses received, only the first will be processed.")
+                    chosen_response = response.choices[0]
+                    # print(chosen_response)
+                    if isinstance(chosen_response.message, chat_completion_message.ChatCompletionMessage):
+                        chosen_response_message = chosen_response.message
+                        # Ensure assistant content is a non-null string
+                        assistant_content = chosen_response_message.content if chosen_response_message.content is not None else ""
+                        print(assistant_content)
+                        message_history.append({
+                            "role": "assistant",
+                            "content": assistant_content,
+                        })
+
+                        # Tool call support
+                        tool_calls = getattr(chosen_response_message, "tool_calls", None)
+                        if tool_calls:
+                            if not multi_tool_mode:
+                                tool_calls = [tool_calls[0]]
+                            import json
+                            for tool_call in tool_calls:
+                                tool_name = tool_call.function.name
+                                tool_args_raw = tool_call.function.arguments
+                                try:
+                                    # Parse arguments from JSON string to dict
+                                    if isinstance(tool_args_raw, str):
+                                        tool_args = json.loads(tool_args_raw)
+                                    else:
+                                        tool_args = tool_args_raw
+                                    tool_result = await tool_registry.call_tool(tool_name, tool_args)
+                                    if print_tool_result:
+                                        print(f"Tool '{tool_name}' result: {tool_result}")
+                                    # OpenAI expects 'tool_call_id' and string 'content' for tool messages
+                                    tool_call_id = getattr(tool_call, "id", None)
+                                    # Ensure tool content is a non-null string
+                                    tool_content = str(tool_result) if tool_result is not None else ""
+                                    message_history.append({
+                                        "role": "tool",
+                                        "content": tool_content,
+                                        "tool_call_id": tool_call_id if tool_call_id else "tool_call_id_missing",
+                                    })
+                                except Exception as e:
+                                    print(f"Error calling tool '{tool_name}': {e}")
+                            # After tool calls, send follow-up to LLM to answer initial query
+                            followup_response = await client.complete(message_history, tools=tool_specs)
+                            if len(followup_response.choices) > 0:
+                                followup_message = followup_response.choices[0].message
+                                followup_content = followup_message.content if followup_message.content is not None else ""
+                                print(f"Assistant: {followup_content}")
                                 message_history.append({
-                                    "role": "tool",
-                                    "content": tool_content,
-                                    "tool_call_id": tool_call_id if tool_call_id else "tool_call_id_missing",
+                                    "role": "assistant",
+                                    "content": followup_content,
                                 })
-                            except Exception as e:
-                                print(f"Error calling tool '{tool_name}': {e}")
-                        # After tool calls, send follow-up to LLM to answer initial query
-                        followup_response = client.chat.completions.create(
-                            messages=message_history,
-                            max_completion_tokens=13107,
-                            temperature=1.0,
-                            top_p=1.0,
-                            frequency_penalty=0.0,
-                            presence_penalty=0.0,
-                            model=deployment,
-                            tools=tool_specs,
-                        )
-                        if len(followup_response.choices) > 0:
-                            followup_message = followup_response.choices[0].message
-                            followup_content = followup_message.content if followup_message.content is not None else ""
-                            print(f"Assistant: {followup_content}")
-                            message_history.append({
-                                "role": "assistant",
-                                "content": followup_content,
-                            })
-                    # Only send 'tool' messages and follow-up requests if tool_calls is present
-                else:
-                    print(f"Error: Unexpected message format in response. {chosen_response}")
+                        # Only send 'tool' messages and follow-up requests if tool_calls is present
+                    else:
+                        print(f"Error: Unexpected message format in response. {chosen_response}")
 
 
 async def main():
@@ -0,0 +1,140 @@
+import asyncio
+import json
+
+LIGHTS_URI = "resource://building/lights"
+CHANGES_URI = "resource://building/lights/changes/{since}"
+# Read-only tools the mirror answers locally; everything else goes to the server
+LOCAL_TOOLS = {"get_state", "get_lights"}
+SERVER_FILTERS = ("floor", "zone", "tag")
+
+
+class LightsMirror:
+    """Local copy of the light states, kept current by resource notifications.
+
+    Subscribes to `resource://building/lights`; each `resources/updated`
+    notification marks the copy stale, and the next read fetches only what changed
+    since the mirrored version. Status questions are then answered without any
+    server traffic while nothing changes.
+
+    The mirror is client-like, so it can be registered with a `ToolRegistry` in
+    place of the session: `get_state` and unfiltered `get_lights` calls are served
+    locally, other tools are forwarded, and a forwarded call marks the copy stale
+    so the caller always reads its own writes.
+    """
+
+    def __init__(self, session, uri: str = LIGHTS_URI, changes_uri: str = CHANGES_URI):
+        self.session = session
+        self.uri = uri
+        self.changes_uri = changes_uri
+        self.lights = {}
+        self.version = 0
+        self.stale = True
+        self.seen_reconnects = 0
+        self.notifications = 0
+        self.refreshes = 0
+        self.full_loads = 0
+        self.local_calls = 0
+        self._refresh_lock = asyncio.Lock()
+
+    @property
+    def transport(self):
+        return self.session.transport
+
+    @property
+    def initialize_result(self):
+        return getattr(self.session, "initialize_result", None)
+
+    async def start(self):
+        self.session.add_message_handler(self._handle_message)
+        await self.session.subscribe_resource(self.uri)
+        await self.refresh()
+
+    async def _handle_message(self, message):
+        notification = getattr(message, "root", message)
+        if getattr(notification, "method", None) != "notifications/resources/updated":
+            return
+        if str(notification.params.uri) == self.uri:
+            self.notifications += 1
+            self.stale = True
+
+    async def refresh(self):
+        """Bring the copy up to date with one small delta read (or a full load if needed)."""
+        async with self._refresh_lock:
+            if not self.stale and self.seen_reconnects == getattr(self.session, "reconnect_count", 0):
+                return
+            # Clear first: a notification arriving during the read marks it stale again
+            self.stale = False
+            reconnects = getattr(self.session, "reconnect_count", 0)
+            if reconnects != self.seen_reconnects:
+                # The server may have restarted and reused version numbers; reload everything
+                self.version = 0
+                self.seen_reconnects = reconnects
+            try:
+                contents = await self.session.read_resource(self.changes_uri.format(since=self.version))
+                delta = json.loads(contents[0].text)
+            except Exception:
+                self.stale = True
+                raise
+            if delta["full"]:
+                self.lights = dict(delta["lights"])
+                self.full_loads += 1
+            else:
+                self.lights.update(delta["lights"])
+            self.version = delta["version"]
+            self.refreshes += 1
+
+    async def get_lights(self) -> dict:
+        """The current `{location: "on"/"off"}` map."""
+        await self.refresh()
+        return self.lights
+
+    # -----------------------------
+    # Client interface
+    # -----------------------------
+    async def call_tool(self, name: str, arguments: dict | None = None):
+        arguments = arguments or {}
+        if name in LOCAL_TOOLS and not any(arguments.get(key) is not None for key in SERVER_FILTERS):
+            lights = await self.get_lights()
+            self.local_calls += 1
+            if name == "get_state":
+                location = arguments.get("location", "")
+                return {location: lights.get(location, "unknown location")}
+            if arguments.get("if_version") == self.version:
+                return {"version": self.version, "unchanged": True}
+            return self._page(lights, arguments, self.version)
+        try:
+            return await self.session.call_tool(name, arguments)
+        finally:
+            if name not in LOCAL_TOOLS:
+                self.stale = True
+
+    @staticmethod
+    def _page(lights: dict, arguments: dict, version: int) -> dict:
+        """Same paging as the server's get_lights, over the mirrored map."""
+        state = arguments.get("state")
+        offset = int(arguments.get("cursor") or 0)
+        limit = max(1, min(int(arguments.get("limit") or 200), 5000))
+        matches = [{"location": location, "state": value}
+                   for location, value in lights.items() if state is None or value == state]
+        page = matches[offset:offset + limit]
+        next_cursor = str(offset + limit) if offset + limit < len(matches) else None
+        return {"lights": page, "next_cursor": next_cursor, "version": version}
+
+    async def list_tools(self):
+        return await self.session.list_tools()
+
+    async def read_resource(self, uri: str):
+        return await self.session.read_resource(uri)
+
+    async def ping(self):
+        return await self.session.ping()
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "lights": len(self.lights),
+            "notifications": self.notifications,
+            "refreshes": self.refreshes,
+            "full_loads": self.full_loads,
+            "local_calls": self.local_calls,
+        }
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import os
+import time
+from types import SimpleNamespace
+from openai import AsyncAzureOpenAI, AsyncOpenAI
+from tracing import tracer, record_usage, SPAN_KIND_CLIENT
+
+DEFAULT_ENDPOINT = "https://eastus.api.cognitive.microsoft.com/"
+DEFAULT_API_VERSION = "2024-12-01-preview"
+# OpenAI-compatible endpoint (e.g. mock_llm_server.py) used instead of Azure when set
+BASE_URL_ENV = "PYAGENT_LLM_BASE_URL"
+# Completions per turn that may request tools; the one after that must answer in text
+MAX_TOOL_ROUNDS = 8
+
+
+class AsyncChatClient:
+    """Shared async chat-completion client for the agents.
+
+    Wraps the async OpenAI client so a completion in flight never blocks the event
+    loop; MCP pings, tool calls and other conversations keep running meanwhile.
+    Default completion parameters are set once here instead of at every call site.
+    Pass `client` to use any OpenAI-compatible async client (e.g. a local mock),
+    and `completion_cache` to serve repeated non-sampling requests from a cache.
+    With PYAGENT_LLM_BASE_URL set, the default client talks to that endpoint instead of Azure.
+    """
+
+    def __init__(self, deployment: str, endpoint: str = DEFAULT_ENDPOINT,
+                 api_version: str = DEFAULT_API_VERSION, api_key: str | None = None,
+                 client=None, completion_cache=None, **completion_params):
+        self.deployment = deployment
+        self.completion_cache = completion_cache
+        base_url = os.environ.get(BASE_URL_ENV)
+        if client is None and base_url:
+            client = AsyncOpenAI(base_url=base_url, api_key=api_key or "mock")
+        self.client = client if client is not None else AsyncAzureOpenAI(
+            api_version=api_version,
+            azure_endpoint=endpoint,
+            api_key=api_key,
+        )
+        self.completion_params = completion_params
+
+    async def complete(self, messages: list[dict], tools: list | None = None, force_cache: bool = False, **params):
+        """Request a chat completion for `messages`; `params` override the defaults.
+
+        `force_cache` uses the completion cache even for sampling requests.
+        """
+        request = dict(self.completion_params)
+        request.update(params)
+        if tools:
+            request["tools"] = tools
+        request["model"] = self.deployment
+        request["messages"] = messages
+        created = False
+
+        async def create():
+            nonlocal created
+            created = True
+            return await self.client.chat.completions.create(**request)
+
+        with tracer.span("chat.completions.create", SPAN_KIND_CLIENT, **self._span_attributes(messages, tools)) as span:
+            if self.completion_cache is None:
+                response = await create()
+            else:
+                response = await self.completion_cache.get_or_create(request, create, force=force_cache)
+                if span is not None:
+                    span.set("pyagent.completion_cache.hit", not created)
+            record_usage(span, getattr(response, "usage", None))
+            return response
+
+    def _span_attributes(self, messages: list[dict], tools: list | None) -> dict:
+        return {
+            "gen_ai.operation.name": "chat",
+            "gen_ai.request.model": self.deployment,
+            "pyagent.request.messages": len(messages),
+            "pyagent.request.tools": len(tools or ()),
+        }
+
+    async def stream(self, messages: list[dict], tools: list | None = None,
+                     on_text=None, on_tool_call=None, **params) -> "ChatStreamAssembler":
+        """Stream a chat completion, calling `on_text(delta)` for every content delta.
+
+        `on_tool_call(tool_call)` is called as soon as a tool call's arguments JSON is
+        complete, while the rest of the response is still streaming in.
+        """
+        request = dict(self.completion_params)
+        request.update(params)
+        if tools:
+            request["tools"] = tools
+        with tracer.span("chat.completions.create", SPAN_KIND_CLIENT, **self._span_attributes(messages, tools),
+                         **{"pyagent.stream": True}) as span:
+            started = time.perf_counter()
+            response_stream = await self.client.chat.completions.create(
+                model=self.deployment,
+                messages=messages,
+                stream=True,
+                stream_options={"include_usage": True},
+                **request,
+            )
+            assembler = ChatStreamAssembler(on_text=on_text)
+            async for chunk in response_stream:
+                if span is not None and "pyagent.time_to_first_chunk_ms" not in span.attributes:
+                    span.set("pyagent.time_to_first_chunk_ms", round((time.perf_counter() - started) * 1000, 3))
+                for tool_call in assembler.add(chunk):
+                    if on_tool_call is not None:
+                        on_tool_call(tool_call)
+            for tool_call in assembler.finish():
+                if on_tool_call is not None:
+                    on_tool_call(tool_call)
+            record_usage(span, assembler.usage)
+            return assembler
+
+    async def close(self):
+        await self.client.close()
+
+
+async def async_input(prompt: str = "") -> str:
+    """`input()` that waits in a worker thread instead of blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, input, prompt)
+
+
+class ChatStreamAssembler:
+    """Rebuilds an assistant message from streamed chat-completion chunks.
+
+    Content deltas are forwarded to `on_text` as they arrive. Tool-call fragments are
+    merged by index, and `add` returns each tool call the moment its arguments form
+    a complete JSON document, so the caller can start it before the stream ends.
+    """
+
+    def __init__(self, on_text=None):
+        self.on_text = on_text
+        self.content_parts = []
+        self.tool_calls = {}
+        self.finish_reason = None
+        self.usage = None
+        self._completed = set()
+
+    @property
+    def content(self) -> str:
+        return "".join(self.content_parts)
+
+    def add(self, chunk) -> list:
+        """Consume one chunk and return the tool calls it completed."""
+        if getattr(chunk, "usage", None) is not None:
+            self.usage = chunk.usage
+        completed = []
+        for choice in chunk.choices:
+            if choice.index != 0:
+                continue
+            if choice.finish_reason is not None:
+                self.finish_reason = choice.finish_reason
+            delta = choice.delta
+            if delta is None:
+                continue
+            if delta.content:
+                self.content_parts.append(delta.content)
+                if self.on_text is not None:
+                    self.on_text(delta.content)
+            for fragment in delta.tool_calls or []:
+                tool_call = self.tool_calls.get(fragment.index)
+                if tool_call is None:
+                    tool_call = SimpleNamespace(
+                        id=None, type="function",
+                        function=SimpleNamespace(name="", arguments=""),
+                    )
+                    self.tool_calls[fragment.index] = tool_call
+                if fragment.id:
+                    tool_call.id = fragment.id
+                if fragment.function is not None:
+                    if fragment.function.name:
+                        tool_call.function.name += fragment.function.name
+                    if fragment.function.arguments:
+                        tool_call.function.arguments += fragment.function.arguments
+                if fragment.index not in self._completed and self._arguments_complete(tool_call):
+                    self._completed.add(fragment.index)
+                    completed.append(tool_call)
+        return completed
+
+    def finish(self) -> list:
+        """Return tool calls that never produced complete JSON while streaming (e.g. no arguments)."""
+        remaining = []
+        for index in sorted(self.tool_calls):
+            if index not in self._completed:
+                self._completed.add(index)
+                remaining.append(self.tool_calls[index])
+        return remaining
+
+    def get_tool_calls(self) -> list:
+        return [self.tool_calls[index] for index in sorted(self.tool_calls)]
+
+    def to_message(self) -> dict:
+        """Assistant message for the conversation history."""
+        message = {"role": "assistant", "content": self.content}
+        tool_calls = self.get_tool_calls()
+        if tool_calls:
+            message["tool_calls"] = [{
+                "id": tool_call.id,
+                "type": "function",
+                "function": {
+                    "name": tool_call.function.name,
+                    "arguments": tool_call.function.arguments,
+                },
+            } for tool_call in tool_calls]
+        return message
+
+    @staticmethod
+    def _arguments_complete(tool_call) -> bool:
+        arguments = tool_call.function.arguments.rstrip()
+        if tool_call.id is None or not tool_call.function.name or not arguments.endswith("}"):
+            return False
+        try:
+            json.loads(arguments)
+        except ValueError:
+            return False
+        return True
+
+
+def print_delta(text: str):
+    print(text, end="", flush=True)
+
+
+async def stream_chat_turn(client: AsyncChatClient, message_history: list[dict],
+                           tools: list | None = None, tool_executor=None) -> str:
+    """Run one streamed user turn, printing tokens as they arrive.
+
+    When `tool_executor` is given, each tool call is started as soon as its arguments
+    are complete, the results are appended to `message_history`, and a streamed
+    follow-up completion continues; follow-ups may call tools again, up to
+    MAX_TOOL_ROUNDS rounds. Returns the final text.
+    """
+    for round_number in range(MAX_TOOL_ROUNDS + 1):
+        tool_tasks = []
+        on_tool_call = None
+        # The last round's tool calls are not run, so the turn always ends
+        if tool_executor is not None and round_number < MAX_TOOL_ROUNDS:
+            on_tool_call = lambda tool_call: tool_tasks.append(tool_executor.submit(tool_call))
+
+        assembler = await client.stream(message_history, tools=tools, on_text=print_delta, on_tool_call=on_tool_call)
+        if assembler.content:
+            print()
+
+        if not tool_tasks:
+            message_history.append({"role": "assistant", "content": assembler.content})
+            return assembler.content
+
+        message_history.append(assembler.to_message())
+        tool_messages = await asyncio.gather(*tool_tasks)
+        call_order = {tool_call.id: index for index, tool_call in enumerate(assembler.get_tool_calls())}
+        message_history.extend(sorted(tool_messages, key=lambda message: call_order.get(message["tool_call_id"], 0)))
+
+
+async def complete_chat_turn(client: AsyncChatClient, message_history: list[dict],
+                             tools: list | None = None, tool_executor=None) -> str:
+    """Run one non-streamed user turn, printing the assistant's replies.
+
+    When the reply asks for tools and `tool_executor` is given, the calls run through
+    it (concurrently where safe), their results are appended to `message_history` in
+    `tool_calls` order, and a follow-up completion continues; follow-ups may call
+    tools again, up to MAX_TOOL_ROUNDS rounds. Returns the final text.
+    """
+    for round_number in range(MAX_TOOL_ROUNDS + 1):
+        message = (await client.complete(message_history, tools=tools)).choices[0].message
+        if message.content:
+            print(f"Assistant> {message.content}")
+
+        if not message.tool_calls or tool_executor is None or round_number == MAX_TOOL_ROUNDS:
+            message_history.append({"role": "assistant", "content": message.content or ""})
+            return message.content or ""
+
+        message_history.append({"role": "assistant", "content": message.content, "tool_calls": message.tool_calls})
+        message_history.extend(await tool_executor.execute(message.tool_calls))
@@ -0,0 +1,215 @@
+import asyncio
+from fastmcp import Client
+from tool_catalog_cache import tool_catalog_cache
+
+
+def default_client_factory(url: str, message_handler) -> Client:
+    return Client(url, message_handler=message_handler)
+
+
+class PooledSession:
+    """Client-like handle on a pooled MCP session.
+
+    Exposes the `Client` methods the agents use (`call_tool`, `list_tools`,
+    `read_resource`, `ping`), so it can be passed anywhere a connected client is
+    expected, e.g. `ToolRegistry.add_server`. Calls wait while the session is
+    reconnecting. A call that fails because the session dropped reconnects it; it is
+    retried once on the new connection only if repeating it is harmless (listing,
+    reading, pings, and tools the server annotates read-only or idempotent), since
+    the server may already have run it. Other calls raise. Server notifications go to
+    every handler added with `add_message_handler`, and resource subscriptions are
+    renewed on reconnect.
+    """
+
+    def __init__(self, pool: "MCPSessionPool", url: str, client_factory=default_client_factory):
+        self.pool = pool
+        self.url = url
+        self.message_handlers = [tool_catalog_cache.list_changed_handler(url)]
+        self.subscriptions = set()
+        # Tools safe to call twice, learned from `list_tools` annotations
+        self.retry_safe_tools = set()
+        self.client = client_factory(url, self._dispatch)
+        self.connected = asyncio.Event()
+        self.reconnect_lock = asyncio.Lock()
+        self.heartbeat_task = None
+        self.reconnect_count = 0
+
+    @property
+    def transport(self):
+        return self.client.transport
+
+    @property
+    def initialize_result(self):
+        return getattr(self.client, "initialize_result", None)
+
+    def is_connected(self) -> bool:
+        return self.connected.is_set() and self.client.is_connected()
+
+    async def _dispatch(self, message):
+        for handler in list(self.message_handlers):
+            await handler(message)
+
+    def add_message_handler(self, handler):
+        """Also pass server messages (notifications) to `async handler(message)`."""
+        self.message_handlers.append(handler)
+
+    async def _request(self, operation, retry: bool = True):
+        if not self.connected.is_set():
+            # Waits for a reconnect in progress, or tries one; raises if the server is unreachable
+            await self.pool.reconnect(self)
+        try:
+            return await operation()
+        except Exception:
+            if self.client.is_connected():
+                # The server answered with an error; retrying could repeat side effects
+                raise
+            await self.pool.reconnect(self)
+            if not retry:
+                # The request may have run before the connection dropped
+                raise
+        return await operation()
+
+    async def call_tool(self, name: str, arguments: dict | None = None):
+        return await self._request(lambda: self.client.call_tool(name, arguments or {}),
+                                   retry=name in self.retry_safe_tools)
+
+    async def list_tools(self):
+        tools = await self._request(self.client.list_tools)
+        self.retry_safe_tools = {
+            tool.name for tool in tools
+            if tool.annotations is not None and (tool.annotations.readOnlyHint or tool.annotations.idempotentHint)
+        }
+        return tools
+
+    async def read_resource(self, uri: str):
+        return await self._request(lambda: self.client.read_resource(uri))
+
+    async def ping(self):
+        return await self._request(self.client.ping)
+
+    async def subscribe_resource(self, uri: str):
+        """Ask for `notifications/resources/updated` for `uri`, now and after every reconnect."""
+        self.subscriptions.add(uri)
+        await self._request(lambda: self.client.session.subscribe_resource(uri))
+
+    async def unsubscribe_resource(self, uri: str):
+        self.subscriptions.discard(uri)
+        await self._request(lambda: self.client.session.unsubscribe_resource(uri))
+
+
+class MCPSessionPool:
+    """Keeps one warm, long-lived session per MCP server URL.
+
+    Every caller asking for the same URL shares one session; MCP multiplexes
+    concurrent requests over it by request id, so there is no per-call connection
+    setup. A heartbeat task pings each session and reconnects it with exponential
+    backoff when the ping fails. Connecting gives up after `max_connect_attempts`
+    tries or `connect_timeout` seconds and raises `ConnectionError`; sessions for
+    other URLs connect independently meanwhile.
+    """
+
+    def __init__(self, heartbeat_interval: float = 15.0, ping_timeout: float = 5.0,
+                 initial_backoff: float = 0.5, max_backoff: float = 30.0,
+                 max_connect_attempts: int = 5, connect_timeout: float = 60.0,
+                 client_factory=default_client_factory):
+        self.heartbeat_interval = heartbeat_interval
+        self.ping_timeout = ping_timeout
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.max_connect_attempts = max_connect_attempts
+        self.connect_timeout = connect_timeout
+        self.client_factory = client_factory
+        self.sessions = {}
+        self._url_locks = {}
+
+    async def get(self, url: str) -> PooledSession:
+        """Return the shared session for `url`, connecting it on first use.
+
+        Raises `ConnectionError` if the server cannot be reached; the next call tries again.
+        """
+        lock = self._url_locks.setdefault(url, asyncio.Lock())
+        async with lock:
+            session = self.sessions.get(url)
+            if session is None:
+                session = PooledSession(self, url, self.client_factory)
+                await self._connect(session)
+                session.heartbeat_task = asyncio.create_task(self._heartbeat(session))
+                self.sessions[url] = session
+        return session
+
+    async def _connect(self, session: PooledSession):
+        backoff = self.initial_backoff
+        deadline = asyncio.get_running_loop().time() + self.connect_timeout
+        for attempt in range(1, self.max_connect_attempts + 1):
+            remaining = deadline - asyncio.get_running_loop().time()
+            try:
+                await asyncio.wait_for(session.client.__aenter__(), timeout=max(remaining, 0.001))
+                session.connected.set()
+                return
+            except Exception as e:
+                error = e
+            remaining = deadline - asyncio.get_running_loop().time()
+            if attempt == self.max_connect_attempts or remaining <= backoff:
+                break
+            print(f"MCP connect to {session.url} failed ({error}); retrying in {backoff:.1f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+        raise ConnectionError(f"Could not connect to MCP server {session.url} after {attempt} attempts: {error}")
+
+    async def _disconnect(self, session: PooledSession):
+        session.connected.clear()
+        try:
+            await session.client.__aexit__(None, None, None)
+        except Exception:
+            pass
+
+    async def reconnect(self, session: PooledSession, force: bool = False):
+        """Reconnect `session`; callers queued behind a finished reconnect reuse it."""
+        async with session.reconnect_lock:
+            if not force and session.connected.is_set() and session.client.is_connected():
+                return
+            await self._disconnect(session)
+            await self._connect(session)
+            session.reconnect_count += 1
+            for uri in session.subscriptions:
+                try:
+                    await session.client.session.subscribe_resource(uri)
+                except Exception as e:
+                    print(f"MCP resubscribe to {uri} on {session.url} failed ({e})")
+
+    async def _heartbeat(self, session: PooledSession):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await asyncio.wait_for(session.client.ping(), timeout=self.ping_timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"MCP heartbeat to {session.url} failed ({e}); reconnecting")
+                try:
+                    await self.reconnect(session, force=True)
+                except ConnectionError as e:
+                    # Calls fail until a later heartbeat gets through
+                    print(e)
+
+    async def close(self):
+        sessions, self.sessions = self.sessions, {}
+        for session in sessions.values():
+            if session.heartbeat_task is not None:
+                session.heartbeat_task.cancel()
+            await self._disconnect(session)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def stats(self) -> dict:
+        return {
+            url: {"connected": session.is_connected(), "reconnects": session.reconnect_count}
+            for url, session in self.sessions.items()
+        }
+
+
+mcp_session_pool = MCPSessionPool()
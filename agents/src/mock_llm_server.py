@@ -0,0 +1,224 @@
+"""Local OpenAI-compatible mock chat-completions endpoint.
+
+Usage:
+  python mock_llm_server.py [port] [latency_seconds] [token_interval_seconds] [script.json]
+
+Serves `POST .../chat/completions` (both the OpenAI `/v1/...` and the Azure
+`/openai/deployments/<name>/...` paths) over plain HTTP/1.1 with keep-alive,
+replying after a fixed latency. Requests with `stream: true` get server-sent
+events, one word per chunk, `token_interval` seconds apart; other requests wait
+`token_interval` per chunk before the whole reply is sent.
+
+A script is a list of rules such as
+  {"match": "which lights", "tool_calls": [{"name": "get_lights", "arguments": {"state": "on"}}]}
+When the last message is a user message containing `match` (case-insensitive),
+the reply calls the listed tools that the request offers, plus `reply` as text if
+given. After tool results the reply summarizes them. Point
+`AsyncOpenAI(base_url=server.base_url)` at it, or set PYAGENT_LLM_BASE_URL, to
+exercise the agents without Azure.
+"""
+import asyncio
+import json
+import sys
+import time
+import uuid
+
+
+class MockLLMServer:
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.2,
+                 token_interval: float = 0.0, script: list[dict] | None = None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.token_interval = token_interval
+        self.script = script or []
+        self.request_count = 0
+        self.tool_call_count = 0
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    def build_message(self, request: dict) -> dict:
+        """The assistant message: scripted tool calls, a summary of tool results, or an echo."""
+        messages = request.get("messages", [])
+        last = messages[-1] if messages else {}
+        if last.get("role") == "tool":
+            results = 0
+            while results < len(messages) and messages[-1 - results].get("role") == "tool":
+                results += 1
+            return {"role": "assistant", "content": f"Mock summary of {results} tool results."}
+
+        last_content = str(last.get("content", ""))
+        rule = next((rule for rule in self.script if rule["match"].lower() in last_content.lower()), None)
+        if rule is None:
+            return {"role": "assistant", "content": f"Mock reply to: {last_content[:80]}"}
+        offered = {tool["function"]["name"] for tool in request.get("tools") or ()}
+        tool_calls = []
+        for call in rule.get("tool_calls", ()):
+            # Registries namespace clashing names as `<namespace>__<name>`
+            name = next((name for name in offered if name == call["name"] or name.endswith("__" + call["name"])), None)
+            if name is not None:
+                tool_calls.append({
+                    "id": f"call_{uuid.uuid4().hex[:24]}",
+                    "type": "function",
+                    "function": {"name": name, "arguments": json.dumps(call.get("arguments", {}))},
+                })
+        message = {"role": "assistant", "content": rule.get("reply") or (None if tool_calls else "")}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+            self.tool_call_count += len(tool_calls)
+        return message
+
+    def build_completion(self, request: dict) -> dict:
+        messages = request.get("messages", [])
+        message = self.build_message(request)
+        reply = message.get("content") or ""
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock-model"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+                "message": message,
+            }],
+            "usage": {
+                "prompt_tokens": sum(len(str(m.get("content", ""))) // 4 for m in messages),
+                "completion_tokens": len(reply) // 4,
+                "total_tokens": 0,
+            },
+        }
+
+    async def handle_completion(self, request: dict, writer: asyncio.StreamWriter):
+        await asyncio.sleep(self.latency)
+        completion = self.build_completion(request)
+        if request.get("stream"):
+            await self._write_stream(writer, completion)
+        else:
+            if self.token_interval:
+                # Same generation time as the streamed reply, delivered at once
+                await asyncio.sleep(self.token_interval * len(self.build_stream_chunks(completion)))
+            self._write_json(writer, 200, completion)
+
+    def build_stream_chunks(self, completion: dict) -> list[dict]:
+        """Split a full completion into `chat.completion.chunk` payloads."""
+        message = completion["choices"][0]["message"]
+        base = {
+            "id": completion["id"],
+            "object": "chat.completion.chunk",
+            "created": completion["created"],
+            "model": completion["model"],
+        }
+        deltas = [{"role": "assistant", "content": ""}]
+        words = (message.get("content") or "").split(" ")
+        deltas.extend({"content": word if index == 0 else " " + word} for index, word in enumerate(words) if word)
+        for index, tool_call in enumerate(message.get("tool_calls") or []):
+            arguments = tool_call["function"]["arguments"]
+            half = len(arguments) // 2
+            deltas.append({"tool_calls": [{
+                "index": index, "id": tool_call["id"], "type": "function",
+                "function": {"name": tool_call["function"]["name"], "arguments": arguments[:half]},
+            }]})
+            deltas.append({"tool_calls": [{"index": index, "function": {"arguments": arguments[half:]}}]})
+
+        chunks = [dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": None}]) for delta in deltas]
+        chunks.append(dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": completion["choices"][0]["finish_reason"]}]))
+        chunks.append(dict(base, choices=[], usage=completion["usage"]))
+        return chunks
+
+    async def _write_stream(self, writer: asyncio.StreamWriter, completion: dict):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Transfer-Encoding: chunked\r\n"
+            b"Connection: keep-alive\r\n\r\n"
+        )
+        events = [f"data: {json.dumps(chunk)}\n\n" for chunk in self.build_stream_chunks(completion)]
+        events.append("data: [DONE]\n\n")
+        for event in events:
+            data = event.encode("utf-8")
+            writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+            await writer.drain()
+            if self.token_interval:
+                await asyncio.sleep(self.token_interval)
+        writer.write(b"0\r\n\r\n")
+
+    def _write_json(self, writer: asyncio.StreamWriter, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        reason = "OK" if status == 200 else "Not Found"
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n\r\n".encode("latin-1") + body
+        )
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", "0")))
+
+                if method == "POST" and path.split("?", 1)[0].endswith("/chat/completions"):
+                    self.request_count += 1
+                    await self.handle_completion(json.loads(body or b"{}"), writer)
+                else:
+                    self._write_json(writer, 404, {"error": {"message": f"Unknown path {path}"}})
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+def load_script(path: str) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+async def serve(port: int, latency: float, token_interval: float, script: list[dict] | None = None):
+    async with MockLLMServer(port=port, latency=latency, token_interval=token_interval, script=script) as server:
+        print(f"Mock LLM listening on {server.base_url} ({len(server.script)} scripted rules)")
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8100
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    token_interval = float(sys.argv[3]) if len(sys.argv) > 3 else 0.02
+    script = load_script(sys.argv[4]) if len(sys.argv) > 4 else None
+    try:
+        asyncio.run(serve(port, latency, token_interval, script))
+    except KeyboardInterrupt:
+        pass
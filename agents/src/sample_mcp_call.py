@@ -1,17 +1,29 @@
 import asyncio
 from fastmcp import Client
+from mcp_session_pool import mcp_session_pool
 
-client = Client("http://localhost:8000/mcp")
+mcp_url = "http://localhost:8000/mcp"
+client = Client(mcp_url)
 
+# Single calls share one warm pooled session instead of connecting per call
 async def call_tool(name: str):
-    async with client:
-        result = await client.call_tool("greet", {"name": name})
-        print(result)
+    session = await mcp_session_pool.get(mcp_url)
+    result = await session.call_tool("greet", {"name": name})
+    print(result)
 
 async def call_resource(name: str):
-    async with client:
-        content = await client.read_resource("resource://building/lights")
-        print(content[0].text)
+    session = await mcp_session_pool.get(mcp_url)
+    content = await session.read_resource("resource://building/lights")
+    print(content[0].text)
+
+async def call_many(names: list[str]):
+    await asyncio.gather(*(call_tool(name) for name in names))
+    await call_resource(names[0])
+
+async def pooled(coroutine):
+    """Run `coroutine`, then close the pooled sessions it opened."""
+    async with mcp_session_pool:
+        await coroutine
 
 async def main():
     async with client:
@@ -33,7 +45,8 @@ async def main():
 
 if __name__ == "__main__":
     # Single calls for demonstration
-    # asyncio.run(call_tool("Ford"))
-    asyncio.run(call_resource("Ford"))
+    # asyncio.run(pooled(call_tool("Ford")))
+    # asyncio.run(pooled(call_many(["Ford", "Arthur", "Zaphod"])))
+    asyncio.run(pooled(call_resource("Ford")))
     # Run suite of examples
     # asyncio.run(main())
\ No newline at end of file
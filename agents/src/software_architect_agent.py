@@ -1,12 +1,16 @@
 import asyncio
-from openai import AzureOpenAI
 from openai.types.chat import chat_completion_message
 from fastmcp import Client
 from mcp.types import Tool
-from common_utility import get_secret
+from common_utility import get_secret, fetch_tool_specs
+from tool_catalog_cache import tool_catalog_cache
+from mcp_session_pool import mcp_session_pool
+from completion_cache import completion_cache_for
+from llm_client import AsyncChatClient, async_input, stream_chat_turn
 
-mcp_client = Client("http://localhost:8000/mcp")
-playwright_mcp_client = Client('http://localhost:8931/mcp')
+mcp_url = "http://localhost:8000/mcp"
+playwright_mcp_url = 'http://localhost:8931/mcp'
+mcp_client = Client(mcp_url, message_handler=tool_catalog_cache.list_changed_handler(mcp_url))
 
 endpoint = "https://eastus.api.cognitive.microsoft.com/"
 model_name = "gpt-4.1"
@@ -15,10 +19,17 @@ deployment = "gpt-4.1"
 subscription_key = get_secret('AzureOpenAiApiKey')
 api_version = "2024-12-01-preview"
 
-client = AzureOpenAI(
+client = AsyncChatClient(
+    deployment,
+    endpoint=endpoint,
     api_version=api_version,
-    azure_endpoint=endpoint,
     api_key=subscription_key,
+    completion_cache=completion_cache_for(deployment),
+    max_completion_tokens=13107,
+    temperature=1.0,
+    top_p=1.0,
+    frequency_penalty=0.0,
+    presence_penalty=0.0,
 )
 
 def convert_fastapi_to_openai_tools(tool_list: list) -> list:
@@ -60,15 +71,21 @@ def convert_fastapi_to_openai_tools(tool_list: list) -> list:
     return openai_tools
 
 async def get_tools():
-    async with mcp_client, playwright_mcp_client:
-        tools = await mcp_client.list_tools()
-        tools = []
-        tools.extend(await playwright_mcp_client.list_tools())
-        print("Tools:", len(tools))
-        # print("Tools:", tools)
-        tool_specs = convert_fastapi_to_openai_tools(tools)
-        # print("Converted Tool Specs:", tool_specs)
+    # Serve the playwright tool list from the catalog cache; list_tools() runs only on a miss.
+    # The pooled session stays open, so its tools/list_changed handler can invalidate the
+    # entry and the next call fetches the new list.
+    try:
+        session = await mcp_session_pool.get(playwright_mcp_url)
+    except ConnectionError as e:
+        # No session to hear list_changed: the cached list is only refreshed by its TTL
+        tool_specs = tool_catalog_cache.lookup(playwright_mcp_url)
+        if tool_specs is None:
+            raise
+        print(f"{e}; using cached tools")
         return tool_specs
+    tool_specs = await tool_catalog_cache.get_tool_specs(session, lambda: fetch_tool_specs(session))
+    # print("Converted Tool Specs:", tool_specs)
+    return tool_specs
         # tool_specs = [
         #     {
         #         "type": "function",
@@ -94,6 +111,11 @@ async def get_tools():
 
 
 async def run():
+    async with mcp_session_pool:
+        await run_turn()
+
+
+async def run_turn():
     message_history = [{
         "role": "system",
         "content": """You are world-class software architect.""",
@@ -106,47 +128,43 @@ async def run():
 
     tool_specs = await get_tools()
 
-    response = client.chat.completions.create(
-        messages=message_history,
-        max_completion_tokens=13107,
-        temperature=1.0,
-        top_p=1.0,
-        frequency_penalty=0.0,
-        presence_penalty=0.0,
-        model=deployment,
-        tools=tool_specs, # Pass the tool schema here
-    )
+    response = await client.complete(message_history, tools=tool_specs)
 
     print(response.choices[0].message.content)
 
 async def chat_debug():
+    async with mcp_session_pool:
+        await chat_loop()
+
+
+async def chat_loop():
     message_history = [{
         "role": "system",
         "content": "You are a helpful assistant.",
     }]
-    tool_specs = await get_tools()
 
+    print("Tools:", len(await get_tools()))
     user_input = ""
 
+    # Print tokens as they arrive instead of waiting for the full completion
+    stream_mode = True
+
     while user_input.lower() != "/bye":
 
-        user_input = input("User> ")
+        user_input = await async_input("User> ")
+        # A cache lookup unless the server announced a changed tool list
+        tool_specs = await get_tools()
 
         message_history.append({
             "role": "user",
             "content": user_input,
         })
 
-        response = client.chat.completions.create(
-            messages=message_history,
-            max_completion_tokens=13107,
-            temperature=1.0,
-            top_p=1.0,
-            frequency_penalty=0.0,
-            presence_penalty=0.0,
-            model=deployment,
-            tools=tool_specs,  # Pass the tool schema here
-        )
+        if stream_mode:
+            await stream_chat_turn(client, message_history, tools=tool_specs)
+            continue
+
+        response = await client.complete(message_history, tools=tool_specs)
 
         if len(response.choices) > 0:
             if len(response.choices) > 1:
@@ -1,6 +1,8 @@
 from openai import AzureOpenAI
 from openai.types.chat import chat_completion_message
 from common_utility import get_secret
+from conversation_history import TokenBudgetedHistory
+from llm_client import ChatStreamAssembler, print_delta
 
 endpoint = "https://eastus.api.cognitive.microsoft.com/"
 model_name = "gpt-5-nano"
@@ -17,14 +19,17 @@ client = AzureOpenAI(
     api_key=subscription_key,
 )
 
-message_history = [{
+message_history = TokenBudgetedHistory([{
     "role": "system",
     "content": "You are a helpful assistant.",
-}]
+}], token_budget=16000)
 
 
 user_input = ""
 
+# Print tokens as they arrive instead of waiting for the full completion
+stream_mode = True
+
 while user_input.lower() != "/bye":
 
     user_input = input("User> ")
@@ -33,6 +38,29 @@ while user_input.lower() != "/bye":
         "role": "user",
         "content": user_input,
     })
+    message_history.trim()
+    print(message_history.report())
+
+    if stream_mode:
+        response_stream = client.chat.completions.create(
+            messages=message_history,
+            max_completion_tokens=13107,
+            temperature=1.0,
+            top_p=1.0,
+            frequency_penalty=0.0,
+            presence_penalty=0.0,
+            model=deployment,
+            stream=True,
+        )
+        assembler = ChatStreamAssembler(on_text=print_delta)
+        for chunk in response_stream:
+            assembler.add(chunk)
+        print()
+        message_history.append({
+            "role": "assistant",
+            "content": assembler.content,
+        })
+        continue
 
     response = client.chat.completions.create(
         messages=message_history,
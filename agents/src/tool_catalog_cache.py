@@ -0,0 +1,146 @@
+import json
+import os
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".pyagent", "tool_catalog.json")
+DEFAULT_TTL_SECONDS = 3600
+
+
+def get_server_url(client) -> str:
+    """Best-effort URL of the server behind a fastmcp `Client`."""
+    transport = getattr(client, "transport", None)
+    url = getattr(transport, "url", None)
+    return str(url) if url is not None else repr(transport)
+
+
+def get_server_version(client) -> str | None:
+    """Server version from the MCP initialize handshake, if the client is connected."""
+    initialize_result = getattr(client, "initialize_result", None)
+    server_info = getattr(initialize_result, "serverInfo", None)
+    return getattr(server_info, "version", None)
+
+
+class ToolCatalogCache:
+    """Disk-backed cache of translated OpenAI tool specs, keyed by server URL and version.
+
+    Entries live until their TTL expires or the server sends a
+    `notifications/tools/list_changed` notification (wire `list_changed_handler`
+    into the client's `message_handler`; `MCPSessionPool` sessions do this). The
+    notification is only heard while that client stays connected, so callers that
+    connect just to fill the cache get TTL-only refresh. The JSON file lets a fresh
+    process start without calling `list_tools()` at all.
+    """
+
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.entries = self._load()
+
+    @staticmethod
+    def make_key(server_url: str, server_version: str | None) -> str:
+        return f"{server_url}|{server_version or ''}"
+
+    def _load(self) -> dict:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as cache_file:
+                return json.load(cache_file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        temp_path = self.cache_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as cache_file:
+            json.dump(self.entries, cache_file)
+        os.replace(temp_path, self.cache_path)
+
+    def _is_fresh(self, entry: dict) -> bool:
+        return time.time() - entry["fetched_at"] < self.ttl_seconds
+
+    def lookup(self, server_url: str, server_version: str | None = None) -> list | None:
+        """Return cached specs for a server, or None on a miss.
+
+        With no `server_version` (e.g. before connecting) the newest fresh entry
+        for the URL is used, so callers can skip connecting just to list tools.
+        """
+        entry = self._lookup_entry(server_url, server_version)
+        return entry["tool_specs"] if entry is not None else None
+
+    def _lookup_entry(self, server_url: str, server_version: str | None, fields: tuple = ("tool_specs",)) -> dict | None:
+        if server_version is not None:
+            entry = self.entries.get(self.make_key(server_url, server_version))
+            candidates = [entry] if entry is not None else []
+        else:
+            candidates = [entry for entry in self.entries.values() if entry["server_url"] == server_url]
+        # Entries written before a field was kept count as misses
+        candidates = [entry for entry in candidates
+                      if self._is_fresh(entry) and all(field in entry for field in fields)]
+        if not candidates:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return max(candidates, key=lambda entry: entry["fetched_at"])
+
+    def store(self, server_url: str, server_version: str | None, tool_specs: list,
+              read_only_tools: list | None = None):
+        entry = {
+            "server_url": server_url,
+            "server_version": server_version,
+            "fetched_at": time.time(),
+            "tool_specs": tool_specs,
+        }
+        if read_only_tools is not None:
+            entry["read_only_tools"] = list(read_only_tools)
+        self.entries[self.make_key(server_url, server_version)] = entry
+        self._save()
+
+    def invalidate(self, server_url: str | None = None):
+        """Drop entries for `server_url`, or everything when no URL is given."""
+        self.entries = {
+            key: entry for key, entry in self.entries.items()
+            if server_url is not None and entry["server_url"] != server_url
+        }
+        self._save()
+
+    async def get_tool_specs(self, client, fetch) -> list:
+        """Cached specs for a connected `client`; on a miss, `await fetch()` and store the result."""
+        server_url = get_server_url(client)
+        server_version = get_server_version(client)
+        tool_specs = self.lookup(server_url, server_version)
+        if tool_specs is None:
+            tool_specs = await fetch()
+            self.store(server_url, server_version, tool_specs)
+        return tool_specs
+
+    async def get_tool_catalog(self, client, fetch) -> tuple[list, list]:
+        """Cached `(tool_specs, read_only_tools)` for a connected `client`; on a miss, `await fetch()` and store it."""
+        server_url = get_server_url(client)
+        server_version = get_server_version(client)
+        entry = self._lookup_entry(server_url, server_version, ("tool_specs", "read_only_tools"))
+        if entry is not None:
+            return entry["tool_specs"], entry["read_only_tools"]
+        tool_specs, read_only_tools = await fetch()
+        self.store(server_url, server_version, tool_specs, read_only_tools)
+        return tool_specs, read_only_tools
+
+    def list_changed_handler(self, server_url: str):
+        """Message handler for `Client(..., message_handler=...)` that invalidates on tools/list_changed."""
+        async def handle(message):
+            notification = getattr(message, "root", message)
+            if getattr(notification, "method", None) == "notifications/tools/list_changed":
+                self.invalidate(server_url)
+        return handle
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+        }
+
+
+tool_catalog_cache = ToolCatalogCache()
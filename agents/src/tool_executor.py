@@ -0,0 +1,141 @@
+import asyncio
+import json
+import time
+from tracing import tracer, SPAN_KIND_CLIENT
+
+# Tools that only read state and can safely run alongside each other.
+# Anything not listed here (or not annotated as read-only by its server)
+# is treated as unsafe and runs on its own, in the order the model asked for it.
+DEFAULT_PARALLEL_SAFE_TOOLS = {
+    "get_lights",
+    "get_state",
+    "read_file",
+    "list_files",
+    "greet",
+}
+
+
+class ToolCallExecutor:
+    """Runs the tool calls from one assistant turn concurrently.
+
+    Consecutive parallel-safe calls are fanned out with asyncio; an unsafe call
+    (e.g. `change_state`) acts as a barrier and runs alone, so mutating tools keep
+    their original order relative to every other call. Concurrency against any
+    single MCP server is capped by a per-server semaphore. Tool messages are
+    returned in the same order as the incoming `tool_calls`.
+
+    `tools_to_client` is either a plain `{tool_name: client}` dict or a
+    `ToolRegistry`, whose `route()` also maps namespaced names back to server names
+    and whose `read_only_tools` (from MCP annotations at discovery) are parallel-safe.
+    """
+
+    def __init__(self, tools_to_client, parallel_safe_tools: set[str] | None = None,
+                 max_concurrency_per_server: int = 4):
+        self.tools_to_client = tools_to_client
+        self.parallel_safe_tools = set(DEFAULT_PARALLEL_SAFE_TOOLS if parallel_safe_tools is None else parallel_safe_tools)
+        self.max_concurrency_per_server = max_concurrency_per_server
+        self._server_semaphores = {}
+        self._barrier = None
+        self._in_flight = []
+
+    def mark_parallel_safe(self, tool_name: str, safe: bool = True):
+        if safe:
+            self.parallel_safe_tools.add(tool_name)
+        else:
+            self.parallel_safe_tools.discard(tool_name)
+
+    def mark_from_annotations(self, tool_list: list):
+        """Mark tools whose server declares them read-only (MCP `readOnlyHint`) as parallel-safe."""
+        for tool in tool_list:
+            annotations = getattr(tool, "annotations", None)
+            if annotations is not None and getattr(annotations, "readOnlyHint", None):
+                self.parallel_safe_tools.add(tool.name)
+
+    def is_parallel_safe(self, tool_name: str) -> bool:
+        return tool_name in self.parallel_safe_tools
+
+    def _resolve(self, tool_name: str) -> tuple:
+        route = getattr(self.tools_to_client, "route", None)
+        if route is not None:
+            return route(tool_name)
+        return self.tools_to_client[tool_name], tool_name
+
+    def _is_call_parallel_safe(self, tool_name: str) -> bool:
+        # Read at call time, so a later rediscovery is picked up
+        if tool_name in getattr(self.tools_to_client, "read_only_tools", ()):
+            return True
+        try:
+            _, server_tool_name = self._resolve(tool_name)
+        except KeyError:
+            server_tool_name = tool_name
+        return self.is_parallel_safe(server_tool_name)
+
+    def _semaphore_for(self, client) -> asyncio.Semaphore:
+        key = id(client)
+        if key not in self._server_semaphores:
+            self._server_semaphores[key] = asyncio.Semaphore(self.max_concurrency_per_server)
+        return self._server_semaphores[key]
+
+    async def _run_one(self, tool_call, queued_since: float | None = None) -> dict:
+        tool_name = tool_call.function.name
+        queued_since = time.perf_counter() if queued_since is None else queued_since
+        with tracer.span("call_tool", SPAN_KIND_CLIENT, **{"gen_ai.operation.name": "execute_tool",
+                                                          "gen_ai.tool.name": tool_name,
+                                                          "gen_ai.tool.call.id": tool_call.id}) as span:
+            tool_args_raw = tool_call.function.arguments
+            try:
+                client, server_tool_name = self._resolve(tool_name)
+                tool_args = json.loads(tool_args_raw) if isinstance(tool_args_raw, str) and tool_args_raw else (tool_args_raw or {})
+                async with self._semaphore_for(client):
+                    if span is not None:
+                        # Time spent behind an earlier unsafe call or the per-server limit
+                        span.set("pyagent.tool.queued_ms", round((time.perf_counter() - queued_since) * 1000, 3))
+                    result = await client.call_tool(server_tool_name, tool_args)
+                content = str(result) if result is not None else ""
+            except Exception as e:
+                # Every tool_call_id needs a tool message, so surface errors to the model
+                content = f"Error calling tool '{tool_name}': {e}"
+                if span is not None:
+                    span.error = f"{type(e).__name__}: {e}"
+            if span is not None:
+                span.set("pyagent.tool.request_bytes", len(tool_args_raw) if isinstance(tool_args_raw, str) else None)
+                span.set("pyagent.tool.response_bytes", len(content))
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call.id,
+            "name": tool_name,
+            "content": content,
+        }
+
+    def submit(self, tool_call) -> asyncio.Task:
+        """Start `tool_call` now and return its task (resolving to the tool message).
+
+        A parallel-safe call only waits for the last unsafe call submitted before it;
+        an unsafe call waits for everything submitted before it. This lets callers
+        start each call as soon as it is known (e.g. while a response is still
+        streaming) without reordering mutating tools.
+        """
+        if self._is_call_parallel_safe(tool_call.function.name):
+            waits = [self._barrier] if self._barrier is not None else []
+            task = asyncio.create_task(self._run_after(waits, tool_call))
+            self._in_flight = [t for t in self._in_flight if not t.done()]
+            self._in_flight.append(task)
+        else:
+            waits = list(self._in_flight)
+            if self._barrier is not None:
+                waits.append(self._barrier)
+            task = asyncio.create_task(self._run_after(waits, tool_call))
+            self._barrier = task
+            self._in_flight = []
+        return task
+
+    async def _run_after(self, waits: list, tool_call) -> dict:
+        queued_since = time.perf_counter()
+        if waits:
+            await asyncio.gather(*waits, return_exceptions=True)
+        return await self._run_one(tool_call, queued_since)
+
+    async def execute(self, tool_calls: list) -> list[dict]:
+        """Execute `tool_calls` and return their `role: tool` messages in original order."""
+        tasks = [self.submit(tool_call) for tool_call in tool_calls]
+        return list(await asyncio.gather(*tasks))
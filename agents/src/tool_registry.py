@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import json
+import re
+import time
+from urllib.parse import urlparse
+from common_utility import fetch_tool_catalog
+from tool_catalog_cache import ToolCatalogCache, tool_catalog_cache, get_server_url
+from tracing import tracer, SPAN_KIND_CLIENT
+
+# OpenAI function names must match ^[a-zA-Z0-9_-]{1,64}$
+MAX_TOOL_NAME_LENGTH = 64
+NAMESPACE_SEPARATOR = "__"
+# Hex digits of the hash that tells apart names left equal by truncation or a shared namespace
+NAME_SUFFIX_LENGTH = 8
+
+
+def default_namespace(client) -> str:
+    """Namespace derived from the server URL, e.g. `localhost_8931`."""
+    server_url = get_server_url(client)
+    parsed = urlparse(server_url)
+    raw = f"{parsed.hostname}_{parsed.port}" if parsed.hostname else server_url
+    return re.sub(r"[^a-zA-Z0-9_-]", "_", raw)
+
+
+class ToolRegistry:
+    """Discovers tools on several MCP servers at once and routes calls by tool name.
+
+    Discovery runs concurrently, so startup costs as much as the slowest server
+    rather than the sum of all of them. Each exposed tool name maps to its client in
+    a dict for O(1) routing. A name offered by more than one server is exposed as
+    `<namespace>__<name>` for every server offering it, and routed back to the
+    original name on call. If that name is too long or already taken (by truncation,
+    a namespace shared by two servers, or a tool literally named that way), a short
+    hash of server position, namespace and name is appended instead.
+    `read_only_tools` holds the exposed names of tools their server annotates as
+    read-only, which `ToolCallExecutor` runs in parallel.
+    """
+
+    def __init__(self, cache: ToolCatalogCache | None = tool_catalog_cache):
+        self.cache = cache
+        self.servers = []
+        self.routes = {}
+        self.tool_specs = []
+        self.read_only_tools = set()
+
+    def add_server(self, client, namespace: str | None = None):
+        self.servers.append((client, namespace or default_namespace(client)))
+
+    async def _fetch(self, client) -> tuple[list, list]:
+        if self.cache is None:
+            return await fetch_tool_catalog(client)
+        return await self.cache.get_tool_catalog(client, lambda: fetch_tool_catalog(client))
+
+    async def discover(self) -> list:
+        """List tools on every registered server concurrently and rebuild the routing index."""
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self._fetch(client) for client, _ in self.servers))
+
+        name_counts = {}
+        for server_specs, _ in results:
+            for spec in server_specs:
+                name = spec["function"]["name"]
+                name_counts[name] = name_counts.get(name, 0) + 1
+
+        self.routes = {}
+        self.tool_specs = []
+        self.read_only_tools = set()
+        # Unique names keep their plain form, so namespaced ones must steer clear of them
+        taken = {name for name, count in name_counts.items() if count == 1}
+        for position, ((client, namespace), (server_specs, read_only_tools)) in enumerate(zip(self.servers, results)):
+            for spec in server_specs:
+                name = spec["function"]["name"]
+                exposed_name = name
+                if name_counts[name] > 1:
+                    exposed_name = self._namespaced_name(position, namespace, name, taken)
+                    taken.add(exposed_name)
+                    spec = dict(spec, function=dict(spec["function"], name=exposed_name))
+                self.routes[exposed_name] = (client, name)
+                if name in read_only_tools:
+                    self.read_only_tools.add(exposed_name)
+                self.tool_specs.append(spec)
+
+        print("Discovered {0} tools on {1} servers in {2:.0f} ms".format(
+            len(self.tool_specs), len(self.servers), (time.perf_counter() - start) * 1000))
+        return self.tool_specs
+
+    @staticmethod
+    def _namespaced_name(position: int, namespace: str, name: str, taken: set) -> str:
+        """`<namespace>__<name>`, or a hash-suffixed form if that is too long or taken."""
+        exposed_name = f"{namespace}{NAMESPACE_SEPARATOR}{name}"
+        if len(exposed_name) <= MAX_TOOL_NAME_LENGTH and exposed_name not in taken:
+            return exposed_name
+        digest = hashlib.sha1(f"{position}:{namespace}:{name}".encode("utf-8")).hexdigest()[:NAME_SUFFIX_LENGTH]
+        suffixed = f"{exposed_name[:MAX_TOOL_NAME_LENGTH - NAME_SUFFIX_LENGTH - 1]}_{digest}"
+        if suffixed in taken:
+            raise ValueError(f"Tool name '{name}' from namespace '{namespace}' collides as '{suffixed}'")
+        return suffixed
+
+    def route(self, tool_name: str) -> tuple:
+        """Return `(client, server_tool_name)` for an exposed tool name."""
+        if tool_name not in self.routes:
+            raise KeyError(f"Unknown tool: {tool_name}")
+        return self.routes[tool_name]
+
+    def __contains__(self, tool_name: str) -> bool:
+        return tool_name in self.routes
+
+    async def call_tool(self, tool_name: str, arguments: dict):
+        client, server_tool_name = self.route(tool_name)
+        with tracer.span("call_tool", SPAN_KIND_CLIENT, **{"gen_ai.operation.name": "execute_tool",
+                                                          "gen_ai.tool.name": tool_name}) as span:
+            result = await client.call_tool(server_tool_name, arguments)
+            if span is not None:
+                span.set("pyagent.tool.request_bytes", len(json.dumps(arguments, default=str)))
+                span.set("pyagent.tool.response_bytes", len(str(result)))
+            return result
@@ -0,0 +1,136 @@
+"""Summarize an agent trace file into a per-turn latency breakdown.
+
+Usage:
+  python trace_summary.py [trace.jsonl] [last_turns]
+
+Reads spans written by `tracing.Tracer` (PYAGENT_TRACE_FILE when no path is
+given) and prints one row per turn: total time, the first completion, tool calls
+(wall time, since they overlap), follow-up completions, time outside any of
+those, and token usage. Percentiles over all listed turns follow.
+"""
+import json
+import os
+import sys
+from collections import defaultdict
+from tracing import TRACE_FILE_ENV, STATUS_CODE_ERROR
+
+CHAT_SPAN = "chat.completions.create"
+TOOL_SPAN = "call_tool"
+
+
+def _attribute(value: dict):
+    if "intValue" in value:
+        return int(value["intValue"])
+    for key in ("doubleValue", "boolValue", "stringValue"):
+        if key in value:
+            return value[key]
+    return None
+
+
+def load_spans(path: str) -> list[dict]:
+    spans = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for resource_spans in json.loads(line).get("resourceSpans", []):
+                for scope_spans in resource_spans.get("scopeSpans", []):
+                    for span in scope_spans.get("spans", []):
+                        spans.append({
+                            "trace_id": span["traceId"],
+                            "span_id": span["spanId"],
+                            "parent": span.get("parentSpanId"),
+                            "name": span["name"],
+                            "start": int(span["startTimeUnixNano"]) / 1e9,
+                            "end": int(span["endTimeUnixNano"]) / 1e9,
+                            "attributes": {item["key"]: _attribute(item["value"]) for item in span.get("attributes", [])},
+                            "error": span.get("status", {}).get("code") in (STATUS_CODE_ERROR, "STATUS_CODE_ERROR"),
+                        })
+    return spans
+
+
+def covered(intervals: list[tuple[float, float]]) -> float:
+    """Length of the union of (start, end) intervals."""
+    total = 0.0
+    current_start = current_end = None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+
+def summarize_turn(spans: list[dict]) -> dict:
+    span_ids = {span["span_id"] for span in spans}
+    roots = [span for span in spans if span["parent"] not in span_ids]
+    root = min(roots, key=lambda span: span["start"])
+    children = [span for span in spans if span is not root]
+    chats = sorted((span for span in children if span["name"] == CHAT_SPAN), key=lambda span: span["start"])
+    tools = [span for span in children if span["name"] == TOOL_SPAN]
+
+    def tokens(key: str) -> int:
+        return sum(span["attributes"].get(key) or 0 for span in chats)
+
+    return {
+        "name": root["name"],
+        "turn": root["attributes"].get("pyagent.turn"),
+        "start": root["start"],
+        "total": root["end"] - root["start"],
+        "first_completion": chats[0]["end"] - chats[0]["start"] if chats else 0.0,
+        "first_chunk": (chats[0]["attributes"].get("pyagent.time_to_first_chunk_ms") or 0) / 1000 if chats else 0.0,
+        "tools": covered([(span["start"], span["end"]) for span in tools]),
+        "tool_calls": len(tools),
+        "followups": sum(span["end"] - span["start"] for span in chats[1:]),
+        "other": (root["end"] - root["start"]) - covered([(span["start"], span["end"]) for span in children]),
+        "input_tokens": tokens("gen_ai.usage.input_tokens"),
+        "output_tokens": tokens("gen_ai.usage.output_tokens"),
+        "cached_tokens": tokens("gen_ai.usage.cache_read.input_tokens"),
+        "errors": sum(span["error"] for span in spans),
+    }
+
+
+def summarize(spans: list[dict]) -> list[dict]:
+    traces = defaultdict(list)
+    for span in spans:
+        traces[span["trace_id"]].append(span)
+    return sorted((summarize_turn(trace) for trace in traces.values()), key=lambda turn: turn["start"])
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+COLUMNS = (("total", "total"), ("first_completion", "1st LLM"), ("first_chunk", "1st chunk"),
+           ("tools", "tools"), ("followups", "follow-up"), ("other", "other"))
+
+
+def print_report(turns: list[dict]):
+    header = f"{'turn':<18}" + "".join(f"{label:>11}" for _, label in COLUMNS) + \
+             f"{'calls':>7}{'in tok':>9}{'out tok':>9}{'cached':>9}{'err':>5}"
+    print(header)
+    print("-" * len(header))
+    for turn in turns:
+        label = f"{turn['name']} {turn['turn']}" if turn["turn"] is not None else turn["name"]
+        print(f"{label[:17]:<18}" + "".join(f"{turn[key] * 1000:>9.0f}ms" for key, _ in COLUMNS) +
+              f"{turn['tool_calls']:>7}{turn['input_tokens']:>9}{turn['output_tokens']:>9}"
+              f"{turn['cached_tokens']:>9}{turn['errors']:>5}")
+    if len(turns) > 1:
+        print("-" * len(header))
+        for q in (0.5, 0.95):
+            print(f"{f'p{round(q * 100)}':<18}" +
+                  "".join(f"{percentile([turn[key] for turn in turns], q) * 1000:>9.0f}ms" for key, _ in COLUMNS))
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else os.environ.get(TRACE_FILE_ENV)
+    if not path:
+        sys.exit(f"Give a trace file or set {TRACE_FILE_ENV}.")
+    last_turns = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    turns = summarize(load_spans(path))
+    print_report(turns[-last_turns:] if last_turns else turns)
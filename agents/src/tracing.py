@@ -0,0 +1,141 @@
+import contextvars
+import json
+import os
+import secrets
+import sys
+import time
+from contextlib import contextmanager
+
+# JSONL file to append spans to; tracing is off when unset
+TRACE_FILE_ENV = "PYAGENT_TRACE_FILE"
+SERVICE_NAME_ENV = "OTEL_SERVICE_NAME"
+SCOPE_NAME = "pyagent.tracing"
+
+# OTLP/JSON writes enums as their integer values
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_CODE_ERROR = 2
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _attribute_value(value) -> dict:
+    # OTLP/JSON encoding: 64-bit integers are strings
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_span_id", "name", "kind", "start_ns", "end_ns",
+                 "attributes", "error")
+
+    def __init__(self, name: str, kind: int, parent: "Span | None", attributes: dict):
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent is not None else None
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+
+    def set(self, key: str, value):
+        """Set an attribute; None values are skipped."""
+        if value is not None:
+            self.attributes[key] = value
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _attribute_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": STATUS_CODE_ERROR, "message": self.error} if self.error else {},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+class Tracer:
+    """Records spans and appends them to a JSONL file, one OTLP/JSON export request per line.
+
+    Each line is `{"resourceSpans": [...]}`, the format of the OpenTelemetry
+    Collector's file exporter, so the file can be replayed into any OTLP backend
+    (e.g. with the collector's `otlpjsonfile` receiver) or read by `trace_summary.py`.
+    A span started with no span active begins a new trace; nested spans, including
+    those in asyncio tasks created inside it, become its children.
+
+    With no `path`, spans are not recorded and `span()` costs one context lookup.
+    """
+
+    def __init__(self, path: str | None = None, service_name: str | None = None):
+        self.path = path
+        self.service_name = service_name or os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+        self._file = None
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        return cls(os.environ.get(TRACE_FILE_ENV), os.environ.get(SERVICE_NAME_ENV))
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    @contextmanager
+    def span(self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+        """Time the block as a span; yields the `Span` (or None when tracing is off) for attributes."""
+        if self.path is None:
+            yield None
+            return
+        span = Span(name, kind, _current_span.get(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_span.reset(token)
+            self.export(span)
+
+    def export(self, span: Span):
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        record = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": SCOPE_NAME}, "spans": [span.to_otlp()]}],
+        }]}
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def record_usage(span: Span | None, usage):
+    """Copy token counts from a chat completion's `usage` onto `span`."""
+    if span is None or usage is None:
+        return
+    span.set("gen_ai.usage.input_tokens", getattr(usage, "prompt_tokens", None))
+    span.set("gen_ai.usage.output_tokens", getattr(usage, "completion_tokens", None))
+    details = getattr(usage, "prompt_tokens_details", None)
+    span.set("gen_ai.usage.cache_read.input_tokens", getattr(details, "cached_tokens", None))
+
+
+tracer = Tracer.from_env()
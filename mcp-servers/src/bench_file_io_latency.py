@@ -0,0 +1,130 @@
+"""Benchmark: small-file tool latency while another client reads a huge file.
+
+Usage:
+  python bench_file_io_latency.py [big_file_mb] [small_clients] [interval_ms]
+
+Builds a scratch tree with one large file and a few small ones, then runs the same
+workload twice. One client hashes the large file chunk by chunk in a loop while
+`small_clients` clients each issue a small read or listing every `interval_ms`.
+In "blocking" mode the tools call `FileService` directly inside `async def`, as
+the MCP tools used to; in "offloaded" mode they go through `AsyncFileService`.
+Latency is measured from when each small call was due, so event-loop stalls show
+up in p50/p99.
+"""
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from services.async_file_service import AsyncFileService, BlockingIOOffloader
+from services.file_service import FileService
+
+BIG_FILE = "big.log"
+
+
+def make_tree(root: str, big_file_mb: int):
+    block = os.urandom(1024 * 1024)
+    with open(os.path.join(root, BIG_FILE), "wb") as f:
+        for _ in range(big_file_mb):
+            f.write(block)
+    os.makedirs(os.path.join(root, "notes"), exist_ok=True)
+    for i in range(50):
+        with open(os.path.join(root, "notes", f"note_{i}.txt"), "w", encoding="utf-8") as f:
+            f.write(f"note {i}\n" * 20)
+
+
+def hash_file(service: FileService, path: str) -> str:
+    digest = hashlib.sha256()
+    for chunk in service.iter_file_chunks(path):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def heavy_client(run_hash, stop: asyncio.Event) -> int:
+    passes = 0
+    while not stop.is_set():
+        await run_hash()
+        passes += 1
+        await asyncio.sleep(0)
+    return passes
+
+
+async def small_client(client_id: int, read_file, list_entries, interval: float,
+                       deadline: float, latencies: list[float]):
+    due = time.perf_counter()
+    call = 0
+    while due < deadline:
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if call % 2:
+            await list_entries("notes")
+        else:
+            await read_file(f"notes/note_{(client_id + call) % 50}.txt")
+        latencies.append(time.perf_counter() - due)
+        call += 1
+        due += interval
+
+
+async def run_mode(name: str, run_hash, read_file, list_entries,
+                   small_clients: int, interval: float, duration: float):
+    stop = asyncio.Event()
+    latencies = []
+    heavy = asyncio.create_task(heavy_client(run_hash, stop))
+    await asyncio.sleep(0)
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*[
+        small_client(i, read_file, list_entries, interval, deadline, latencies)
+        for i in range(small_clients)
+    ])
+    stop.set()
+    passes = await heavy
+    return name, latencies, passes
+
+
+async def main(big_file_mb: int, small_clients: int, interval_ms: float, duration: float = 5.0):
+    with tempfile.TemporaryDirectory() as root:
+        make_tree(root, big_file_mb)
+        service = FileService(root)
+        offloader = BlockingIOOffloader(max_concurrency=small_clients + 1)
+        async_service = AsyncFileService(service, offloader)
+        interval = interval_ms / 1000
+
+        async def blocking_hash():
+            return hash_file(service, BIG_FILE)
+
+        async def blocking_read(path):
+            return service.read_file(path)
+
+        async def blocking_list(directory):
+            return service.list_entries(directory)
+
+        async def offloaded_hash():
+            return await offloader.run(hash_file, service, BIG_FILE, timeout=None)
+
+        results = [
+            await run_mode("blocking (sync in async)", blocking_hash, blocking_read, blocking_list,
+                           small_clients, interval, duration),
+            await run_mode("offloaded (AsyncFileService)", offloaded_hash, async_service.read_file,
+                           async_service.list_entries, small_clients, interval, duration),
+        ]
+        offloader.shutdown()
+
+    print(f"{big_file_mb} MB hashed in a loop, {small_clients} small clients every {interval_ms:.0f} ms, {duration:.0f}s")
+    print(f"{'mode':<30}{'calls':>8}{'p50 (ms)':>10}{'p99 (ms)':>10}{'max (ms)':>10}{'hashes':>8}")
+    for name, latencies, passes in results:
+        print(f"{name:<30}{len(latencies):>8}{percentile(latencies, 0.5) * 1000:>10.1f}"
+              f"{percentile(latencies, 0.99) * 1000:>10.1f}{max(latencies) * 1000:>10.1f}{passes:>8}")
+
+
+if __name__ == "__main__":
+    big_file_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    small_clients = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    interval_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 10.0
+    asyncio.run(main(big_file_mb, small_clients, interval_ms))
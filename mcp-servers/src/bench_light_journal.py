@@ -0,0 +1,113 @@
+"""Benchmark: durable light state (snapshot + append-only log).
+
+Usage:
+  python bench_light_journal.py [toggles] [fixtures] [writer_threads]
+
+1. Write throughput: `toggles` random toggles through `OfficeLightsService`,
+   in memory only and with the journal.
+2. Group commit: `writer_threads` threads each wait until their change is
+   fsynced, against one fsync per change.
+3. Startup: a fresh service restoring from the snapshot plus a log tail of every
+   toggle, then again after the log has been compacted into a snapshot.
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from bench_light_state import make_fixtures
+from services.light_journal import LightJournal
+from services.office_lights import OfficeLightsService
+
+
+def journaled_service(fixtures: list[dict], directory: str, snapshot_every: int) -> tuple[OfficeLightsService, dict]:
+    service = OfficeLightsService(fixtures)
+    service.journal = LightJournal(directory, snapshot_every=snapshot_every)
+    restored = service.journal.open(service.store)
+    return service, restored
+
+
+def write_toggles(service: OfficeLightsService, locations: list[str]) -> float:
+    start = time.perf_counter()
+    for location in locations:
+        service.toggle_office_lights(location)
+    return time.perf_counter() - start
+
+
+def group_commit(service: OfficeLightsService, threads: int, per_thread: int) -> float:
+    journal = service.journal
+
+    def writer(seed: int):
+        for i in range(per_thread):
+            light_ids = service.store.set_ids(((seed * per_thread + i) % len(service.store),), True)
+            journal.wait_durable(journal.record(light_ids, True))
+
+    workers = [threading.Thread(target=writer, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+
+def fsync_each(directory: str, count: int) -> float:
+    fd = os.open(os.path.join(directory, "fsync_each.log"), os.O_WRONLY | os.O_CREAT | os.O_APPEND)
+    start = time.perf_counter()
+    for i in range(count):
+        os.write(fd, b"\0\0\0\0\1")
+        os.fsync(fd)
+    elapsed = time.perf_counter() - start
+    os.close(fd)
+    return elapsed
+
+
+def main(toggles: int, fixture_count: int, threads: int):
+    fixtures = make_fixtures(fixture_count, 20, 10)
+    locations = [fixture["location"] for fixture in random.choices(fixtures, k=toggles)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{fixture_count} fixtures, {toggles} toggles")
+        memory_seconds = write_toggles(OfficeLightsService(fixtures), locations)
+        service, _ = journaled_service(fixtures, directory, snapshot_every=toggles * 2)
+        journal_seconds = write_toggles(service, locations)
+        print(f"{'in memory':<28}{toggles / memory_seconds:>14,.0f} toggles/s")
+        print(f"{'journaled':<28}{toggles / journal_seconds:>14,.0f} toggles/s")
+
+        per_thread = 500
+        fsyncs_before = service.journal.fsync_count
+        commit_seconds = group_commit(service, threads, per_thread)
+        fsyncs = service.journal.fsync_count - fsyncs_before
+        each_seconds = fsync_each(directory, per_thread)
+        print(f"{'group commit (durable)':<28}{threads * per_thread / commit_seconds:>14,.0f} changes/s "
+              f"({threads} threads, {fsyncs} fsyncs for {threads * per_thread} changes)")
+        print(f"{'fsync per change':<28}{per_thread / each_seconds:>14,.0f} changes/s")
+
+        expected = service.get_office_lights()
+        service.close()
+        log_bytes = sum(os.path.getsize(os.path.join(directory, name))
+                        for name in os.listdir(directory) if name.endswith(".log"))
+
+        start = time.perf_counter()
+        restarted, restored = journaled_service(fixtures, directory, snapshot_every=toggles * 2)
+        replay_seconds = time.perf_counter() - start
+        assert restarted.get_office_lights() == expected, "state after replay differs"
+        restarted.close()
+
+        start = time.perf_counter()
+        compacted, _ = journaled_service(fixtures, directory, snapshot_every=toggles * 2)
+        snapshot_seconds = time.perf_counter() - start
+        assert compacted.get_office_lights() == expected, "state after snapshot differs"
+        compacted.close()
+
+        print(f"{'startup, replay log tail':<28}{replay_seconds * 1000:>14.0f} ms "
+              f"({restored['replayed']:,} records, {log_bytes / 1e6:.1f} MB)")
+        print(f"{'startup, snapshot only':<28}{snapshot_seconds * 1000:>14.0f} ms")
+
+
+if __name__ == "__main__":
+    toggles = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    fixture_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+    main(toggles, fixture_count, threads)
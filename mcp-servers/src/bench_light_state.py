@@ -0,0 +1,119 @@
+"""Benchmark: light state operations for a large building.
+
+Usage:
+  python bench_light_state.py [fixtures] [floors] [zones_per_floor]
+
+Builds `fixtures` lights spread over floors and zones, then times lookups,
+toggles, a full status snapshot and filtered, paged `get_lights` queries. The
+same lookups and toggles run against a plain `{location: "on"/"off"}` dict (how
+`OfficeLightsService` used to store state) for comparison.
+
+The store is not smaller or faster than that dict per operation. The dict keeps
+only state, while the store also keeps floor/zone/tag indexes and an id per name,
+so memory is also shown against a dict of per-fixture records holding the same
+fields. Service toggles also take a lock, bump the version and record history and
+timeline entries; the store's own toggle is timed separately.
+"""
+import random
+import sys
+import time
+import tracemalloc
+from services.office_lights import OfficeLightsService
+
+
+def make_fixtures(count: int, floors: int, zones_per_floor: int) -> list[dict]:
+    fixtures = []
+    for i in range(count):
+        floor = i % floors + 1
+        zone = f"floor {floor} zone {i // floors % zones_per_floor + 1}"
+        tags = ["emergency"] if i % 50 == 0 else []
+        fixtures.append({"location": f"fixture {i}", "state": "on" if i % 3 == 0 else "off",
+                         "floor": floor, "zone": zone, "tags": tags})
+    return fixtures
+
+
+def timed(label: str, operations: int, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40}{elapsed * 1000:>10.1f} ms{elapsed / operations * 1e9:>12.0f} ns/op")
+
+
+def dict_toggle(lights: dict, location: str):
+    lights[location] = "off" if lights[location] == "on" else "on"
+
+
+def main(count: int, floors: int, zones_per_floor: int, operations: int = 200_000):
+    fixtures = make_fixtures(count, floors, zones_per_floor)
+    locations = [random.choice(fixtures)["location"] for _ in range(operations)]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    service = OfficeLightsService(fixtures)
+    build_seconds = time.perf_counter() - start
+    store_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    baseline = {fixture["location"]: fixture["state"] for fixture in fixtures}
+    baseline_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    records = {fixture["location"]: {"state": fixture["state"], "floor": fixture["floor"],
+                                     "zone": fixture["zone"], "tags": list(fixture["tags"])}
+               for fixture in fixtures}
+    records_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+
+    store = service.store
+    ids_bytes = sys.getsizeof(store.ids) + sum(sys.getsizeof(light_id) for light_id in store.ids.values())
+    print(f"{count} fixtures, {floors} floors, {zones_per_floor} zones per floor")
+    print(f"build {build_seconds * 1000:.0f} ms; memory (location strings are shared and not counted):")
+    print(f"  store {store_bytes / 1e6:.1f} MB: name -> id dict and id ints {ids_bytes / 1e6:.1f} MB, "
+          f"names {sys.getsizeof(store.names) / 1e6:.1f} MB, rest arrays and indexes")
+    print(f"  dict of states {baseline_bytes / 1e6:.1f} MB (state only, no floor/zone/tag lookups)")
+    print(f"  dict of fixture records {records_bytes / 1e6:.1f} MB (same fields as the store, no indexes)")
+    print()
+    timed("store lookup (is_on)", operations, lambda: [store.is_on(location) for location in locations])
+    timed("service lookup (get_office_light)", operations,
+          lambda: [service.get_office_light(location) for location in locations])
+    timed("dict lookup", operations, lambda: [{location: baseline.get(location)} for location in locations])
+    timed("store toggle (state byte only)", operations, lambda: [store.toggle(location) for location in locations])
+    timed("service toggle (+ lock, version, timeline)", operations,
+          lambda: [service.toggle_office_lights(location) for location in locations])
+    timed("dict toggle", operations, lambda: [dict_toggle(baseline, location) for location in locations])
+    timed("count on (whole building)", 100, lambda: [service.store.count_on() for _ in range(100)])
+    timed("full snapshot (get_office_lights)", 10, lambda: [service.get_office_lights() for _ in range(10)])
+    timed("get_lights floor page (200)", 1000, lambda: [service.get_lights(floor=floors) for _ in range(1000)])
+    timed("get_lights zone + state page", 1000,
+          lambda: [service.get_lights(zone="floor 1 zone 1", state="on") for _ in range(1000)])
+    timed("get_lights tag + floor page", 100,
+          lambda: [service.get_lights(floor=1, tag="emergency") for _ in range(100)])
+
+    timed("get_lights_json floor page, cached", 100_000,
+          lambda: [service.get_lights_json(floor=floors) for _ in range(100_000)])
+    version = service.version
+    timed("get_lights_json if_version unchanged", 100_000,
+          lambda: [service.get_lights_json(floor=floors, if_version=version) for _ in range(100_000)])
+    print(f"{'':<40}payload {len(service.get_lights_json(floor=floors))} bytes, "
+          f"unchanged reply {len(service.get_lights_json(if_version=version))} bytes")
+
+    def walk_floor():
+        cursor, pages = None, 0
+        while True:
+            page = service.get_lights(floor=1, cursor=cursor, limit=1000)
+            pages += 1
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return pages
+
+    timed("page through floor 1 (limit 1000)", 1, walk_floor)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    floors = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    zones_per_floor = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    main(count, floors, zones_per_floor)
@@ -0,0 +1,66 @@
+"""Benchmark: usage queries over the light transition history.
+
+Usage:
+  python bench_light_timeline.py [fixtures] [transitions] [active_percent]
+
+Fills the timeline of a `fixtures`-light building with `transitions` state
+changes spread over the last 24 hours on `active_percent`% of the lights, then
+times `get_light_usage` for one light, one floor and the whole building, and a
+24-hour `get_light_occupancy` in hourly buckets. Prints which backend
+(NumPy or pure Python) did the aggregation.
+"""
+import json
+import random
+import sys
+import time
+import tracemalloc
+from bench_light_state import make_fixtures
+from services import light_timeline
+from services.office_lights import OfficeLightsService
+
+
+def timed(label: str, repeat: int, fn):
+    result = fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<36}{elapsed * 1000:>10.2f} ms{len(json.dumps(result)):>10} bytes")
+
+
+def main(count: int, transitions: int, active_percent: int):
+    service = OfficeLightsService(make_fixtures(count, 10, 10))
+    now = time.time()
+    service.timeline.started = now - 24 * 3600
+    active = random.sample(range(count), max(1, count * active_percent // 100))
+
+    # Each light alternates states, at random times in time order
+    times = sorted(random.uniform(service.timeline.started, now) for _ in range(transitions))
+    tracemalloc.start()
+    start = time.perf_counter()
+    for timestamp in times:
+        light_id = random.choice(active)
+        service.store.states[light_id] ^= 1
+        service.timeline.record((light_id,), service.store.states[light_id] == 1, timestamp)
+    record_seconds = time.perf_counter() - start
+    ring_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    backend = "NumPy" if light_timeline.np is not None else "pure Python"
+    print(f"{count} fixtures, {transitions} transitions on {len(active)} lights, aggregation: {backend}")
+    print(f"record {transitions / record_seconds:,.0f} transitions/s; "
+          f"rings {ring_bytes / 1e6:.1f} MB for {len(service.timeline.rings)} lights")
+    print()
+    location = service.store.names[active[0]]
+    timed("usage, one light", 200, lambda: service.get_light_usage(location))
+    timed("usage, one floor", 5, lambda: service.get_light_usage(floor=1))
+    timed("usage, whole building", 3, lambda: service.get_light_usage())
+    timed("occupancy, floor 1, 24 x 1 h", 5, lambda: service.get_light_occupancy(floor=1))
+    timed("occupancy, whole building, 24 x 1 h", 3, lambda: service.get_light_occupancy())
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    transitions = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    active_percent = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    main(count, transitions, active_percent)
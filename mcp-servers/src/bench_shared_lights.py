@@ -0,0 +1,117 @@
+"""Benchmark: light state shared by several worker processes through SQLite (WAL).
+
+Usage:
+  python bench_shared_lights.py [seconds] [max_workers] [write_percent] [fixtures]
+
+Runs 1, 2, 4, ... `max_workers` processes, each with its own `OfficeLightsService`
+on the same database, issuing a mix of `get_state`/`get_lights` reads and
+`write_percent`% toggles for `seconds`. Reports total operations per second
+and checks that:
+- every worker ends with the same view as the database, and
+- each light's final state matches the parity of the toggles all workers sent it.
+
+A single in-memory service (no sharing, so not usable with several workers) is
+timed with the same mix for comparison.
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from bench_light_state import make_fixtures
+from services.office_lights import OfficeLightsService
+
+HOT_LOCATIONS = 100
+
+
+def run_mix(service: OfficeLightsService, seconds: float, write_percent: int, locations: list[str], seed: int):
+    rng = random.Random(seed)
+    toggles = Counter()
+    operations = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            roll = rng.randrange(100)
+            location = rng.choice(locations)
+            if roll < write_percent:
+                service.toggle_office_lights(location)
+                toggles[location] += 1
+            elif roll % 2:
+                service.get_office_light(location)
+            else:
+                service.get_lights_json(floor=rng.randint(1, 10), limit=50)
+        operations += 100
+    return operations, toggles
+
+
+def worker(path: str, fixtures: list[dict], seconds: float, write_percent: int, locations: list[str],
+           seed: int, start, done, results):
+    service = OfficeLightsService(fixtures, shared_db=path)
+    start.wait()
+    operations, toggles = run_mix(service, seconds, write_percent, locations, seed)
+    # Compare views only after every worker has stopped writing
+    done.wait()
+    truth = OfficeLightsService(fixtures, shared_db=path)
+    consistent = service.get_office_lights() == truth.get_office_lights()
+    truth.close()
+    service.close()
+    results.put((operations, dict(toggles), consistent))
+
+
+def run_workers(workers: int, fixtures: list[dict], seconds: float, write_percent: int, locations: list[str]):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "lights.db")
+        OfficeLightsService(fixtures, shared_db=path).close()
+        start = multiprocessing.Barrier(workers + 1)
+        done = multiprocessing.Barrier(workers)
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=worker, args=(path, fixtures, seconds, write_percent, locations,
+                                                                  seed, start, done, results))
+                     for seed in range(workers)]
+        for process in processes:
+            process.start()
+        start.wait()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+        toggles = Counter()
+        for _, counts, _ in outcomes:
+            toggles.update(counts)
+        final = OfficeLightsService(fixtures, shared_db=path)
+        initial = {fixture["location"]: fixture["state"] for fixture in fixtures}
+        lost = [location for location, count in toggles.items()
+                if (final.get_office_light(location)[location] != initial[location]) != (count % 2 == 1)]
+        final.close()
+    operations = sum(outcome[0] for outcome in outcomes)
+    consistent = all(outcome[2] for outcome in outcomes)
+    return operations, sum(toggles.values()), consistent, lost
+
+
+def main(seconds: float, max_workers: int, write_percent: int, fixture_count: int):
+    fixtures = make_fixtures(fixture_count, 10, 10)
+    locations = [fixture["location"] for fixture in random.sample(fixtures, HOT_LOCATIONS)]
+    print(f"{fixture_count} fixtures, {write_percent}% toggles on {HOT_LOCATIONS} hot lights, "
+          f"{seconds:g} s per run, {os.cpu_count()} CPUs")
+
+    operations, _ = run_mix(OfficeLightsService(fixtures), seconds, write_percent, locations, seed=0)
+    print(f"{'in memory, 1 process':<24}{operations / seconds:>12,.0f} ops/s")
+
+    workers = 1
+    while workers <= max_workers:
+        operations, toggles, consistent, lost = run_workers(workers, fixtures, seconds, write_percent, locations)
+        print(f"{f'shared, {workers} workers':<24}{operations / seconds:>12,.0f} ops/s"
+              f"{toggles / seconds:>10,.0f} toggles/s  "
+              f"views {'consistent' if consistent else 'DIFFER'}, "
+              f"{'no lost toggles' if not lost else f'{len(lost)} lights with lost toggles'}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    write_percent = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    fixture_count = int(sys.argv[4]) if len(sys.argv) > 4 else 10_000
+    main(seconds, max_workers, write_percent, fixture_count)
@@ -0,0 +1,71 @@
+"""Benchmark: cost of the metrics middleware.
+
+Usage:
+  python bench_tool_metrics.py [calls] [tools]
+
+1. Bookkeeping alone: `ToolMetrics.start`/`finish` plus payload sizing for a
+   typical call, and rendering `/metrics` for `tools` tools.
+2. End to end: `calls` in-memory tool calls to a FastMCP server with and
+   without `MetricsMiddleware`.
+"""
+import asyncio
+import sys
+import time
+from fastmcp import Client, FastMCP
+from services.metrics_middleware import MetricsMiddleware
+from services.tool_metrics import ToolMetrics, payload_size
+
+ARGUMENTS = {"floor": 3, "zone": "floor 3 zone 2", "state": "on", "limit": 200}
+RESULT = '{"lights": [{"location": "fixture 1", "state": "on"}], "next_cursor": null, "version": 7}'
+
+
+def bookkeeping(calls: int, tools: int):
+    metrics = ToolMetrics()
+    names = [f"tool_{i}" for i in range(tools)]
+    start = time.perf_counter()
+    for i in range(calls):
+        stats = metrics.start("tools/call", names[i % tools], payload_size(ARGUMENTS))
+        metrics.finish(stats, 0.0004, payload_size(RESULT))
+    per_call = (time.perf_counter() - start) / calls
+    start = time.perf_counter()
+    text = metrics.render()
+    render_seconds = time.perf_counter() - start
+    print(f"{'bookkeeping per call':<32}{per_call * 1e6:>10.2f} µs")
+    print(f"{f'render /metrics ({tools} tools)':<32}{render_seconds * 1000:>10.2f} ms  {len(text):,} bytes")
+
+
+def make_server(with_metrics: bool) -> FastMCP:
+    mcp = FastMCP("bench")
+    if with_metrics:
+        mcp.add_middleware(MetricsMiddleware(ToolMetrics()))
+
+    @mcp.tool
+    def get_lights(floor: int | None = None, zone: str | None = None, state: str | None = None,
+                   limit: int = 200) -> str:
+        return RESULT
+
+    return mcp
+
+
+async def end_to_end(calls: int) -> dict:
+    results = {}
+    for label, with_metrics in (("without metrics", False), ("with metrics", True)):
+        async with Client(make_server(with_metrics)) as client:
+            for _ in range(200):
+                await client.call_tool("get_lights", ARGUMENTS)
+            start = time.perf_counter()
+            for _ in range(calls):
+                await client.call_tool("get_lights", ARGUMENTS)
+            results[label] = (time.perf_counter() - start) / calls
+        print(f"{f'tool call, {label}':<32}{results[label] * 1e6:>10.1f} µs")
+    overhead = results["with metrics"] - results["without metrics"]
+    print(f"{'middleware overhead':<32}{overhead * 1e6:>10.1f} µs "
+          f"({overhead / results['without metrics'] * 100:.1f}%)")
+    return results
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    tools = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    bookkeeping(calls * 20, tools)
+    asyncio.run(end_to_end(calls))
@@ -1,14 +1,17 @@
 from fastmcp import FastMCP, Context
 
 from services.office_lights import OfficeLightsService
+from services.metrics_middleware import install_metrics
 
 mcp = FastMCP("My MCP Server")
+# Per-tool counts, latency histograms and payload sizes, served at /metrics
+metrics = install_metrics(mcp)
 lights_service = OfficeLightsService()
 
 @mcp.resource("resource://building/lights")
 def building_lights() -> str:
     """Provides a simple greeting message."""
-    return lights_service.get_office_lights()
+    return lights_service.get_office_lights_json()
     # return "Hello from FastMCP Resources!"
 
 @mcp.tool
@@ -17,13 +20,17 @@ def greet(name: str) -> str:
 
 @mcp.tool(
     name="get_lights",
-    description="Get lights.", # Custom description
+    description="Lists lights filtered by floor, zone, tag or state ('on'/'off'); "
+                "pass `next_cursor` back as `cursor` for the next page, "
+                "and a previous `version` as `if_version` for a short reply if nothing changed.",
     tags={"catalog", "search"},      # Optional tags for organization/filtering
     meta={"version": "1.2", "author": "product-team"}  # Custom metadata
 )
-async def get_lights(ctx: Context) -> list[dict]:
-    resource = await ctx.read_resource("resource://building/lights")
-    return resource
+async def get_lights(floor: int | None = None, zone: str | None = None, tag: str | None = None,
+                     state: str | None = None, cursor: str | None = None, limit: int = 200,
+                     if_version: int | None = None) -> str:
+    # Pre-serialized JSON, cached until the next change
+    return lights_service.get_lights_json(floor, zone, tag, state, cursor, limit, if_version)
     # print(f"Searching for '{query}' in category '{category}'")
     # return [{"id": 2, "name": "Another Product"}]
 
@@ -1,24 +1,46 @@
 import os
 from fastmcp import FastMCP, Context
 from services.office_lights import OfficeLightsService
+from services.metrics_middleware import install_metrics
+from services.resource_subscriptions import ResourceSubscriptions
+from services.file_service import read_byte_range, walk_entries, page_entries
+from services.async_file_service import BlockingIOOffloader
 
 lights_service = OfficeLightsService()
 
 mcp = FastMCP('Light MCP Server')
+# Per-tool counts, latency histograms and payload sizes, served at /metrics
+metrics = install_metrics(mcp)
+subscriptions = ResourceSubscriptions(mcp)
+# Subscribers get resources/updated after every change and fetch only the delta
+lights_service.add_listener(lambda version: subscriptions.notify_soon('resource://building/lights'))
+# File tools run their disk I/O here instead of on the event loop
+file_io = BlockingIOOffloader(max_concurrency=8, timeout=30.0)
 
 @mcp.resource('resource://building/lights')
-def building_lights() -> dict:
-    return lights_service.get_office_lights()
+def building_lights() -> str:
+    return lights_service.get_office_lights_json()
 
-@mcp.tool(name="get_lights", description="Gets the state of a particular light",
+@mcp.resource('resource://building/lights/changes/{since}')
+def building_light_changes(since: int) -> dict:
+    return lights_service.changes_since(since)
+
+@mcp.tool(name="get_lights",
+          description="Lists lights and their state, filtered by floor, zone, tag or state ('on'/'off'). "
+                      "Results are paged; pass `next_cursor` back as `cursor`. "
+                      "Pass a previous result's `version` as `if_version` to get a short reply if nothing changed.",
           tags=["lighting", "status"],
+          annotations={"readOnlyHint": True},
           meta={"version": "1.0", "author": "Light Team"})
-async def get_lights(ctx: Context) -> list:
-    resource = await ctx.read_resource('resource://building/lights')
-    return resource
+async def get_lights(floor: int | None = None, zone: str | None = None, tag: str | None = None,
+                     state: str | None = None, cursor: str | None = None, limit: int = 200,
+                     if_version: int | None = None) -> str:
+    # Pre-serialized JSON, cached until the next change
+    return lights_service.get_lights_json(floor, zone, tag, state, cursor, limit, if_version)
 
 @mcp.tool(name="get_state", description="Gets the state of a particular light",
           tags=["lighting", "status"],
+          annotations={"readOnlyHint": True},
           meta={"version": "1.0", "author": "Light Team"})
 async def get_state(location: str) -> bool:
     return lights_service.get_office_light(location)
@@ -30,16 +52,63 @@ async def change_state(location: str) -> None:
     resource = lights_service.toggle_office_lights(location)
     return resource
 
+@mcp.tool(name="set_state_many",
+          description="Sets several lights at once. `states` maps location to 'on' or 'off'; "
+                      "nothing changes if any location is unknown. Returns what changed.",
+          tags=["lighting", "control"],
+          annotations={"idempotentHint": True},
+          meta={"version": "1.0", "author": "Light Team"})
+async def set_state_many(states: dict[str, str]) -> dict:
+    return lights_service.set_state_many(states)
+
+@mcp.tool(name="set_zone_state",
+          description="Sets every light on a floor, in a zone and/or with a tag to `state` ('on'/'off') "
+                      "in one call. Returns how many changed and which ones.",
+          tags=["lighting", "control"],
+          annotations={"idempotentHint": True},
+          meta={"version": "1.0", "author": "Light Team"})
+async def set_zone_state(state: str, floor: int | None = None, zone: str | None = None,
+                         tag: str | None = None) -> dict:
+    return lights_service.set_zone_state(state, floor, zone, tag)
+
+@mcp.tool(name="get_light_usage",
+          description="Summarizes how long lights were on and how often they were toggled in a time window: "
+                      "one `location`, or totals and top lights for a floor/zone/tag (all lights if none). "
+                      "The window is `since`..`until` (ISO 8601) or the last `hours`.",
+          tags=["lighting", "history"],
+          annotations={"readOnlyHint": True},
+          meta={"version": "1.0", "author": "Light Team"})
+async def get_light_usage(location: str | None = None, floor: int | None = None, zone: str | None = None,
+                          tag: str | None = None, since: str | None = None, until: str | None = None,
+                          hours: float = 24.0, top: int = 5) -> dict:
+    return lights_service.get_light_usage(location, floor, zone, tag, since, until, hours, top)
+
+@mcp.tool(name="get_light_occupancy",
+          description="Fraction of lights on per time bucket (`bucket_minutes`) for a floor/zone/tag, "
+                      "with the busiest bucket. The window is `since`..`until` (ISO 8601) or the last `hours`.",
+          tags=["lighting", "history"],
+          annotations={"readOnlyHint": True},
+          meta={"version": "1.0", "author": "Light Team"})
+async def get_light_occupancy(floor: int | None = None, zone: str | None = None, tag: str | None = None,
+                              since: str | None = None, until: str | None = None, hours: float = 24.0,
+                              bucket_minutes: int = 60) -> dict:
+    return lights_service.get_light_occupancy(floor, zone, tag, since, until, hours, bucket_minutes)
+
 
 @mcp.tool(name="read_file", 
-          description="Read the contents of a file from local file system.",
+          description="Read up to `length` bytes (default 64 KB) of a file from local file system, starting at byte `offset`.",
           tags=["file", "read", "filesystem"],
+          annotations={"readOnlyHint": True},
           meta={"version": "1.0", "author": "Light Team"})
-async def read_file(file_path: str) -> str:
+async def read_file(file_path: str, offset: int = 0, length: int = 65536) -> str:
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-            return content
+        data = await file_io.run(read_byte_range, file_path, offset, length)
+        content = data.decode('utf-8', errors='replace')
+        end = offset + len(data)
+        size = await file_io.run(os.path.getsize, file_path)
+        if end < size:
+            content += f"\n...[{size - end} more bytes; read again with offset={end}]"
+        return content
     except FileNotFoundError as e:
         return f"File not found: {str(e)}"
     except Exception as e:
@@ -47,12 +116,17 @@ async def read_file(file_path: str) -> str:
 
 
 @mcp.tool(name="list_files", 
-          description="List files in a directory on the local file system.",
+          description="List a directory on the local file system, one page at a time, with type, size and mtime. "
+                      "Optional glob `pattern`, `recursive` walk up to `max_depth`; pass `next_cursor` back as `cursor`.",
           tags=["file", "list", "filesystem"],
+          annotations={"readOnlyHint": True},
           meta={"version": "1.0", "author": "Light Team"})
-async def list_files(directory_path: str) -> str:
+async def list_files(directory_path: str, cursor: str | None = None, limit: int = 200,
+                     pattern: str | None = None, recursive: bool = False, max_depth: int = 3) -> dict | str:
     try:
-        return os.listdir(directory_path)
+        if not await file_io.run(os.path.isdir, directory_path):
+            raise FileNotFoundError(directory_path)
+        return await file_io.run(page_entries, walk_entries(directory_path, recursive, max_depth, pattern, after=cursor), limit)
     except FileNotFoundError as e:
         return f"Directory not found: {str(e)}"
     except Exception as e:
@@ -1,28 +1,49 @@
 from fastmcp import FastMCP, Context
 from services.office_lights import OfficeLightsService
+from services.metrics_middleware import install_metrics
+from services.resource_subscriptions import ResourceSubscriptions
 from services.file_service import FileService
+from services.async_file_service import AsyncFileService, BlockingIOOffloader
 
 mcp = FastMCP("My MCP Server")
+# Per-tool counts, latency histograms and payload sizes, served at /metrics
+metrics = install_metrics(mcp)
 lights_service = OfficeLightsService()
+subscriptions = ResourceSubscriptions(mcp)
+# Subscribers get resources/updated after every change and fetch only the delta
+lights_service.add_listener(lambda version: subscriptions.notify_soon("resource://building/lights"))
 file_service = FileService(root="C:/src/test-mcp-dir/data")  # Restrict all actions under ./data
+# Tools await file I/O on a bounded thread pool so a slow disk never blocks the event loop
+async_file_service = AsyncFileService(file_service, BlockingIOOffloader(max_concurrency=8, timeout=30.0))
 
 # -----------------------------
 # Resources
 # -----------------------------
 @mcp.resource("resource://building/lights")
 def building_lights() -> str:
-    return lights_service.get_office_lights()
+    return lights_service.get_office_lights_json()
+
+@mcp.resource("resource://building/lights/changes/{since}")
+def building_light_changes(since: int) -> dict:
+    return lights_service.changes_since(since)
 
 # -----------------------------
 # Tools: Lights
 # -----------------------------
 
-@mcp.tool(name="get_lights", description="Gets a list of lights and their current state.")
-async def get_lights(ctx: Context) -> list[dict]:
-    resource = await ctx.read_resource("resource://building/lights")
-    return resource
+@mcp.tool(name="get_lights",
+          description="Lists lights and their state, filtered by floor, zone, tag or state ('on'/'off'). "
+                      "Results are paged; pass `next_cursor` back as `cursor`. "
+                      "Pass a previous result's `version` as `if_version` to get a short reply if nothing changed.",
+          annotations={"readOnlyHint": True})
+async def get_lights(floor: int | None = None, zone: str | None = None, tag: str | None = None,
+                     state: str | None = None, cursor: str | None = None, limit: int = 200,
+                     if_version: int | None = None) -> str:
+    # Pre-serialized JSON, cached until the next change
+    return lights_service.get_lights_json(floor, zone, tag, state, cursor, limit, if_version)
 
-@mcp.tool(name="get_state", description="Gets the state of a particular light")
+@mcp.tool(name="get_state", description="Gets the state of a particular light",
+          annotations={"readOnlyHint": True})
 async def get_state(location: str) -> bool:
     return lights_service.get_office_light(location)
 
@@ -31,6 +52,126 @@ async def change_state(location: str) -> None:
     resource = lights_service.toggle_office_lights(location)
     return resource
 
+@mcp.tool(name="set_state_many",
+          description="Sets several lights at once. `states` maps location to 'on' or 'off'; "
+                      "nothing changes if any location is unknown. Returns what changed.",
+          annotations={"idempotentHint": True})
+async def set_state_many(states: dict[str, str]) -> dict:
+    return lights_service.set_state_many(states)
+
+@mcp.tool(name="set_zone_state",
+          description="Sets every light on a floor, in a zone and/or with a tag to `state` ('on'/'off') "
+                      "in one call. Returns how many changed and which ones.",
+          annotations={"idempotentHint": True})
+async def set_zone_state(state: str, floor: int | None = None, zone: str | None = None,
+                         tag: str | None = None) -> dict:
+    return lights_service.set_zone_state(state, floor, zone, tag)
+
+@mcp.tool(name="get_light_usage",
+          description="Summarizes how long lights were on and how often they were toggled in a time window: "
+                      "one `location`, or totals and top lights for a floor/zone/tag (all lights if none). "
+                      "The window is `since`..`until` (ISO 8601) or the last `hours`.",
+          annotations={"readOnlyHint": True})
+async def get_light_usage(location: str | None = None, floor: int | None = None, zone: str | None = None,
+                          tag: str | None = None, since: str | None = None, until: str | None = None,
+                          hours: float = 24.0, top: int = 5) -> dict:
+    return lights_service.get_light_usage(location, floor, zone, tag, since, until, hours, top)
+
+@mcp.tool(name="get_light_occupancy",
+          description="Fraction of lights on per time bucket (`bucket_minutes`) for a floor/zone/tag, "
+                      "with the busiest bucket. The window is `since`..`until` (ISO 8601) or the last `hours`.",
+          annotations={"readOnlyHint": True})
+async def get_light_occupancy(floor: int | None = None, zone: str | None = None, tag: str | None = None,
+                              since: str | None = None, until: str | None = None, hours: float = 24.0,
+                              bucket_minutes: int = 60) -> dict:
+    return lights_service.get_light_occupancy(floor, zone, tag, since, until, hours, bucket_minutes)
+
+# -----------------------------
+# Tools: Files
+# -----------------------------
+
+@mcp.tool(name="read_file", description="Reads a file under the data root (first 1 MB; use ranged reads for more).",
+          annotations={"readOnlyHint": True})
+async def read_file(path: str) -> str:
+    return await async_file_service.read_file(path)
+
+@mcp.tool(name="read_file_range", description="Reads `length` bytes of a file starting at byte `offset`.",
+          annotations={"readOnlyHint": True})
+async def read_file_range(path: str, offset: int = 0, length: int = 65536) -> dict:
+    return await async_file_service.read_file_range(path, offset, length)
+
+@mcp.tool(name="read_lines", description="Reads lines start_line..end_line (1-based, inclusive) of a file.",
+          annotations={"readOnlyHint": True})
+async def read_lines(path: str, start_line: int = 1, end_line: int | None = None) -> dict:
+    return await async_file_service.read_lines(path, start_line, end_line)
+
+@mcp.tool(name="read_file_edge", description="Reads the first (mode='head') or last (mode='tail') lines of a file.",
+          annotations={"readOnlyHint": True})
+async def read_file_edge(path: str, mode: str = "tail", lines: int = 20) -> str:
+    if mode == "head":
+        return await async_file_service.head(path, lines)
+    return await async_file_service.tail(path, lines)
+
+@mcp.tool(name="read_file_chunk", description="Streams a file in chunks; call again with next_chunk until it is null.",
+          annotations={"readOnlyHint": True})
+async def read_file_chunk(path: str, chunk_index: int = 0, chunk_size: int = 65536) -> dict:
+    return await async_file_service.read_file_chunk(path, chunk_index, chunk_size)
+
+@mcp.tool(name="file_hash", description="Returns a file's SHA-256 and size, for use as `expected_sha256` in edits.",
+          annotations={"readOnlyHint": True})
+async def file_hash(path: str) -> dict:
+    return await async_file_service.file_hash(path)
+
+@mcp.tool(name="apply_patch",
+          description="Edits a file by applying a unified diff (@@ hunks with a few context lines) instead of resending it. "
+                      "Pass `expected_sha256` to fail rather than overwrite concurrent changes. Returns the new sha256.")
+async def apply_patch(path: str, patch: str, expected_sha256: str | None = None) -> dict:
+    return await async_file_service.apply_patch(path, patch, expected_sha256)
+
+@mcp.tool(name="replace_range",
+          description="Replaces lines start_line..end_line (1-based, inclusive; end_line = start_line - 1 inserts) "
+                      "or `length` bytes at byte `offset` with `content`. "
+                      "Pass `expected_sha256` to fail rather than overwrite concurrent changes. Returns the new sha256.")
+async def replace_range(path: str, content: str, start_line: int | None = None, end_line: int | None = None,
+                        offset: int | None = None, length: int = 0, expected_sha256: str | None = None) -> dict:
+    return await async_file_service.replace_range(path, content, start_line, end_line, offset, length, expected_sha256)
+
+@mcp.tool(name="list_entries",
+          description="Lists a directory page by page with type, size and mtime. "
+                      "Filter by glob `pattern` or `extensions`; set `recursive` with `max_depth` to walk subdirectories. "
+                      "Pass `next_cursor` back as `cursor` for the next page.",
+          annotations={"readOnlyHint": True})
+async def list_entries(directory: str = "", cursor: str | None = None, limit: int = 200,
+                       pattern: str | None = None, extensions: list[str] | None = None,
+                       recursive: bool = False, max_depth: int = 3) -> dict:
+    return await async_file_service.list_entries(directory, cursor, limit, pattern, extensions, recursive, max_depth)
+
+@mcp.tool(name="search_files",
+          description="Searches file contents under the data root (literal text, or a regex with regex=true) "
+                      "and returns matching lines with line numbers and surrounding context.",
+          annotations={"readOnlyHint": True})
+async def search_files(query: str, regex: bool = False, case_sensitive: bool = False,
+                       context_lines: int = 2, max_results: int = 100, path_pattern: str | None = None) -> dict:
+    return await async_file_service.search_files(query, regex, case_sensitive, context_lines, max_results, path_pattern)
+
+@mcp.tool(name="read_many", description="Reads several files in one call; returns per-file content or error.",
+          annotations={"readOnlyHint": True})
+async def read_many(paths: list[str], max_bytes_per_file: int = 262144) -> dict:
+    return await async_file_service.read_many(paths, max_bytes_per_file)
+
+@mcp.tool(name="write_many", description="Writes several files in one call. `files` is a list of {path, content}; returns per-file results.")
+async def write_many(files: list[dict[str, str]]) -> dict:
+    return await async_file_service.write_many(files)
+
+@mcp.tool(name="delete_many", description="Deletes several files in one call; returns per-file results.",
+          annotations={"destructiveHint": True})
+async def delete_many(paths: list[str]) -> dict:
+    return await async_file_service.delete_many(paths)
+
+@mcp.resource("file-chunk://{chunk_index}/{path*}")
+async def file_chunk(chunk_index: int, path: str) -> dict:
+    return await async_file_service.read_file_chunk(path, chunk_index)
+
 # -----------------------------
 # Run Server
 # -----------------------------
@@ -0,0 +1,131 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from services.file_service import FileService
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_TIMEOUT_SECONDS = 30.0
+
+
+class BlockingIOOffloader:
+    """Runs blocking file-system calls on a dedicated thread pool.
+
+    Keeps disk I/O off the event loop so one slow read cannot stall every other
+    client of the MCP server. At most `max_concurrency` calls run at once; a call
+    that exceeds its timeout raises `TimeoutError` to the caller, while its slot
+    stays taken until the underlying thread actually finishes.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 timeout: float | None = DEFAULT_TIMEOUT_SECONDS):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="file-io")
+        self._semaphore = None
+
+    async def run(self, fn, *args, timeout: float | None = None):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        timeout = self.timeout if timeout is None else timeout
+
+        await self._semaphore.acquire()
+        future = asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        future.add_done_callback(lambda _: self._semaphore.release())
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"File operation '{getattr(fn, '__name__', fn)}' timed out after {timeout}s") from None
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class AsyncFileService:
+    """Async facade over `FileService` for use inside `async def` MCP tools.
+
+    Every method has the same signature and results as its `FileService`
+    counterpart, but runs through a `BlockingIOOffloader`.
+    """
+
+    def __init__(self, service: FileService, offloader: BlockingIOOffloader | None = None):
+        self.service = service
+        self.offloader = offloader or BlockingIOOffloader()
+
+    @property
+    def root(self) -> str:
+        return self.service.root
+
+    # -----------------------------
+    # File Operations
+    # -----------------------------
+    async def read_file(self, path: str, *args):
+        return await self.offloader.run(self.service.read_file, path, *args)
+
+    async def read_file_range(self, path: str, *args):
+        return await self.offloader.run(self.service.read_file_range, path, *args)
+
+    async def read_lines(self, path: str, *args):
+        return await self.offloader.run(self.service.read_lines, path, *args)
+
+    async def head(self, path: str, *args):
+        return await self.offloader.run(self.service.head, path, *args)
+
+    async def tail(self, path: str, *args):
+        return await self.offloader.run(self.service.tail, path, *args)
+
+    async def read_file_chunk(self, path: str, *args):
+        return await self.offloader.run(self.service.read_file_chunk, path, *args)
+
+    async def write_file(self, path: str, content: str, *args):
+        return await self.offloader.run(self.service.write_file, path, content, *args)
+
+    async def append_file(self, path: str, content: str):
+        return await self.offloader.run(self.service.append_file, path, content)
+
+    async def delete_file(self, path: str):
+        return await self.offloader.run(self.service.delete_file, path)
+
+    # -----------------------------
+    # Edit Operations
+    # -----------------------------
+    async def file_hash(self, path: str):
+        return await self.offloader.run(self.service.file_hash, path)
+
+    async def apply_patch(self, path: str, patch: str, *args):
+        return await self.offloader.run(self.service.apply_patch, path, patch, *args)
+
+    async def replace_range(self, path: str, content: str, *args):
+        return await self.offloader.run(self.service.replace_range, path, content, *args)
+
+    # -----------------------------
+    # Directory Operations
+    # -----------------------------
+    async def list_files(self, directory: str = ""):
+        return await self.offloader.run(self.service.list_files, directory)
+
+    async def list_entries(self, directory: str = "", *args):
+        return await self.offloader.run(self.service.list_entries, directory, *args)
+
+    async def create_directory(self, directory: str):
+        return await self.offloader.run(self.service.create_directory, directory)
+
+    async def remove_directory(self, directory: str):
+        return await self.offloader.run(self.service.remove_directory, directory)
+
+    # -----------------------------
+    # Search
+    # -----------------------------
+    async def search_files(self, query: str, *args):
+        return await self.offloader.run(self.service.search_files, query, *args)
+
+    # -----------------------------
+    # Batch Operations
+    # -----------------------------
+    # Batches fan out on FileService's own worker pool; only the wait is offloaded
+    async def read_many(self, paths: list[str], *args):
+        return await self.offloader.run(self.service.read_many, paths, *args)
+
+    async def write_many(self, files: list[dict]):
+        return await self.offloader.run(self.service.write_many, files)
+
+    async def delete_many(self, paths: list[str]):
+        return await self.offloader.run(self.service.delete_many, paths)
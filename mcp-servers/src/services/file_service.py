@@ -1,39 +1,359 @@
+import fnmatch
+import hashlib
+import mmap
 import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from services.search_index import TrigramIndex
+from services.text_patch import apply_unified_diff
+
+# Largest single read returned to a caller; bigger files must be read in ranges
+MAX_READ_BYTES = 1024 * 1024
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# Above this size ranged reads and tails go through mmap instead of buffered reads
+MMAP_THRESHOLD = 16 * 1024 * 1024
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 5000
+MAX_BATCH_ITEMS = 500
+DEFAULT_BATCH_WORKERS = 8
+
+
+def read_byte_range(abs_path: str, offset: int = 0, length: int = DEFAULT_CHUNK_SIZE) -> bytes:
+    """Read at most `length` bytes from `offset` without loading the rest of the file."""
+    length = max(0, min(length, MAX_READ_BYTES))
+    size = os.path.getsize(abs_path)
+    if offset >= size or length == 0:
+        return b""
+    with open(abs_path, "rb") as f:
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return mm[offset:offset + length]
+        f.seek(offset)
+        return f.read(length)
+
+
+def tail_bytes(abs_path: str, lines: int, max_bytes: int = MAX_READ_BYTES) -> tuple[bytes, bool]:
+    """Last `lines` lines of a file, found by scanning backwards from the end.
+
+    Never returns more than `max_bytes`; the flag is True when the lines were cut
+    to that many bytes from the end.
+    """
+    size = os.path.getsize(abs_path)
+    if size == 0 or lines <= 0 or max_bytes <= 0:
+        return b"", size > 0 and lines > 0
+    floor = max(0, size - max_bytes)
+    with open(abs_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = size - 1 if mm[size - 1:size] == b"\n" else size
+            start = end
+            for _ in range(lines):
+                # A break just before the window still bounds a line that fits in it
+                start = mm.rfind(b"\n", max(0, floor - 1), start)
+                if start == -1:
+                    # Ran out of window (or file) before finding enough line breaks
+                    return mm[floor:size], floor > 0
+            return mm[start + 1:size], False
+
+
+def file_sha256(abs_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(abs_path, "rb") as f:
+        for chunk in iter(lambda: f.read(DEFAULT_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PreconditionFailed(Exception):
+    """The file no longer has the hash the caller based its edit on."""
+
+
+class HashingWriter:
+    """Binary file wrapper that hashes everything written through it."""
+
+    def __init__(self, f):
+        self.f = f
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.digest.update(data)
+        self.size += len(data)
+        return self.f.write(data)
+
+
+def _process_umask() -> int:
+    # os.umask can only be read by setting it; do it once, before any worker threads exist
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# mkstemp creates 0600 files; new files get the mode open() would have given them
+NEW_FILE_MODE = 0o666 & ~_process_umask()
+
+
+def atomic_write(abs_path: str, write) -> HashingWriter:
+    """Commit a new version of `abs_path` all at once.
+
+    `write(out)` fills a temp file in the same directory; it is fsynced and renamed
+    over the target, so readers see either the old file or the new one, never a
+    partial write. If `write` raises, the target is left untouched.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(abs_path), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            out = HashingWriter(f)
+            write(out)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(abs_path):
+            shutil.copymode(abs_path, temp_path)
+        else:
+            os.chmod(temp_path, NEW_FILE_MODE)
+        os.replace(temp_path, abs_path)
+        return out
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _entry_type(entry: os.DirEntry) -> str:
+    if entry.is_symlink():
+        return "link"
+    if entry.is_dir(follow_symlinks=False):
+        return "dir"
+    return "file"
+
+
+def walk_entries(abs_dir: str, recursive: bool = False, max_depth: int = 1,
+                 pattern: str | None = None, extensions: list[str] | None = None, after: str | None = None):
+    """Yield metadata dicts for entries under `abs_dir` using `os.scandir`.
+
+    Walks depth-first in name order without building the full listing, to at most
+    `max_depth` levels when `recursive`; a directory's contents follow it. `pattern`
+    (a glob on the entry name) and `extensions` filter the results; when either is
+    set only matching files are yielded, but directories are still descended into.
+    `after` resumes the walk past that relative path: earlier names and subtrees
+    are skipped without a stat.
+    """
+    extensions = {ext.lower() if ext.startswith(".") else "." + ext.lower() for ext in extensions or []}
+    filtered = pattern is not None or bool(extensions)
+    depth_limit = max_depth if recursive else 1
+    after_parts = tuple(after.split("/")) if after else ()
+
+    def sorted_entries(path: str) -> list[os.DirEntry]:
+        try:
+            with os.scandir(path) as entries:
+                return sorted(entries, key=lambda entry: entry.name)
+        except (PermissionError, FileNotFoundError):
+            return []
+
+    stack = [(iter(sorted_entries(abs_dir)), (), 1)]
+    while stack:
+        entries, parts, depth = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        entry_parts = parts + (entry.name,)
+        # Tuples order paths the way the walk visits them, so one comparison places an entry
+        passed = entry_parts > after_parts
+        # A skipped directory still holds the resume point when `after` lies inside it
+        holds_cursor = not passed and entry_parts == after_parts[:len(entry_parts)]
+        if not (passed or holds_cursor):
+            continue
+        entry_type = _entry_type(entry)
+        relative_path = "/".join(entry_parts)
+        if passed and not (filtered and (
+                entry_type == "dir"
+                or (pattern is not None and not fnmatch.fnmatch(entry.name, pattern))
+                or (extensions and os.path.splitext(entry.name)[1].lower() not in extensions))):
+            try:
+                stat = entry.stat(follow_symlinks=False)
+                size, mtime = stat.st_size, int(stat.st_mtime)
+            except OSError:
+                size, mtime = None, None
+            item = {"path": relative_path, "type": entry_type, "mtime": mtime}
+            if entry_type == "file":
+                item["size"] = size
+            yield item
+        if entry_type == "dir" and depth < depth_limit:
+            stack.append((iter(sorted_entries(entry.path)), entry_parts, depth + 1))
+
+
+def page_entries(entries, limit: int = DEFAULT_PAGE_SIZE) -> dict:
+    """Take one page from an entry iterator; `next_cursor` is None on the last page.
+
+    The cursor is the last returned path; pass it as `walk_entries(after=...)` to
+    resume, which stays correct when entries are added or removed in between.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    page = list(islice(entries, limit + 1))
+    has_more = len(page) > limit
+    return {
+        "entries": page[:limit],
+        "next_cursor": page[limit - 1]["path"] if has_more else None,
+    }
+
 
 class FileService:
     """Service class for safe file and directory management."""
 
-    def __init__(self, root: str = "./data"):
+    def __init__(self, root: str = "./data", batch_workers: int = DEFAULT_BATCH_WORKERS):
         # All operations are restricted under this root directory
         self.root = os.path.abspath(root)
         os.makedirs(self.root, exist_ok=True)
+        self.real_root = os.path.realpath(self.root)
+        self.batch_workers = batch_workers
+        self._batch_executor = None
+        self._search_index = TrigramIndex(self.root)
+        self._edit_locks = {}
+        self._edit_locks_guard = threading.Lock()
+        # Minimum seconds between mtime re-scans of the tree before a search
+        self.search_refresh_interval = 2.0
 
     def _resolve_path(self, path: str) -> str:
-        """Resolve and validate path to ensure it's inside the root."""
+        """Resolve and validate path to ensure it's inside the root, after following symlinks."""
         abs_path = os.path.abspath(os.path.join(self.root, path))
-        if not abs_path.startswith(self.root):
+        if os.path.commonpath([self.real_root, os.path.realpath(abs_path)]) != self.real_root:
             raise PermissionError(f"Access denied: '{path}' is outside allowed root.")
         return abs_path
 
     # -----------------------------
     # File Operations
     # -----------------------------
-    def read_file(self, path: str) -> str:
+    def read_file(self, path: str, max_bytes: int = MAX_READ_BYTES) -> str:
         abs_path = self._resolve_path(path)
         if not os.path.exists(abs_path):
             return f"Error: File '{path}' does not exist."
+        # read_byte_range never returns more than MAX_READ_BYTES; report what was actually read
+        max_bytes = max(0, min(max_bytes, MAX_READ_BYTES))
         try:
-            with open(abs_path, "r", encoding="utf-8") as f:
-                return f.read()
+            size = os.path.getsize(abs_path)
+            content = read_byte_range(abs_path, 0, max_bytes).decode("utf-8", errors="replace")
+            if size > max_bytes:
+                content += f"\n...[truncated: showing {max_bytes} of {size} bytes; use read_file_range or read_lines for the rest]"
+            return content
         except Exception as e:
             return f"Error reading file '{path}': {e}"
 
-    def write_file(self, path: str, content: str) -> str:
+    def read_file_range(self, path: str, offset: int = 0, length: int = DEFAULT_CHUNK_SIZE) -> dict:
+        """Read `length` bytes starting at byte `offset`."""
+        abs_path = self._resolve_path(path)
+        if not os.path.isfile(abs_path):
+            return {"error": f"File '{path}' does not exist."}
+        try:
+            size = os.path.getsize(abs_path)
+            data = read_byte_range(abs_path, offset, length)
+            return {
+                "path": path,
+                "offset": offset,
+                "length": len(data),
+                "size": size,
+                "eof": offset + len(data) >= size,
+                "content": data.decode("utf-8", errors="replace"),
+            }
+        except Exception as e:
+            return {"error": f"Error reading file '{path}': {e}"}
+
+    def read_lines(self, path: str, start_line: int = 1, end_line: int | None = None,
+                   max_lines: int = 1000) -> dict:
+        """Read lines `start_line`..`end_line` (1-based, inclusive), streaming past the rest."""
         abs_path = self._resolve_path(path)
+        if not os.path.isfile(abs_path):
+            return {"error": f"File '{path}' does not exist."}
+        start_line = max(1, start_line)
+        stop = start_line - 1 + max_lines
+        if end_line is not None:
+            stop = min(stop, end_line)
         try:
-            with open(abs_path, "w", encoding="utf-8") as f:
-                f.write(content)
-            return f"Successfully wrote to '{path}'."
+            lines = []
+            budget = MAX_READ_BYTES
+            truncated = False
+            with open(abs_path, "rb") as f:
+                for _ in islice(f, start_line - 1):
+                    pass
+                for _ in range(stop - start_line + 1):
+                    # Bounded readline, so one huge line cannot blow past the cap
+                    line = f.readline(budget + 1)
+                    if not line:
+                        break
+                    if len(line) > budget:
+                        if budget:
+                            lines.append(line[:budget])
+                        truncated = True
+                        break
+                    lines.append(line)
+                    budget -= len(line)
+            last_line = start_line + len(lines) - 1
+            content = b"".join(lines).decode("utf-8", errors="replace")
+            if truncated:
+                content += (f"\n...[truncated: showing {MAX_READ_BYTES} bytes of lines {start_line}..{last_line}; "
+                            "use read_file_range for the rest]")
+            return {
+                "path": path,
+                "start_line": start_line,
+                "end_line": last_line,
+                "truncated": truncated,
+                "content": content,
+            }
+        except Exception as e:
+            return {"error": f"Error reading file '{path}': {e}"}
+
+    def head(self, path: str, lines: int = 20) -> str:
+        result = self.read_lines(path, 1, lines, max_lines=lines)
+        return result.get("content", f"Error: {result.get('error')}")
+
+    def tail(self, path: str, lines: int = 20) -> str:
+        abs_path = self._resolve_path(path)
+        if not os.path.isfile(abs_path):
+            return f"Error: File '{path}' does not exist."
+        try:
+            data, truncated = tail_bytes(abs_path, lines)
+            content = data.decode("utf-8", errors="replace")
+            if truncated:
+                size = os.path.getsize(abs_path)
+                content = (f"...[truncated: showing the last {len(data)} of {size} bytes; "
+                           f"use read_file_range for the rest]\n" + content)
+            return content
+        except Exception as e:
+            return f"Error reading file '{path}': {e}"
+
+    def iter_file_chunks(self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Yield the file as successive byte chunks; only one chunk is held at a time."""
+        abs_path = self._resolve_path(path)
+        with open(abs_path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def read_file_chunk(self, path: str, chunk_index: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+        """Chunk `chunk_index` of the file, with the index of the next chunk (None at EOF)."""
+        chunk_size = max(1, min(chunk_size, MAX_READ_BYTES))
+        result = self.read_file_range(path, chunk_index * chunk_size, chunk_size)
+        if "error" in result:
+            return result
+        result["chunk_index"] = chunk_index
+        result["next_chunk"] = None if result["eof"] else chunk_index + 1
+        return result
+
+    def write_file(self, path: str, content: str, expected_sha256: str | None = None) -> str:
+        abs_path = self._resolve_path(path)
+        try:
+            with self._edit_lock(abs_path):
+                error = self._check_precondition(abs_path, path, expected_sha256)
+                if error:
+                    return f"Error: {error}"
+                out = atomic_write(abs_path, lambda f: f.write(content.encode("utf-8")))
+            return f"Successfully wrote to '{path}' (sha256 {out.digest.hexdigest()})."
         except Exception as e:
             return f"Error writing to file '{path}': {e}"
 
@@ -56,6 +376,133 @@ class FileService:
         except Exception as e:
             return f"Error deleting file '{path}': {e}"
 
+    # -----------------------------
+    # Edit Operations
+    # -----------------------------
+    def _edit_lock(self, abs_path: str) -> threading.Lock:
+        """Per-file lock so a hash check and the write it guards cannot interleave with another edit."""
+        with self._edit_locks_guard:
+            return self._edit_locks.setdefault(abs_path, threading.Lock())
+
+    @staticmethod
+    def _check_precondition(abs_path: str, path: str, expected_sha256: str | None) -> str | None:
+        if expected_sha256 is None:
+            return None
+        if not os.path.isfile(abs_path):
+            return f"File '{path}' does not exist, so it cannot match expected_sha256."
+        actual = file_sha256(abs_path)
+        if actual != expected_sha256.lower():
+            return f"File '{path}' has changed (sha256 is {actual}); re-read it and retry."
+        return None
+
+    def file_hash(self, path: str) -> dict:
+        """SHA-256 and size of a file, to pass as `expected_sha256` to an edit."""
+        abs_path = self._resolve_path(path)
+        if not os.path.isfile(abs_path):
+            return {"error": f"File '{path}' does not exist."}
+        try:
+            return {"path": path, "sha256": file_sha256(abs_path), "size": os.path.getsize(abs_path)}
+        except Exception as e:
+            return {"error": f"Error hashing file '{path}': {e}"}
+
+    def apply_patch(self, path: str, patch: str, expected_sha256: str | None = None) -> dict:
+        """Apply a unified diff to a file and commit the result atomically.
+
+        With `expected_sha256`, the patch is only applied if the file still has that hash.
+        """
+        abs_path = self._resolve_path(path)
+        if not os.path.isfile(abs_path):
+            return {"error": f"File '{path}' does not exist."}
+        try:
+            with self._edit_lock(abs_path):
+                with open(abs_path, "rb") as f:
+                    data = f.read()
+                actual = hashlib.sha256(data).hexdigest()
+                if expected_sha256 is not None and actual != expected_sha256.lower():
+                    return {"error": f"File '{path}' has changed (sha256 is {actual}); re-read it and retry."}
+                text, hunks_applied = apply_unified_diff(data.decode("utf-8"), patch)
+                out = atomic_write(abs_path, lambda f: f.write(text.encode("utf-8")))
+            return {"path": path, "hunks_applied": hunks_applied, "sha256": out.digest.hexdigest(), "size": out.size}
+        except UnicodeDecodeError:
+            return {"error": f"File '{path}' is not UTF-8 text; use replace_range with byte offsets."}
+        except ValueError as e:
+            return {"error": f"Patch does not apply to '{path}': {e}"}
+        except Exception as e:
+            return {"error": f"Error patching file '{path}': {e}"}
+
+    def replace_range(self, path: str, content: str, start_line: int | None = None, end_line: int | None = None,
+                      offset: int | None = None, length: int = 0, expected_sha256: str | None = None) -> dict:
+        """Replace lines `start_line`..`end_line` (1-based, inclusive) or `length` bytes at `offset` with `content`.
+
+        The file is streamed into the new version, so only the replaced range is
+        held in memory. `end_line = start_line - 1` inserts before `start_line`.
+        With `expected_sha256`, nothing is written unless the file still has that hash.
+        """
+        abs_path = self._resolve_path(path)
+        if not os.path.isfile(abs_path):
+            return {"error": f"File '{path}' does not exist."}
+        if (start_line is None) == (offset is None):
+            return {"error": "Pass either start_line (line mode) or offset (byte mode)."}
+        if offset is not None and not 0 <= offset <= os.path.getsize(abs_path):
+            return {"error": f"Offset {offset} is outside '{path}' ({os.path.getsize(abs_path)} bytes)."}
+        length = max(0, length)
+        if start_line is not None:
+            start_line = max(1, start_line)
+            end_line = start_line if end_line is None else max(start_line - 1, end_line)
+        data = content.encode("utf-8")
+
+        def copy_lines(src, out, digest):
+            written = False
+            line = b""
+            for number, line in enumerate(src, start=1):
+                digest.update(line)
+                if number == start_line:
+                    out.write(data)
+                    written = True
+                if number < start_line or number > end_line:
+                    if written and number == end_line + 1 and data and not data.endswith(b"\n"):
+                        out.write(b"\r\n" if line.endswith(b"\r\n") else b"\n")
+                    out.write(line)
+            if not written:
+                # start_line is past the end: append as new lines
+                if line and not line.endswith(b"\n"):
+                    out.write(b"\n")
+                out.write(data)
+
+        def copy_bytes(src, out, digest):
+            position = 0
+            written = False
+            for chunk in iter(lambda: src.read(DEFAULT_CHUNK_SIZE), b""):
+                digest.update(chunk)
+                chunk_end = position + len(chunk)
+                if position < offset:
+                    out.write(chunk[:offset - position])
+                if not written and chunk_end >= offset:
+                    out.write(data)
+                    written = True
+                if chunk_end > offset + length:
+                    out.write(chunk[max(0, offset + length - position):])
+                position = chunk_end
+            if not written:
+                out.write(data)
+
+        try:
+            with self._edit_lock(abs_path):
+                def write(out):
+                    digest = hashlib.sha256()
+                    with open(abs_path, "rb") as src:
+                        (copy_lines if start_line is not None else copy_bytes)(src, out, digest)
+                    actual = digest.hexdigest()
+                    if expected_sha256 is not None and actual != expected_sha256.lower():
+                        raise PreconditionFailed(f"File '{path}' has changed (sha256 is {actual}); re-read it and retry.")
+
+                out = atomic_write(abs_path, write)
+            return {"path": path, "sha256": out.digest.hexdigest(), "size": out.size}
+        except PreconditionFailed as e:
+            return {"error": str(e)}
+        except Exception as e:
+            return {"error": f"Error editing file '{path}': {e}"}
+
     # -----------------------------
     # Directory Operations
     # -----------------------------
@@ -68,6 +515,24 @@ class FileService:
         except Exception as e:
             return [f"Error listing files in '{directory}': {e}"]
 
+    def list_entries(self, directory: str = "", cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE,
+                     pattern: str | None = None, extensions: list[str] | None = None,
+                     recursive: bool = False, max_depth: int = 3) -> dict:
+        """One page of entries (path, type, size, mtime) under `directory`.
+
+        Pass the returned `next_cursor` back to get the following page.
+        """
+        abs_path = self._resolve_path(directory)
+        if not os.path.isdir(abs_path):
+            return {"error": f"'{directory}' is not a valid directory."}
+        try:
+            entries = walk_entries(abs_path, recursive, max_depth, pattern, extensions, after=cursor)
+            result = page_entries(entries, limit)
+            result["directory"] = directory
+            return result
+        except Exception as e:
+            return {"error": f"Error listing files in '{directory}': {e}"}
+
     def create_directory(self, directory: str) -> str:
         abs_path = self._resolve_path(directory)
         try:
@@ -85,3 +550,72 @@ class FileService:
             return f"Directory '{directory}' removed successfully."
         except Exception as e:
             return f"Error removing directory '{directory}': {e}"
+
+    # -----------------------------
+    # Search
+    # -----------------------------
+    def search_files(self, query: str, regex: bool = False, case_sensitive: bool = False,
+                     context_lines: int = 2, max_results: int = 100, path_pattern: str | None = None) -> dict:
+        """Search file contents under the root using the incremental trigram index."""
+        try:
+            index = self._search_index
+            index.refresh_if_older_than(self.search_refresh_interval)
+            return index.search(query, regex, case_sensitive, context_lines, max_results, path_pattern)
+        except Exception as e:
+            return {"error": f"Error searching for '{query}': {e}"}
+
+    # -----------------------------
+    # Batch Operations
+    # -----------------------------
+    def _read_item(self, path: str, max_bytes: int) -> str:
+        abs_path = self._resolve_path(path)
+        if not os.path.isfile(abs_path):
+            raise FileNotFoundError(f"File '{path}' does not exist.")
+        max_bytes = max(0, min(max_bytes, MAX_READ_BYTES))
+        size = os.path.getsize(abs_path)
+        content = read_byte_range(abs_path, 0, max_bytes).decode("utf-8", errors="replace")
+        if size > max_bytes:
+            content += f"\n...[truncated: showing {max_bytes} of {size} bytes]"
+        return content
+
+    def _write_item(self, path: str, content: str) -> int:
+        abs_path = self._resolve_path(path)
+        with self._edit_lock(abs_path):
+            return atomic_write(abs_path, lambda f: f.write(content.encode("utf-8"))).size
+
+    def _delete_item(self, path: str) -> bool:
+        abs_path = self._resolve_path(path)
+        if not os.path.isfile(abs_path):
+            raise FileNotFoundError(f"'{path}' is not a valid file.")
+        os.remove(abs_path)
+        return True
+
+    def _run_batch(self, operation, items: list[tuple]) -> dict:
+        """Run `operation(*item)` for every item on the bounded worker pool.
+
+        Returns per-item results in input order; one failing item never fails the batch.
+        """
+        if len(items) > MAX_BATCH_ITEMS:
+            return {"error": f"Batch of {len(items)} items exceeds the limit of {MAX_BATCH_ITEMS}."}
+        if self._batch_executor is None:
+            self._batch_executor = ThreadPoolExecutor(max_workers=self.batch_workers, thread_name_prefix="file-batch")
+
+        def run(item):
+            try:
+                return {"path": item[0], "ok": True, "result": operation(*item)}
+            except Exception as e:
+                return {"path": item[0], "ok": False, "error": str(e)}
+
+        results = list(self._batch_executor.map(run, items))
+        succeeded = sum(1 for result in results if result["ok"])
+        return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+    def read_many(self, paths: list[str], max_bytes_per_file: int = 256 * 1024) -> dict:
+        return self._run_batch(self._read_item, [(path, max_bytes_per_file) for path in paths])
+
+    def write_many(self, files: list[dict]) -> dict:
+        """Write several files; `files` is a list of {"path": ..., "content": ...}."""
+        return self._run_batch(self._write_item, [(item.get("path", ""), item.get("content", "")) for item in files])
+
+    def delete_many(self, paths: list[str]) -> dict:
+        return self._run_batch(self._delete_item, [(path,) for path in paths])
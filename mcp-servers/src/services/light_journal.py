@@ -0,0 +1,214 @@
+import glob
+import json
+import os
+import re
+import struct
+import threading
+import time
+
+# One log record: light id (uint32) and the state it was set to (0/1)
+RECORD = struct.Struct("<IB")
+SNAPSHOT_FILE = "lights.snapshot"
+LOG_FILE_PATTERN = re.compile(r"lights\.(\d+)\.log$")
+DEFAULT_COMMIT_INTERVAL = 0.01
+DEFAULT_SNAPSHOT_EVERY = 1_000_000
+
+
+def _log_path(directory: str, generation: int) -> str:
+    return os.path.join(directory, f"lights.{generation}.log")
+
+
+def _log_generations(directory: str) -> list[int]:
+    generations = []
+    for path in glob.glob(os.path.join(directory, "lights.*.log")):
+        match = LOG_FILE_PATTERN.search(os.path.basename(path))
+        if match:
+            generations.append(int(match.group(1)))
+    return sorted(generations)
+
+
+class LightJournal:
+    """Durable light state: a compact snapshot plus an append-only change log.
+
+    Every change is appended to the current log with `os.write` as it happens, so a
+    process crash loses nothing. A background thread fsyncs the log every
+    `commit_interval` seconds, or right away when someone is waiting in
+    `wait_durable` (group commit: one fsync covers every change written since the
+    last one).
+    After `snapshot_every` records the thread writes a new snapshot and starts a
+    new log generation, so a restart loads one snapshot and replays a short tail.
+
+    Records hold the new state rather than a toggle, so replaying a record twice
+    is harmless. Each snapshot is written by the process whose id order the logs
+    after it use; `open` always writes one before logging anything. Only one
+    process may use a directory at a time.
+    """
+
+    def __init__(self, directory: str, commit_interval: float = DEFAULT_COMMIT_INTERVAL,
+                 snapshot_every: int = DEFAULT_SNAPSHOT_EVERY):
+        self.directory = directory
+        self.commit_interval = commit_interval
+        self.snapshot_every = snapshot_every
+        self.store = None
+        self.generation = 0
+        self.written_seq = 0        # records handed to the OS
+        self.durable_seq = 0        # records known to be fsynced
+        self.records_since_snapshot = 0
+        self.fsync_count = 0
+        self._log_fd = None
+        self._lock = threading.Lock()
+        self._durable = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._flusher = None
+        os.makedirs(directory, exist_ok=True)
+
+    # -----------------------------
+    # Startup
+    # -----------------------------
+    def restore(self, store) -> dict:
+        """Load the latest snapshot into `store` and replay the logs written after it.
+
+        Locations are matched by name, so fixtures may be added, removed or reordered
+        between runs. Returns counts for reporting.
+        """
+        snapshot_path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if not os.path.exists(snapshot_path):
+            return {"snapshot": False, "replayed": 0}
+        with open(snapshot_path, "rb") as f:
+            header = json.loads(f.readline())
+            states = f.read(len(header["names"]))
+        # Map the writer's ids to this store's ids (-1 for locations that no longer exist)
+        id_map = [store.ids.get(name, -1) for name in header["names"]]
+        for old_id, light_id in enumerate(id_map):
+            if light_id != -1:
+                store.states[light_id] = states[old_id]
+
+        replayed = 0
+        self.generation = header["generation"]
+        for generation in _log_generations(self.directory):
+            if generation < header["generation"]:
+                continue
+            self.generation = generation
+            with open(_log_path(self.directory, generation), "rb") as f:
+                data = f.read()
+            # A torn record at the end of the log is from a crash mid-write; ignore it
+            usable = len(data) - len(data) % RECORD.size
+            target = store.states
+            for old_id, value in RECORD.iter_unpack(memoryview(data)[:usable]):
+                if old_id < len(id_map) and id_map[old_id] != -1:
+                    target[id_map[old_id]] = value
+            replayed += usable // RECORD.size
+        return {"snapshot": True, "generation": header["generation"], "replayed": replayed}
+
+    def open(self, store) -> dict:
+        """Restore `store`, write a fresh snapshot in its id order and start logging changes."""
+        result = self.restore(store)
+        self.store = store
+        self.generation += 1
+        self._write_snapshot(self.generation, store.names, bytes(store.states))
+        self._log_fd = os.open(_log_path(self.directory, self.generation),
+                               os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._remove_old_logs(self.generation)
+        self._flusher = threading.Thread(target=self._flush_loop, name="light-journal", daemon=True)
+        self._flusher.start()
+        return result
+
+    # -----------------------------
+    # Logging
+    # -----------------------------
+    def record(self, light_ids, on: bool) -> int:
+        """Append "each of `light_ids` is now on/off"; returns the sequence number to wait on."""
+        value = 1 if on else 0
+        data = b"".join(RECORD.pack(light_id, value) for light_id in light_ids)
+        with self._lock:
+            if data:
+                os.write(self._log_fd, data)
+                count = len(data) // RECORD.size
+                self.written_seq += count
+                self.records_since_snapshot += count
+            return self.written_seq
+
+    def wait_durable(self, seq: int, timeout: float | None = None) -> bool:
+        """Block until change `seq` has been fsynced; False on timeout.
+
+        Waiting wakes the flusher at once, and everything written while one fsync
+        runs is covered by the next, so concurrent waiters share fsyncs.
+        """
+        with self._durable:
+            if self.durable_seq >= seq:
+                return True
+            self._wakeup.set()
+            return self._durable.wait_for(lambda: self.durable_seq >= seq, timeout)
+
+    def _flush_loop(self):
+        while True:
+            self._wakeup.wait(self.commit_interval)
+            self._wakeup.clear()
+            if self._stop.is_set():
+                return
+            self.flush()
+
+    def flush(self):
+        """Fsync everything written so far, and roll over to a new snapshot when due."""
+        with self._lock:
+            seq = self.written_seq
+            fd = self._log_fd
+            rotate = self.records_since_snapshot >= self.snapshot_every
+            if rotate:
+                # Changes from here on go to the next generation; the snapshot copy
+                # already contains everything logged so far
+                states = bytes(self.store.states)
+                self.generation += 1
+                self._log_fd = os.open(_log_path(self.directory, self.generation),
+                                       os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+                self.records_since_snapshot = 0
+        if seq > self.durable_seq or rotate:
+            os.fsync(fd)
+            with self._durable:
+                self.fsync_count += 1
+                self.durable_seq = max(self.durable_seq, seq)
+                self._durable.notify_all()
+        if rotate:
+            os.close(fd)
+            self._write_snapshot(self.generation, self.store.names, states)
+            self._remove_old_logs(self.generation)
+
+    # -----------------------------
+    # Snapshots
+    # -----------------------------
+    def _write_snapshot(self, generation: int, names: list[str], states: bytes):
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        temp_path = path + ".tmp"
+        header = json.dumps({"generation": generation, "created": time.time(), "names": names[:len(states)]})
+        with open(temp_path, "wb") as f:
+            f.write(header.encode("utf-8") + b"\n")
+            f.write(states)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def _remove_old_logs(self, generation: int):
+        for old_generation in _log_generations(self.directory):
+            if old_generation < generation:
+                os.remove(_log_path(self.directory, old_generation))
+
+    def close(self):
+        """Stop the flusher and fsync the log; pending changes are durable afterwards."""
+        if self._flusher is None:
+            return
+        self._stop.set()
+        self._wakeup.set()
+        self._flusher.join()
+        self.flush()
+        os.close(self._log_fd)
+        self._flusher = None
+
+    def stats(self) -> dict:
+        return {
+            "generation": self.generation,
+            "written": self.written_seq,
+            "durable": self.durable_seq,
+            "since_snapshot": self.records_since_snapshot,
+            "fsyncs": self.fsync_count,
+        }
@@ -0,0 +1,138 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DEFAULT_BUSY_TIMEOUT = 10.0
+# Change rows kept in the database; workers further behind reload the full state
+CHANGE_RETENTION = 10_000
+PRUNE_EVERY = 1_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lights (name TEXT PRIMARY KEY, state INTEGER NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS changes (version INTEGER NOT NULL, name TEXT NOT NULL, state INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS changes_version ON changes (version);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL) WITHOUT ROWID;
+INSERT OR IGNORE INTO meta VALUES ('version', 1);
+"""
+
+
+class SharedLightLog:
+    """Light state shared by several server processes through an SQLite database in WAL mode.
+
+    The `lights` table holds the current state and `changes` holds one row per
+    changed light, tagged with the version that changed it. Each process keeps its
+    own in-memory copy as a read cache: `changed()` asks SQLite whether another
+    connection has committed since the last check (`PRAGMA data_version`, no
+    table access), and only then are the new change rows read.
+
+    Writers take the database write lock (`BEGIN IMMEDIATE`) with `write()`, so a
+    read-modify-write sees every earlier commit from any process. WAL mode lets
+    readers carry on while a write is in progress.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = DEFAULT_BUSY_TIMEOUT):
+        self.path = path
+        # Separate connections, so cache checks never queue behind an open write transaction
+        self.writer = self._connect(path, busy_timeout)
+        self.reader = self._connect(path, busy_timeout)
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self.data_version = None
+        with self._write_lock:
+            self.writer.execute("PRAGMA journal_mode=WAL")
+            self.writer.executescript(SCHEMA)
+
+    @staticmethod
+    def _connect(path: str, busy_timeout: float) -> sqlite3.Connection:
+        connection = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        # WAL with synchronous=NORMAL: commits survive a process crash; only an OS crash may drop the latest
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def register(self, states: dict[str, bool]):
+        """Add lights missing from the database with their fixture state; existing rows keep theirs."""
+        with self._write_lock:
+            self.writer.executemany("INSERT OR IGNORE INTO lights VALUES (?, ?)",
+                                    ((name, 1 if on else 0) for name, on in states.items()))
+
+    # -----------------------------
+    # Reading
+    # -----------------------------
+    def changed(self) -> bool:
+        """True if any connection committed since the last call."""
+        with self._read_lock:
+            data_version = self.reader.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self.data_version:
+                return False
+            self.data_version = data_version
+            return True
+
+    def load(self) -> tuple[int, dict[str, bool]]:
+        """The current version and `{name: on}` for every light, read consistently."""
+        with self._read_lock:
+            self.reader.execute("BEGIN")
+            try:
+                version = self._version(self.reader)
+                states = {name: state == 1 for name, state in self.reader.execute("SELECT name, state FROM lights")}
+            finally:
+                self.reader.execute("COMMIT")
+        return version, states
+
+    def changes_since(self, since: int) -> tuple[int, list | None]:
+        """The current version and `(version, name, state)` rows after `since`.
+
+        The rows are None if some of them have been pruned; reload with `load()`.
+        """
+        with self._read_lock:
+            self.reader.execute("BEGIN")
+            try:
+                version = self._version(self.reader)
+                if version <= since:
+                    return version, []
+                oldest = self.reader.execute("SELECT MIN(version) FROM changes").fetchone()[0]
+                if oldest is None or oldest > since + 1:
+                    return version, None
+                rows = self.reader.execute(
+                    "SELECT version, name, state FROM changes WHERE version > ? ORDER BY version", (since,)).fetchall()
+            finally:
+                self.reader.execute("COMMIT")
+        return version, rows
+
+    @staticmethod
+    def _version(connection: sqlite3.Connection) -> int:
+        return connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    # -----------------------------
+    # Writing
+    # -----------------------------
+    @contextmanager
+    def write(self):
+        """Hold the database write lock; `commit()` inside the block publishes the changes.
+
+        Leaving the block without committing (or with an exception) rolls back.
+        """
+        with self._write_lock:
+            self.writer.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            finally:
+                if self.writer.in_transaction:
+                    self.writer.execute("ROLLBACK")
+
+    def commit(self, changes: list[tuple]) -> int:
+        """Write `(names, on)` groups as one new version and commit; returns that version."""
+        writer = self.writer
+        version = self._version(writer) + 1
+        for names, on in changes:
+            state = 1 if on else 0
+            writer.executemany("UPDATE lights SET state = ? WHERE name = ?", ((state, name) for name in names))
+            writer.executemany("INSERT INTO changes VALUES (?, ?, ?)", ((version, name, state) for name in names))
+        writer.execute("UPDATE meta SET value = ? WHERE key = 'version'", (version,))
+        if version % PRUNE_EVERY == 0:
+            writer.execute("DELETE FROM changes WHERE version <= ?", (version - CHANGE_RETENTION,))
+        writer.execute("COMMIT")
+        return version
+
+    def close(self):
+        self.writer.close()
+        self.reader.close()
@@ -0,0 +1,174 @@
+import threading
+from array import array
+from contextlib import contextmanager
+from itertools import islice
+
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 5000
+NO_FLOOR = -1
+# Number of locks shared by all fixtures; light id `i` is guarded by lock `i % LOCK_STRIPES`
+LOCK_STRIPES = 64
+
+
+class LightStateStore:
+    """Compact on/off state for a large number of light fixtures.
+
+    Location names are interned to dense integer ids once, when the fixture is
+    added. State is one byte per fixture in a `bytearray`, and floor/zone are
+    stored per fixture in typed arrays, so lookups and toggles are an O(1) dict
+    hit plus an array access. Floor, zone and tag indexes map to arrays of ids,
+    so a filtered query only visits the fixtures in the smallest matching index.
+    """
+
+    def __init__(self):
+        self.ids = {}                # location name -> id
+        self.names = []              # id -> location name
+        self.states = bytearray()    # id -> 1 (on) / 0 (off)
+        self.floor_of = array("i")   # id -> floor number, NO_FLOOR if unknown
+        self.zone_of = array("i")    # id -> index into zone_names, -1 if none
+        self.zone_names = []
+        self.zone_ids = {}
+        self.by_floor = {}           # floor -> array of ids
+        self.by_zone = {}            # zone name -> array of ids
+        self.by_tag = {}             # tag -> array of ids
+        self.stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.ids
+
+    def add(self, name: str, on: bool = False, floor: int | None = None,
+            zone: str | None = None, tags: list[str] | tuple = ()) -> int:
+        """Register a fixture and return its id; re-adding a name only updates its state."""
+        light_id = self.ids.get(name)
+        if light_id is not None:
+            self.states[light_id] = 1 if on else 0
+            return light_id
+        light_id = len(self.names)
+        self.ids[name] = light_id
+        self.names.append(name)
+        self.states.append(1 if on else 0)
+        self.floor_of.append(NO_FLOOR if floor is None else floor)
+        zone_id = -1
+        if zone is not None:
+            zone_id = self.zone_ids.get(zone)
+            if zone_id is None:
+                zone_id = len(self.zone_names)
+                self.zone_ids[zone] = zone_id
+                self.zone_names.append(zone)
+            self.by_zone.setdefault(zone, array("I")).append(light_id)
+        self.zone_of.append(zone_id)
+        if floor is not None:
+            self.by_floor.setdefault(floor, array("I")).append(light_id)
+        for tag in tags:
+            self.by_tag.setdefault(tag, array("I")).append(light_id)
+        return light_id
+
+    @contextmanager
+    def locked(self, light_ids):
+        """Hold the locks guarding `light_ids` so their read-modify-write cannot interleave.
+
+        Stripes are taken in ascending order, so two batches locking overlapping
+        lights can never deadlock. Mutations of unrelated lights on other stripes
+        proceed in parallel.
+        """
+        stripes = sorted({light_id % LOCK_STRIPES for light_id in light_ids})
+        for stripe in stripes:
+            self.stripes[stripe].acquire()
+        try:
+            yield
+        finally:
+            for stripe in reversed(stripes):
+                self.stripes[stripe].release()
+
+    def is_on(self, name: str) -> bool | None:
+        """State of `name`, or None for an unknown location."""
+        light_id = self.ids.get(name)
+        return None if light_id is None else self.states[light_id] == 1
+
+    def set(self, name: str, on: bool) -> bool | None:
+        """Set the state of `name`; returns the previous state (None if unknown)."""
+        light_id = self.ids.get(name)
+        if light_id is None:
+            return None
+        previous = self.states[light_id] == 1
+        self.states[light_id] = 1 if on else 0
+        return previous
+
+    def toggle(self, name: str) -> bool | None:
+        """Flip `name` and return its new state (None if unknown)."""
+        light_id = self.ids.get(name)
+        if light_id is None:
+            return None
+        self.states[light_id] ^= 1
+        return self.states[light_id] == 1
+
+    def set_ids(self, light_ids, on: bool) -> list[int]:
+        """Set every id in `light_ids` to `on`; returns the ids whose state actually changed."""
+        value = 1 if on else 0
+        states = self.states
+        changed = [light_id for light_id in light_ids if states[light_id] != value]
+        for light_id in changed:
+            states[light_id] = value
+        return changed
+
+    def describe(self, light_id: int) -> dict:
+        item = {"location": self.names[light_id], "state": "on" if self.states[light_id] else "off"}
+        if self.floor_of[light_id] != NO_FLOOR:
+            item["floor"] = self.floor_of[light_id]
+        if self.zone_of[light_id] != -1:
+            item["zone"] = self.zone_names[self.zone_of[light_id]]
+        return item
+
+    def select(self, floor: int | None = None, zone: str | None = None, tag: str | None = None,
+               state: str | None = None):
+        """Yield the ids of fixtures matching every given filter, in id order."""
+        candidates = None
+        tag_index = self.by_tag.get(tag, ()) if tag is not None else None
+        if tag_index is not None:
+            candidates = tag_index
+        if zone is not None:
+            zone_ids = self.by_zone.get(zone, ())
+            if candidates is None or len(zone_ids) < len(candidates):
+                candidates = zone_ids
+        if floor is not None:
+            floor_ids = self.by_floor.get(floor, ())
+            if candidates is None or len(floor_ids) < len(candidates):
+                candidates = floor_ids
+        if candidates is None:
+            candidates = range(len(self.names))
+
+        # Filters not used to pick the candidates are checked per fixture
+        tag_ids = set(tag_index) if tag_index is not None and candidates is not tag_index else None
+        zone_id = self.zone_ids.get(zone, -2) if zone is not None else None
+        wanted = None if state is None else (1 if state == "on" else 0)
+        states, floor_of, zone_of = self.states, self.floor_of, self.zone_of
+        for light_id in candidates:
+            if wanted is not None and states[light_id] != wanted:
+                continue
+            if floor is not None and floor_of[light_id] != floor:
+                continue
+            if zone_id is not None and zone_of[light_id] != zone_id:
+                continue
+            if tag_ids is not None and light_id not in tag_ids:
+                continue
+            yield light_id
+
+    def query(self, floor: int | None = None, zone: str | None = None, tag: str | None = None,
+              state: str | None = None, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE) -> dict:
+        """One page of matching fixtures; pass `next_cursor` back as `cursor` (None on the last page)."""
+        offset = int(cursor) if cursor else 0
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        page = [self.describe(light_id)
+                for light_id in islice(self.select(floor, zone, tag, state), offset, offset + limit + 1)]
+        has_more = len(page) > limit
+        return {"lights": page[:limit], "next_cursor": str(offset + limit) if has_more else None}
+
+    def count_on(self) -> int:
+        return self.states.count(1)
+
+    def as_dict(self) -> dict:
+        """Full `{location: "on"/"off"}` map, as the original service returned it."""
+        return {name: "on" if state else "off" for name, state in zip(self.names, self.states)}
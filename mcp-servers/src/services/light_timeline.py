@@ -0,0 +1,148 @@
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from operator import mul, sub
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Transitions kept per light; older ones are overwritten and fall out of the covered window
+TRANSITIONS_PER_LIGHT = 256
+
+
+class TransitionRing:
+    """The last `capacity` state transitions of one light, as parallel fixed-size arrays.
+
+    The arrays grow up to `capacity` on demand, so a light that never changes costs
+    nothing; after that each new transition overwrites the oldest.
+    """
+
+    __slots__ = ("times", "states", "capacity", "next", "dropped")
+
+    def __init__(self, capacity: int = TRANSITIONS_PER_LIGHT):
+        self.times = array("d")     # seconds since the epoch
+        self.states = bytearray()   # state entered at that time: 1 (on) / 0 (off)
+        self.capacity = capacity
+        self.next = 0               # slot the next transition overwrites once full
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def append(self, timestamp: float, on: bool):
+        if len(self.times) < self.capacity:
+            self.times.append(timestamp)
+            self.states.append(1 if on else 0)
+            return
+        self.times[self.next] = timestamp
+        self.states[self.next] = 1 if on else 0
+        self.next = (self.next + 1) % self.capacity
+        self.dropped += 1
+
+    def ordered(self) -> tuple[array, bytearray]:
+        """Copies of the times and states, oldest first."""
+        if not self.dropped or self.next == 0:
+            return self.times[:], self.states[:]
+        return (self.times[self.next:] + self.times[:self.next],
+                self.states[self.next:] + self.states[:self.next])
+
+
+def cumulative_on(points, states, edges) -> list[float]:
+    """Seconds spent on between `points[0]` and each edge.
+
+    The light is in `states[i]` from `points[i]` until `points[i + 1]` (or forever
+    for the last point); edges before `points[0]` count as zero. Uses NumPy when
+    it is installed.
+    """
+    if np is not None:
+        points = np.frombuffer(points, dtype=np.float64) if isinstance(points, array) else np.asarray(points, np.float64)
+        states = np.frombuffer(bytes(states), dtype=np.uint8).astype(np.float64)
+        edges = np.asarray(edges, dtype=np.float64)
+        before = np.concatenate(([0.0], np.cumsum(np.diff(points) * states[:-1])))
+        index = np.clip(np.searchsorted(points, edges, side="right") - 1, 0, None)
+        return (before[index] + np.maximum(edges - points[index], 0.0) * states[index]).tolist()
+    # On-seconds before each point: running sum of segment lengths times their state
+    before = list(accumulate(map(mul, map(sub, points[1:], points), states), initial=0.0))
+    result = []
+    for edge in edges:
+        i = max(bisect_right(points, edge) - 1, 0)
+        result.append(before[i] + max(edge - points[i], 0.0) * states[i])
+    return result
+
+
+class LightTimeline:
+    """When each light was switched on and off, for usage questions.
+
+    Only lights that have changed get a `TransitionRing`. A light's state between
+    transitions is known, so on-time over any window is a lookup over its
+    transition times. History starts at `started`; windows reaching further back
+    (or past a ring's oldest kept transition) are reported with `covered_from`.
+    """
+
+    def __init__(self, started: float, capacity: int = TRANSITIONS_PER_LIGHT):
+        self.started = started
+        self.capacity = capacity
+        self.rings = {}  # light id -> TransitionRing
+        self._lock = threading.Lock()
+
+    def record(self, light_ids, on: bool, timestamp: float):
+        with self._lock:
+            for light_id in light_ids:
+                ring = self.rings.get(light_id)
+                if ring is None:
+                    ring = self.rings[light_id] = TransitionRing(self.capacity)
+                ring.append(timestamp, on)
+
+    def _segments(self, light_id: int):
+        """(points, states, padded) covering the known history of one light, or None if it never changed.
+
+        `padded` is true when the first point is `started` rather than a transition.
+        """
+        with self._lock:
+            ring = self.rings.get(light_id)
+            if ring is None:
+                return None
+            times, states = ring.ordered()
+            dropped = ring.dropped
+        if dropped:
+            return times, states, False
+        # Before its first transition the light was in the opposite state, back to `started`
+        return array("d", [self.started]) + times, bytearray([1 - states[0]]) + states, True
+
+    def usage(self, light_id: int, on_now: bool, start: float, end: float) -> dict:
+        """On-seconds and transitions of one light within [start, end]."""
+        segments = self._segments(light_id)
+        if segments is None:
+            covered_from = max(start, self.started)
+            return {"on_seconds": max(end - covered_from, 0.0) if on_now else 0.0,
+                    "toggles": 0, "covered_from": covered_from}
+        points, states, padded = segments
+        covered_from = max(start, points[0])
+        lower, upper = cumulative_on(points, states, [covered_from, max(end, covered_from)])
+        toggles = bisect_right(points, end) - bisect_left(points, start)
+        if padded and start <= points[0] <= end:
+            toggles -= 1  # the point added at `started` is not a transition
+        return {"on_seconds": upper - lower, "toggles": toggles, "covered_from": covered_from}
+
+    def occupancy(self, lights: list[tuple[int, bool]], edges: list[float]) -> list[float]:
+        """Total on-seconds of `(light_id, on_now)` lights between consecutive `edges`."""
+        totals = [0.0] * (len(edges) - 1)
+        always_on = 0
+        for light_id, on_now in lights:
+            segments = self._segments(light_id)
+            if segments is None:
+                always_on += on_now
+                continue
+            points, states, _ = segments
+            cumulative = cumulative_on(points, states, edges)
+            for i in range(len(totals)):
+                totals[i] += cumulative[i + 1] - cumulative[i]
+        if always_on:
+            # Lights that never changed were on for every known second of each bucket
+            for i in range(len(totals)):
+                known = max(edges[i + 1] - max(edges[i], self.started), 0.0)
+                totals[i] += always_on * known
+        return totals
@@ -0,0 +1,51 @@
+import time
+from fastmcp.server.middleware import Middleware
+from starlette.responses import PlainTextResponse
+from services.tool_metrics import ToolMetrics, payload_size
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _is_error(result) -> bool:
+    if getattr(result, "is_error", False):
+        return True
+    # Services report failures as {"error": ...} rather than raising
+    structured = getattr(result, "structured_content", None)
+    return isinstance(structured, dict) and "error" in structured
+
+
+class MetricsMiddleware(Middleware):
+    """Records every tool call and resource read in a `ToolMetrics`."""
+
+    def __init__(self, metrics: ToolMetrics):
+        self.metrics = metrics
+
+    async def _measure(self, method: str, name: str, arguments, context, call_next):
+        stats = self.metrics.start(method, name, payload_size(arguments))
+        started = time.perf_counter()
+        try:
+            result = await call_next(context)
+        except Exception:
+            self.metrics.finish(stats, time.perf_counter() - started, error=True)
+            raise
+        self.metrics.finish(stats, time.perf_counter() - started, payload_size(result), _is_error(result))
+        return result
+
+    async def on_call_tool(self, context, call_next):
+        message = context.message
+        return await self._measure("tools/call", message.name, message.arguments, context, call_next)
+
+    async def on_read_resource(self, context, call_next):
+        return await self._measure("resources/read", str(context.message.uri), None, context, call_next)
+
+
+def install_metrics(mcp, path: str = "/metrics") -> ToolMetrics:
+    """Measure every request to `mcp` and serve the results in Prometheus text format at `path`."""
+    metrics = ToolMetrics()
+    mcp.add_middleware(MetricsMiddleware(metrics))
+
+    @mcp.custom_route(path, methods=["GET"])
+    async def metrics_endpoint(request):
+        return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+    return metrics
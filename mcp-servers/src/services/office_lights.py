@@ -1,41 +1,542 @@
+import heapq
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from services.light_journal import LightJournal
+from services.light_shared import SharedLightLog
+from services.light_state import LightStateStore, DEFAULT_PAGE_SIZE, LOCK_STRIPES
+from services.light_timeline import LightTimeline
+
+# JSON list of fixtures ({"location", "state", "floor", "zone", "tags"}) to load instead of the demo set
+FIXTURES_PATH_ENV = "OFFICE_LIGHTS_FIXTURES"
+# Directory for the snapshot and change log; state is in-memory only when unset
+STATE_DIR_ENV = "OFFICE_LIGHTS_STATE_DIR"
+# SQLite database shared by several server workers; takes the place of the state directory
+SHARED_DB_ENV = "OFFICE_LIGHTS_SHARED_DB"
+# How often a worker with a shared database checks for other workers' changes while idle
+SHARED_SYNC_INTERVAL = 0.05
+
+DEFAULT_FIXTURES = [
+    {"location": "reception", "state": "on"},
+    {"location": "conference room 1", "state": "off"},
+    {"location": "conference room 2", "state": "off"},
+    {"location": "office", "state": "off"},
+]
+# Bulk results list at most this many changed locations; the counts are always exact
+MAX_DIFF_LOCATIONS = 100
+# Mutations kept for `changes_since`; older clients get the full map instead of a delta
+CHANGE_HISTORY = 1024
+# Serialized responses kept per version (distinct filter/page combinations)
+MAX_CACHED_PAYLOADS = 256
+# Usage summaries list at most this many lights; occupancy has at most this many buckets
+MAX_USAGE_TOP = 50
+MAX_OCCUPANCY_BUCKETS = 168
+
+
+def default_fixtures() -> list[dict]:
+    path = os.environ.get(FIXTURES_PATH_ENV)
+    if not path:
+        return DEFAULT_FIXTURES
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class LightTransaction:
+    """Pending changes to a fixed set of lights, applied when the transaction exits.
+
+    Reads see the state as of the start of the transaction plus its own writes.
+    """
+
+    def __init__(self, store: LightStateStore, light_ids: list[int]):
+        self.store = store
+        self.light_ids = set(light_ids)
+        self.pending = {}  # light id -> on
+        self.changed = {True: [], False: []}
+
+    def _id(self, location: str) -> int:
+        light_id = self.store.ids.get(location)
+        if light_id not in self.light_ids:
+            raise KeyError(f"'{location}' is not part of this transaction.")
+        return light_id
+
+    def get(self, location: str) -> str:
+        light_id = self._id(location)
+        on = self.pending.get(light_id, self.store.states[light_id] == 1)
+        return "on" if on else "off"
+
+    def set(self, location: str, state: str):
+        if state not in ("on", "off"):
+            raise ValueError(f"Unknown state '{state}'; use 'on' or 'off'.")
+        self.pending[self._id(location)] = state == "on"
+
+    def toggle(self, location: str) -> str:
+        state = "off" if self.get(location) == "on" else "on"
+        self.set(location, state)
+        return state
+
+
 class OfficeLightsService:
 
-    def __init__(self):
-        self.office_lights = {
-            "reception": "on",
-            "conference room 1": "off",
-            "conference room 2": "off",
-            "office": "off",
-        }
+    def __init__(self, fixtures: list[dict] | None = None, state_dir: str | None = None,
+                 shared_db: str | None = None):
+        self.store = LightStateStore()
+        # Bumped on every mutation; `history` holds (version, light ids, on) for deltas
+        self.version = 1
+        self.history = deque(maxlen=CHANGE_HISTORY)
+        # Oldest `since` that `history` still answers completely; moves up as entries are evicted
+        self.history_floor = self.version
+        # When each light changed, for usage queries; starts empty on every run
+        self.timeline = LightTimeline(started=time.time())
+        self.listeners = []
+        # Orders version bumps, history and journal appends; taken inside the stripe locks
+        self._commit_lock = threading.Lock()
+        self._payload_lock = threading.Lock()
+        # JSON responses for `payload_version`; dropped as soon as the version moves on
+        self.payloads = {}
+        self.payload_version = self.version
+        for fixture in default_fixtures() if fixtures is None else fixtures:
+            self.store.add(
+                fixture["location"],
+                on=fixture.get("state") == "on",
+                floor=fixture.get("floor"),
+                zone=fixture.get("zone"),
+                tags=fixture.get("tags", ()),
+            )
+        # Saved state wins over the fixture defaults
+        state_dir = state_dir or os.environ.get(STATE_DIR_ENV)
+        shared_db = shared_db or os.environ.get(SHARED_DB_ENV)
+        self.journal = None
+        self.shared = None
+        self._sync_thread = None
+        self._stop_sync = threading.Event()
+        if shared_db:
+            # The database is the durable copy; a per-process journal would disagree between workers
+            self.shared = SharedLightLog(shared_db)
+            self.shared.register({name: state == 1 for name, state in zip(self.store.names, self.store.states)})
+            self.shared.changed()
+            self._reload()
+            self._sync_thread = threading.Thread(target=self._sync_loop, name="light-sync", daemon=True)
+            self._sync_thread.start()
+        elif state_dir:
+            self.journal = LightJournal(state_dir)
+            self.journal.open(self.store)
+
+    def _record(self, changes: list[tuple]):
+        """Publish `(light_ids, on)` groups, already applied to the store, as one new version.
+
+        Callers hold the stripe locks of those lights, so each light's journal
+        records are written in the same order as its state changes.
+        """
+        changes = [(light_ids, on) for light_ids, on in changes if light_ids]
+        if not changes:
+            return
+        with self._commit_lock:
+            if self.shared is not None:
+                # Called inside `_locked`, which holds the database write lock
+                names = self.store.names
+                version = self.shared.commit([([names[light_id] for light_id in light_ids], on)
+                                              for light_ids, on in changes])
+            else:
+                version = self.version + 1
+            self.version = version
+            now = time.time()
+            for light_ids, on in changes:
+                if self.journal is not None:
+                    self.journal.record(light_ids, on)
+                self._remember(version, light_ids, on)
+                self.timeline.record(light_ids, on, now)
+        for listener in self.listeners:
+            listener(version)
+
+    def _record_one(self, light_id: int, on: bool):
+        """`_record` for a single light without a shared database."""
+        light_ids = (light_id,)
+        with self._commit_lock:
+            self.version = version = self.version + 1
+            if self.journal is not None:
+                self.journal.record(light_ids, on)
+            self._remember(version, light_ids, on)
+            self.timeline.record(light_ids, on, time.time())
+        for listener in self.listeners:
+            listener(version)
+
+    def _remember(self, version: int, light_ids, on: bool):
+        """Append to `history`; call with the commit lock held."""
+        if len(self.history) == self.history.maxlen:
+            # A version can span several entries, so the evicted one's version is no longer complete
+            self.history_floor = max(self.history_floor, self.history[0][0])
+        self.history.append((version, light_ids, on))
+
+    # -----------------------------
+    # Shared database
+    # -----------------------------
+    def _reload(self) -> dict[bool, list[int]]:
+        """Replace the local copy with the full state from the shared database; returns what changed."""
+        version, states = self.shared.load()
+        changed = {True: [], False: []}
+        for name, on in states.items():
+            light_id = self.store.ids.get(name)
+            if light_id is not None and (self.store.states[light_id] == 1) != on:
+                self.store.states[light_id] = 1 if on else 0
+                changed[on].append(light_id)
+        self.version = version
+        # Deltas across the reload are unknown; `changes_since` answers with the full map
+        self.history.clear()
+        self.history_floor = version
+        return changed
+
+    def _sync(self, force: bool = False):
+        """Apply changes other workers committed to the shared database since our version.
+
+        Without `force`, this costs one `PRAGMA data_version` when nothing changed.
+        """
+        if self.shared is None or not (self.shared.changed() or force):
+            return
+        with self._commit_lock:
+            version, rows = self.shared.changes_since(self.version)
+            if version <= self.version:
+                return
+            now = time.time()
+            if rows is None:
+                for on, light_ids in self._reload().items():
+                    self.timeline.record(light_ids, on, now)
+            else:
+                groups = {}  # (version, on) -> light ids
+                for row_version, name, state in rows:
+                    light_id = self.store.ids.get(name)
+                    if light_id is not None:
+                        self.store.states[light_id] = state
+                        groups.setdefault((row_version, state == 1), []).append(light_id)
+                for (row_version, on), light_ids in groups.items():
+                    self._remember(row_version, light_ids, on)
+                    self.timeline.record(light_ids, on, now)
+                self.version = version
+        for listener in self.listeners:
+            listener(version)
+
+    def _sync_loop(self):
+        # Picks up other workers' changes while no request arrives, so subscribers still get notified
+        while not self._stop_sync.wait(SHARED_SYNC_INTERVAL):
+            self._sync()
+
+    # -----------------------------
+    # Transactions
+    # -----------------------------
+    @contextmanager
+    def _locked(self, light_ids):
+        """Lock `light_ids` for a read-modify-write, across workers when the database is shared."""
+        write_lock = self.shared.write() if self.shared is not None else nullcontext()
+        with self.store.locked(light_ids), write_lock:
+            # With the database locked, no other worker can commit until we do
+            self._sync(force=True)
+            yield
+
+    @contextmanager
+    def _transaction(self, light_ids: list[int]):
+        with self._locked(light_ids):
+            transaction = LightTransaction(self.store, light_ids)
+            yield transaction
+            for on in (True, False):
+                wanted = [light_id for light_id, value in transaction.pending.items() if value == on]
+                transaction.changed[on] = self.store.set_ids(wanted, on)
+            self._record([(transaction.changed[True], True), (transaction.changed[False], False)])
+
+    def transaction(self, locations: list[str]):
+        """Atomically read and change several lights.
+
+            with lights_service.transaction(["office", "reception"]) as tx:
+                if tx.get("office") == "on":
+                    tx.set("reception", "off")
+
+        The lights are locked for the duration of the block and every change is
+        published as one version on exit; if the block raises, nothing changes.
+        With a shared database, the block also holds the database write lock.
+        """
+        unknown = [location for location in locations if location not in self.store]
+        if unknown:
+            raise KeyError(f"Unknown locations: {unknown[:MAX_DIFF_LOCATIONS]}")
+        return self._transaction([self.store.ids[location] for location in locations])
+
+    def add_listener(self, listener):
+        """Call `listener(version)` after every change to the light state."""
+        self.listeners.append(listener)
+
+    def changes_since(self, since: int) -> dict:
+        """Lights changed after version `since`, or the full map if that history is gone.
+
+        Returns `{"version", "full", "lights"}`; with `full` false, `lights` only holds
+        the locations whose state changed, with their current state.
+        """
+        self._sync()
+        with self._commit_lock:
+            version = self.version
+            if since == version:
+                return {"version": version, "full": False, "lights": {}}
+            if not (self.history_floor <= since < version):
+                full = True
+            else:
+                full = False
+                entries = []
+                for entry in reversed(self.history):
+                    if entry[0] <= since:
+                        break
+                    entries.append(entry)
+        if full:
+            # Read after the version, so the map is at least as new as the version it is labelled with
+            return {"version": version, "full": True, "lights": self.store.as_dict()}
+        changes = {}
+        for _, light_ids, on in reversed(entries):
+            for light_id in light_ids:
+                changes[self.store.names[light_id]] = "on" if on else "off"
+        return {"version": version, "full": False, "lights": changes}
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+        if self.shared is not None:
+            self._stop_sync.set()
+            self._sync_thread.join()
+            self.shared.close()
 
     def get_office_lights(self):
         # Logic to retrieve current office lighting status
-        print("Retrieving current office lights status")
-        return self.office_lights
-    
+        self._sync()
+        return self.store.as_dict()
+
     def get_office_light(self, location: str):
         # Logic to retrieve the light status for a specific location
-        status = self.office_lights.get(location, "unknown location")
-        print(f"Retrieving light status for {location}: {status}")
+        self._sync()
+        state = self.store.is_on(location)
+        status = "unknown location" if state is None else ("on" if state else "off")
         return {location: status}
-    
+
+    def get_lights(self, floor: int | None = None, zone: str | None = None, tag: str | None = None,
+                   state: str | None = None, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE) -> dict:
+        """One page of lights matching the given floor, zone, tag and state filters."""
+        if state not in (None, "on", "off"):
+            return {"error": f"Unknown state '{state}'; use 'on' or 'off'."}
+        self._sync()
+        # Read the version first: a concurrent change can only make the page newer than its label
+        version = self.version
+        result = self.store.query(floor, zone, tag, state, cursor, limit)
+        result["version"] = version
+        return result
+
+    def _cached_payload(self, key: tuple, build) -> str:
+        with self._payload_lock:
+            if self.payload_version != self.version:
+                self.payloads.clear()
+                self.payload_version = self.version
+            payload = self.payloads.get(key)
+            if payload is None:
+                if len(self.payloads) >= MAX_CACHED_PAYLOADS:
+                    self.payloads.clear()
+                payload = self.payloads[key] = build()
+            return payload
+
+    def get_office_lights_json(self) -> str:
+        """`get_office_lights()` as JSON, serialized once per state version."""
+        self._sync()
+        return self._cached_payload(("all",), lambda: json.dumps(self.store.as_dict()))
+
+    def get_lights_json(self, floor: int | None = None, zone: str | None = None, tag: str | None = None,
+                        state: str | None = None, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE,
+                        if_version: int | None = None) -> str:
+        """`get_lights()` as JSON, serialized once per state version and query.
+
+        When `if_version` is the current version (like an HTTP ETag), the reply is
+        just `{"version": N, "unchanged": true}`.
+        """
+        self._sync()
+        if if_version is not None and if_version == self.version:
+            return self._cached_payload(("unchanged",), lambda: json.dumps({"version": self.version, "unchanged": True}))
+        key = ("lights", floor, zone, tag, state, cursor, limit)
+        return self._cached_payload(key, lambda: json.dumps(self.get_lights(floor, zone, tag, state, cursor, limit)))
+
+    def _diff(self, changed_ids: list[int], on: bool, matched: int) -> dict:
+        names = [self.store.names[light_id] for light_id in changed_ids[:MAX_DIFF_LOCATIONS]]
+        return {
+            "state": "on" if on else "off",
+            "changed": len(changed_ids),
+            "unchanged": matched - len(changed_ids),
+            "locations": names,
+            "truncated": len(changed_ids) > MAX_DIFF_LOCATIONS,
+        }
+
+    def set_state_many(self, states: dict[str, str]) -> dict:
+        """Set each location to its target state ("on"/"off"); all or nothing.
+
+        Every location and state is validated before anything changes. Returns a
+        diff per target state with the locations that actually changed.
+        """
+        unknown = [location for location in states if location not in self.store]
+        if unknown:
+            return {"error": f"Unknown locations: {unknown[:MAX_DIFF_LOCATIONS]}; nothing was changed."}
+        invalid = sorted({state for state in states.values() if state not in ("on", "off")})
+        if invalid:
+            return {"error": f"Unknown states {invalid}; use 'on' or 'off'. Nothing was changed."}
+        with self.transaction(list(states)) as transaction:
+            for location, state in states.items():
+                transaction.set(location, state)
+        result = {}
+        for target in ("on", "off"):
+            matched = sum(1 for state in states.values() if state == target)
+            if matched:
+                result[target] = self._diff(transaction.changed[target == "on"], target == "on", matched)
+        return result
+
+    def set_zone_state(self, state: str, floor: int | None = None, zone: str | None = None,
+                       tag: str | None = None) -> dict:
+        """Set every light matching the floor/zone/tag filters to `state` and return what changed."""
+        if state not in ("on", "off"):
+            return {"error": f"Unknown state '{state}'; use 'on' or 'off'."}
+        if floor is None and zone is None and tag is None:
+            return {"error": "Give at least one of floor, zone or tag."}
+        light_ids = list(self.store.select(floor, zone, tag))
+        if not light_ids:
+            return {"error": "No lights match the given floor, zone and tag."}
+        with self._transaction(light_ids) as transaction:
+            transaction.pending = dict.fromkeys(light_ids, state == "on")
+        return self._diff(transaction.changed[state == "on"], state == "on", len(light_ids))
+
+    # -----------------------------
+    # Usage history
+    # -----------------------------
+    @staticmethod
+    def _window(since: str | None, until: str | None, hours: float) -> tuple[float, float]:
+        """[start, end] in epoch seconds from ISO 8601 bounds, or the last `hours` before `until`/now."""
+        now = time.time()
+        end = min(datetime.fromisoformat(until).timestamp(), now) if until else now
+        start = datetime.fromisoformat(since).timestamp() if since else end - hours * 3600
+        if start >= end:
+            raise ValueError("The window is empty; `since` must be before `until` and the current time.")
+        return start, end
+
+    @staticmethod
+    def _iso(timestamp: float) -> str:
+        return datetime.fromtimestamp(timestamp).astimezone().isoformat(timespec="seconds")
+
+    def get_light_usage(self, location: str | None = None, floor: int | None = None, zone: str | None = None,
+                        tag: str | None = None, since: str | None = None, until: str | None = None,
+                        hours: float = 24.0, top: int = 5) -> dict:
+        """How long lights were on and how often they changed within a time window.
+
+        For one `location`, its on-time, on-fraction and toggle count; otherwise totals
+        over the lights matching the floor/zone/tag filters (all lights if none) and
+        the `top` lights with the most on-time and the most toggles.
+        """
+        try:
+            start, end = self._window(since, until, hours)
+        except ValueError as e:
+            return {"error": str(e)}
+        self._sync()
+        window = {"since": self._iso(start), "until": self._iso(end)}
+        if location is not None:
+            light_id = self.store.ids.get(location)
+            if light_id is None:
+                return {"error": "Location not found"}
+            on_now = self.store.states[light_id] == 1
+            usage = self.timeline.usage(light_id, on_now, start, end)
+            covered = end - usage["covered_from"]
+            return {
+                "location": location,
+                "window": window,
+                "covered_from": self._iso(usage["covered_from"]),
+                "on_seconds": round(usage["on_seconds"], 1),
+                "on_fraction": round(usage["on_seconds"] / covered, 3) if covered > 0 else None,
+                "toggles": usage["toggles"],
+                "state": "on" if on_now else "off",
+            }
+
+        states = self.store.states
+        usages = [(light_id, self.timeline.usage(light_id, states[light_id] == 1, start, end))
+                  for light_id in self.store.select(floor, zone, tag)]
+        if not usages:
+            return {"error": "No lights match the given floor, zone and tag."}
+        top = max(1, min(top, MAX_USAGE_TOP))
+        on_seconds = sum(usage["on_seconds"] for _, usage in usages)
+        covered = sum(end - usage["covered_from"] for _, usage in usages)
+
+        def summary(items):
+            return [{"location": self.store.names[light_id], "on_seconds": round(usage["on_seconds"], 1),
+                     "toggles": usage["toggles"]} for light_id, usage in items]
+
+        return {
+            "lights": len(usages),
+            "window": window,
+            "covered_from": self._iso(min(usage["covered_from"] for _, usage in usages)),
+            "on_seconds": round(on_seconds, 1),
+            "on_fraction": round(on_seconds / covered, 3) if covered > 0 else None,
+            "toggles": sum(usage["toggles"] for _, usage in usages),
+            "most_on": summary(heapq.nlargest(top, usages, key=lambda item: item[1]["on_seconds"])),
+            "most_toggled": summary(heapq.nlargest(top, usages, key=lambda item: item[1]["toggles"])),
+        }
+
+    def get_light_occupancy(self, floor: int | None = None, zone: str | None = None, tag: str | None = None,
+                            since: str | None = None, until: str | None = None, hours: float = 24.0,
+                            bucket_minutes: int = 60) -> dict:
+        """Fraction of the matching lights that were on, per time bucket, plus the busiest bucket."""
+        try:
+            start, end = self._window(since, until, hours)
+        except ValueError as e:
+            return {"error": str(e)}
+        bucket = max(bucket_minutes, 1) * 60
+        count = int((end - start + bucket - 1) // bucket)
+        if count > MAX_OCCUPANCY_BUCKETS:
+            return {"error": f"{count} buckets requested; use a shorter window or larger buckets "
+                             f"(at most {MAX_OCCUPANCY_BUCKETS})."}
+        self._sync()
+        states = self.store.states
+        lights = [(light_id, states[light_id] == 1) for light_id in self.store.select(floor, zone, tag)]
+        if not lights:
+            return {"error": "No lights match the given floor, zone and tag."}
+        edges = [start + i * bucket for i in range(count)] + [end]
+        totals = self.timeline.occupancy(lights, edges)
+        buckets = []
+        for i, total in enumerate(totals):
+            known = edges[i + 1] - max(edges[i], self.timeline.started)
+            fraction = round(total / (known * len(lights)), 3) if known > 0 else None
+            buckets.append({"start": self._iso(edges[i]), "on_fraction": fraction})
+        known_buckets = [item for item in buckets if item["on_fraction"] is not None]
+        return {
+            "lights": len(lights),
+            "bucket_minutes": bucket // 60,
+            "covered_from": self._iso(max(start, self.timeline.started)),
+            "buckets": buckets,
+            "peak": max(known_buckets, key=lambda item: item["on_fraction"]) if known_buckets else None,
+        }
 
     def toggle_office_lights(self, location: str):
         # Logic to toggle the lights in the specified location
-        if location in self.office_lights:
-            current_status = self.office_lights[location]
-            new_status = "off" if current_status == "on" else "on"
-            self.office_lights[location] = new_status
-            print(f"Toggled lights in {location} to {new_status}")
-            return {location: new_status}
-        else:
-            print(f"Location '{location}' not found")
+        light_id = self.store.ids.get(location)
+        if light_id is None:
             return {"error": "Location not found"}
-        
+        if self.shared is None:
+            # Hot path: one stripe lock and no context-manager layers when nothing is shared
+            states = self.store.states
+            with self.store.stripes[light_id % LOCK_STRIPES]:
+                states[light_id] ^= 1
+                state = states[light_id] == 1
+                self._record_one(light_id, state)
+        else:
+            with self._locked((light_id,)):
+                state = self.store.toggle(location)
+                self._record([((light_id,), state)])
+        return {location: "on" if state else "off"}
+
 
 if __name__ == "__main__":
     service = OfficeLightsService()
     print(service.get_office_lights())
     print(service.get_office_light("reception"))
     print(service.toggle_office_lights("conference room 1"))
-    print(service.get_office_lights())
\ No newline at end of file
+    print(service.get_office_lights())
+    print(service.get_lights(state="on"))
+    print(service.set_state_many({"reception": "off", "office": "on"}))
+    print(service.changes_since(2))
+    print(service.get_light_usage("office", hours=1))
+    print(service.get_light_occupancy(hours=1, bucket_minutes=15))
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+
+
+class ResourceSubscriptions:
+    """Handles `resources/subscribe` and sends `notifications/resources/updated`.
+
+    FastMCP has no decorator for subscriptions, so the handlers are registered on
+    its low-level server. Each subscribing session is remembered per URI; sessions
+    that fail to receive a notification (disconnected) are dropped.
+    """
+
+    def __init__(self, mcp):
+        self.sessions = {}  # uri -> set of ServerSession
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self.loop = None
+        self.sent = 0
+        server = mcp._mcp_server
+
+        @server.subscribe_resource()
+        async def subscribe(uri) -> None:
+            self.loop = asyncio.get_running_loop()
+            self.sessions.setdefault(str(uri), set()).add(server.request_context.session)
+
+        @server.unsubscribe_resource()
+        async def unsubscribe(uri) -> None:
+            self.sessions.get(str(uri), set()).discard(server.request_context.session)
+
+    async def notify(self, uri: str):
+        """Tell every session subscribed to `uri` that it changed."""
+        for session in list(self.sessions.get(uri, ())):
+            try:
+                await session.send_resource_updated(uri)
+                self.sent += 1
+            except Exception:
+                self.sessions[uri].discard(session)
+
+    def notify_soon(self, uri: str):
+        """Schedule `notify(uri)` from synchronous code; a burst of changes sends one notification.
+
+        Safe to call from worker threads: the notification is handed to the server's event loop.
+        """
+        if self.loop is None or not self.sessions.get(uri):
+            return
+        with self._pending_lock:
+            if uri in self._pending:
+                return
+            self._pending.add(uri)
+        try:
+            on_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self.loop.create_task(self._notify_pending(uri))
+        else:
+            self.loop.call_soon_threadsafe(lambda: self.loop.create_task(self._notify_pending(uri)))
+
+    async def _notify_pending(self, uri: str):
+        with self._pending_lock:
+            self._pending.discard(uri)
+        await self.notify(uri)
@@ -0,0 +1,225 @@
+import fnmatch
+import os
+import re
+import threading
+import time
+from collections import deque
+
+# Files larger than this are not indexed (logs should be read with ranged reads)
+MAX_INDEXED_FILE_BYTES = 8 * 1024 * 1024
+REGEX_SPECIAL_CHARS = set(".^$*+?{}[]\\|()")
+
+
+def trigrams(text: str) -> set[str]:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def required_literals(pattern: str) -> list[str]:
+    """Literal runs (3+ chars) that every match of a simple regex must contain.
+
+    Conservative: patterns with alternation or groups yield nothing, and a run
+    followed by an optional quantifier loses its last character.
+    """
+    unescaped = re.sub(r"\\.", "", pattern)
+    if "|" in unescaped or "(" in unescaped or "[" in unescaped:
+        return []
+    literals = []
+    current = ""
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            if escaped.isalnum():
+                # \d, \w, \s ... are classes, not literals
+                literals.append(current)
+                current = ""
+            else:
+                current += escaped
+            i += 2
+            continue
+        if char in "*?{":
+            current = current[:-1]
+            literals.append(current)
+            current = ""
+            if char == "{":
+                # Skip the repetition bounds, e.g. {2,5}
+                closing = pattern.find("}", i)
+                i = closing if closing != -1 else len(pattern)
+        elif char in REGEX_SPECIAL_CHARS:
+            literals.append(current)
+            current = ""
+        else:
+            current += char
+        i += 1
+    literals.append(current)
+    return [literal for literal in literals if len(literal) >= 3]
+
+
+class TrigramIndex:
+    """Incremental trigram index of the text files under a root directory.
+
+    Each file's lowercased trigrams are posted to an inverted index, so a query only
+    opens files that contain every trigram of its literal text. `refresh()` re-stats
+    the tree and re-indexes only files whose mtime or size changed. Symlinked
+    directories are not followed, and files that resolve outside the root (through
+    a link) are neither indexed nor read. Refreshes and candidate lookups share one
+    lock, so the index can be searched from several threads.
+    """
+
+    def __init__(self, root: str, max_file_bytes: int = MAX_INDEXED_FILE_BYTES):
+        self.root = root
+        self.real_root = os.path.realpath(root)
+        self.max_file_bytes = max_file_bytes
+        self.files = {}      # relative path -> (mtime_ns, size)
+        self.file_grams = {}  # relative path -> trigram set
+        self.postings = {}   # trigram -> set of relative paths
+        self.last_refresh = None
+        self._lock = threading.Lock()
+
+    def _inside_root(self, abs_path: str) -> bool:
+        return os.path.commonpath([self.real_root, os.path.realpath(abs_path)]) == self.real_root
+
+    def _remove(self, path: str):
+        for gram in self.file_grams.pop(path, ()):
+            paths = self.postings.get(gram)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del self.postings[gram]
+        self.files.pop(path, None)
+
+    def _add(self, path: str, abs_path: str, stat: os.stat_result):
+        grams = set()
+        try:
+            with open(abs_path, "rb") as f:
+                data = f.read()
+            if b"\0" in data[:8192]:
+                grams = set()  # binary file: track it, but never match
+            else:
+                grams = trigrams(data.decode("utf-8", errors="ignore"))
+        except OSError:
+            return
+        self.files[path] = (stat.st_mtime_ns, stat.st_size)
+        self.file_grams[path] = grams
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(path)
+
+    def refresh(self) -> dict:
+        """Bring the index up to date; returns counts of added, updated and removed files."""
+        with self._lock:
+            return self._refresh()
+
+    def refresh_if_older_than(self, seconds: float) -> dict | None:
+        """Refresh unless another caller did so in the last `seconds`; returns the counts or None."""
+        with self._lock:
+            if self.last_refresh is not None and time.time() - self.last_refresh < seconds:
+                return None
+            return self._refresh()
+
+    def _refresh(self) -> dict:
+        seen = set()
+        added = updated = 0
+        for current_dir, _, file_names in os.walk(self.root, followlinks=False):
+            for file_name in file_names:
+                abs_path = os.path.join(current_dir, file_name)
+                path = os.path.relpath(abs_path, self.root).replace(os.sep, "/")
+                if not self._inside_root(abs_path):
+                    continue
+                try:
+                    stat = os.stat(abs_path)
+                except OSError:
+                    continue
+                if stat.st_size > self.max_file_bytes:
+                    continue
+                seen.add(path)
+                known = self.files.get(path)
+                if known == (stat.st_mtime_ns, stat.st_size):
+                    continue
+                if known is None:
+                    added += 1
+                else:
+                    updated += 1
+                    self._remove(path)
+                self._add(path, abs_path, stat)
+        removed = [path for path in self.files if path not in seen]
+        for path in removed:
+            self._remove(path)
+        self.last_refresh = time.time()
+        return {"added": added, "updated": updated, "removed": len(removed), "files": len(self.files)}
+
+    def candidates(self, literals: list[str]) -> set[str]:
+        """Files containing every trigram of every literal (all files if nothing to filter on)."""
+        grams = set()
+        for literal in literals:
+            grams |= trigrams(literal)
+        with self._lock:
+            return self._candidates(grams)
+
+    def _candidates(self, grams: set[str]) -> set[str]:
+        if not grams:
+            return set(self.files)
+        result = None
+        for gram in sorted(grams, key=lambda g: len(self.postings.get(g, ()))):
+            paths = self.postings.get(gram)
+            if not paths:
+                return set()
+            result = set(paths) if result is None else result & paths
+            if not result:
+                return set()
+        return result
+
+    def search(self, query: str, regex: bool = False, case_sensitive: bool = False,
+               context_lines: int = 2, max_results: int = 100, path_pattern: str | None = None) -> dict:
+        """Find `query` (literal or regex) and return matches with line numbers and context."""
+        flags = 0 if case_sensitive else re.IGNORECASE
+        compiled = re.compile(query if regex else re.escape(query), flags)
+        literals = required_literals(query) if regex else [query]
+
+        paths = sorted(self.candidates(literals))
+        if path_pattern is not None:
+            paths = [path for path in paths if fnmatch.fnmatch(path, path_pattern)]
+
+        matches = []
+        files_scanned = 0
+        for path in paths:
+            if len(matches) >= max_results:
+                break
+            files_scanned += 1
+            matches.extend(self._scan_file(path, compiled, context_lines, max_results - len(matches)))
+        return {
+            "query": query,
+            "matches": matches,
+            "truncated": len(matches) >= max_results,
+            "files_scanned": files_scanned,
+            "files_indexed": len(self.files),
+        }
+
+    def _scan_file(self, path: str, compiled: re.Pattern, context_lines: int, limit: int) -> list[dict]:
+        results = []
+        before = deque(maxlen=context_lines)
+        pending = []  # matches still collecting trailing context
+        abs_path = os.path.join(self.root, path)
+        # A link may have been repointed outside the root since it was indexed
+        if not self._inside_root(abs_path):
+            return results
+        try:
+            with open(abs_path, "r", encoding="utf-8", errors="replace") as f:
+                for line_number, line in enumerate(f, start=1):
+                    line = line.rstrip("\n")
+                    for match in pending:
+                        match["after"].append(line)
+                    pending = [match for match in pending if len(match["after"]) < context_lines]
+                    if len(results) < limit and compiled.search(line):
+                        match = {"path": path, "line": line_number, "text": line,
+                                 "before": list(before), "after": []}
+                        results.append(match)
+                        if context_lines:
+                            pending.append(match)
+                    elif len(results) >= limit and not pending:
+                        break
+                    before.append(line)
+        except OSError:
+            pass
+        return results
@@ -0,0 +1,113 @@
+import re
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+# How far (in lines) a hunk may have drifted from the line numbers in its header
+MAX_HUNK_DRIFT = 200
+
+
+class Hunk:
+    """One `@@` section of a unified diff."""
+
+    def __init__(self, old_start: int, old_count: int):
+        self.old_start = old_start
+        self.old_count = old_count
+        self.lines = []  # (tag, text, has_newline) with tag in " ", "-", "+"
+
+    @property
+    def old_lines(self) -> list[str]:
+        return [text for tag, text, _ in self.lines if tag != "+"]
+
+
+def _strip_newline(line: str) -> str:
+    return line.rstrip("\r\n")
+
+
+def parse_unified_diff(patch: str) -> list[Hunk]:
+    """Parse the hunks of a single-file unified diff; `---`/`+++` headers are optional."""
+    hunks = []
+    hunk = None
+    file_headers = 0
+    for line in patch.splitlines():
+        if line.startswith("--- ") and (hunk is None or len(hunk.old_lines) >= hunk.old_count):
+            file_headers += 1
+            if file_headers > 1:
+                raise ValueError("Patch touches more than one file; send one patch per file.")
+            hunk = None
+            continue
+        if line.startswith("+++ ") and hunk is None:
+            continue
+        match = HUNK_HEADER.match(line)
+        if match:
+            old_count = 1 if match.group(2) is None else int(match.group(2))
+            hunk = Hunk(int(match.group(1)), old_count)
+            hunks.append(hunk)
+            continue
+        if hunk is None:
+            continue  # diff --git, index, etc.
+        if line.startswith("\\"):
+            # "\ No newline at end of file" applies to the line before it
+            if hunk.lines:
+                tag, text, _ = hunk.lines[-1]
+                hunk.lines[-1] = (tag, text, False)
+            continue
+        tag, text = (line[0], line[1:]) if line else (" ", "")
+        if tag not in " -+":
+            raise ValueError(f"Unexpected line in hunk {len(hunks)}: {line!r}")
+        hunk.lines.append((tag, text, True))
+    if not hunks:
+        raise ValueError("Patch contains no hunks.")
+    return hunks
+
+
+def _find_hunk(lines: list[str], expected: list[str], position: int) -> int | None:
+    """Index where `expected` matches `lines`, searching outward from `position`."""
+    def matches(start: int) -> bool:
+        return all(_strip_newline(lines[start + i]) == text for i, text in enumerate(expected))
+
+    last_start = len(lines) - len(expected)
+    for drift in range(MAX_HUNK_DRIFT + 1):
+        for start in (position - drift, position + drift) if drift else (position,):
+            if 0 <= start <= last_start and matches(start):
+                return start
+    return None
+
+
+def apply_unified_diff(text: str, patch: str) -> tuple[str, int]:
+    """Apply a unified diff to `text`; returns `(new_text, hunks_applied)`.
+
+    Context and removed lines must match (ignoring line endings), but a hunk may
+    sit a little above or below the line in its header, so patches made against a
+    slightly older copy still apply. Any hunk that does not apply raises ValueError
+    and nothing is changed.
+    """
+    lines = text.splitlines(keepends=True)
+    newline = "\r\n" if lines and lines[0].endswith("\r\n") else "\n"
+    hunks = parse_unified_diff(patch)
+    result = []
+    cursor = 0
+    offset = 0  # how far earlier hunks were found from their header line
+    for number, hunk in enumerate(hunks, start=1):
+        expected = hunk.old_lines
+        # A pure insertion ("-n,0") goes after line n, everything else starts at line n
+        header_start = hunk.old_start if hunk.old_count == 0 else hunk.old_start - 1
+        start = _find_hunk(lines, expected, max(cursor, header_start + offset))
+        if start is None or start < cursor:
+            raise ValueError(f"Hunk {number} does not apply at line {hunk.old_start}; "
+                             f"re-read the file and rebuild the patch.")
+        offset = start - header_start
+        result.extend(lines[cursor:start])
+        original = iter(lines[start:start + len(expected)])
+        for tag, line_text, has_newline in hunk.lines:
+            if tag == " ":
+                result.append(next(original))
+            elif tag == "-":
+                next(original)
+            else:
+                result.append(line_text + newline if has_newline else line_text)
+        cursor = start + len(expected)
+    result.extend(lines[cursor:])
+    # A line that used to end the file without a newline may no longer be last
+    for i in range(len(result) - 1):
+        if not result[i].endswith("\n"):
+            result[i] += newline
+    return "".join(result), len(hunks)
@@ -0,0 +1,205 @@
+import time
+from bisect import bisect_left
+
+# Latency buckets: 8 per decade from 10 µs to 100 s (each about 33% wider than the last),
+# fine enough to estimate p99 within one bucket
+LATENCY_BOUNDS = [10 ** (exponent / 8) for exponent in range(-40, 17)]
+# Every 4th bound (half-decades) is exported as a Prometheus bucket
+EXPORTED_LATENCY_EVERY = 4
+SIZE_BOUNDS = [64 * 4 ** power for power in range(10)]  # 64 B .. 16 MB
+QUANTILES = (0.5, 0.95, 0.99)
+# Distinct (method, name) series kept; resource URIs with parameters beyond this share one series
+MAX_SERIES = 500
+OTHER_NAME = "(other)"
+
+
+class Histogram:
+    """Counts of observations per bucket, Prometheus style (`le` = upper bound)."""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: list[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate of the `q` quantile, interpolated within its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+    def cumulative(self, every: int = 1):
+        """(upper bound, observations <= bound) for every `every`-th bound, then +Inf."""
+        total = 0
+        for i, bound in enumerate(self.bounds):
+            total += self.counts[i]
+            if i % every == 0:
+                yield bound, total
+        yield float("inf"), self.count
+
+
+class RequestStats:
+    __slots__ = ("calls", "errors", "in_flight", "latency", "request_bytes", "response_bytes")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.latency = Histogram(LATENCY_BOUNDS)
+        self.request_bytes = Histogram(SIZE_BOUNDS)
+        self.response_bytes = Histogram(SIZE_BOUNDS)
+
+
+def payload_size(payload) -> int:
+    """Approximate size in bytes of tool arguments or of a tool/resource result.
+
+    Text and blob content blocks are measured directly, so results are never
+    serialized again just to be measured.
+    """
+    if payload is None:
+        return 0
+    if isinstance(payload, (str, bytes)):
+        return len(payload)
+    if isinstance(payload, dict):
+        # Roughly the JSON size, without paying for serialization
+        return sum(len(key) + 4 + payload_size(value) for key, value in payload.items())
+    if isinstance(payload, (int, float, bool)):
+        return 8
+    # Tool results carry `content`, resource results `contents`
+    blocks = getattr(payload, "content", None)
+    if blocks is None:
+        blocks = getattr(payload, "contents", payload)
+    if isinstance(blocks, (str, bytes)):
+        return len(blocks)
+    size = 0
+    for block in blocks if isinstance(blocks, (list, tuple)) else ():
+        if isinstance(block, (str, bytes, int, float, dict, list)):
+            size += payload_size(block)
+            continue
+        for field in ("text", "blob", "content"):
+            value = getattr(block, field, None)
+            if isinstance(value, (str, bytes)):
+                size += len(value)
+                break
+    return size
+
+
+class ToolMetrics:
+    """Per-request counters, in-flight gauges and latency/size histograms for an MCP server.
+
+    Keyed by MCP method ("tools/call", "resources/read") and tool name or resource
+    URI. Updated only from the server's event loop, so no locking; one request
+    costs two dict lookups, a few additions and three bisects over short lists.
+    """
+
+    def __init__(self):
+        self.stats = {}  # (method, name) -> RequestStats
+        self.started = time.time()
+
+    def start(self, method: str, name: str, request_bytes: int = 0) -> RequestStats:
+        stats = self.stats.get((method, name))
+        if stats is None:
+            if len(self.stats) >= MAX_SERIES:
+                name = OTHER_NAME
+                stats = self.stats.get((method, name))
+            if stats is None:
+                stats = self.stats[(method, name)] = RequestStats()
+        stats.in_flight += 1
+        stats.request_bytes.observe(request_bytes)
+        return stats
+
+    @staticmethod
+    def finish(stats: RequestStats, seconds: float, response_bytes: int = 0, error: bool = False):
+        stats.in_flight -= 1
+        stats.calls += 1
+        if error:
+            stats.errors += 1
+        stats.latency.observe(seconds)
+        stats.response_bytes.observe(response_bytes)
+
+    def summary(self) -> dict:
+        """Counts and p50/p95/p99 latency in milliseconds per method and name."""
+        result = {}
+        for (method, name), stats in sorted(self.stats.items()):
+            item = {"calls": stats.calls, "errors": stats.errors, "in_flight": stats.in_flight}
+            for q in QUANTILES:
+                value = stats.latency.quantile(q)
+                item[f"p{round(q * 100)}_ms"] = None if value is None else round(value * 1000, 3)
+            result[f"{method} {name}"] = item
+        return result
+
+    # -----------------------------
+    # Prometheus text format
+    # -----------------------------
+    def render(self) -> str:
+        lines = []
+
+        def family(metric: str, kind: str, help_text: str):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+
+        def labels(method: str, name: str, **extra) -> str:
+            pairs = {"method": method, "name": name, **extra}
+            return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in pairs.items()) + "}"
+
+        items = sorted(self.stats.items())
+        family("mcp_requests_total", "counter", "Completed MCP requests.")
+        for (method, name), stats in items:
+            lines.append(f"mcp_requests_total{labels(method, name)} {stats.calls}")
+        family("mcp_request_errors_total", "counter", "MCP requests that raised or returned an error result.")
+        for (method, name), stats in items:
+            lines.append(f"mcp_request_errors_total{labels(method, name)} {stats.errors}")
+        family("mcp_requests_in_flight", "gauge", "MCP requests currently running.")
+        for (method, name), stats in items:
+            lines.append(f"mcp_requests_in_flight{labels(method, name)} {stats.in_flight}")
+
+        family("mcp_request_duration_seconds", "histogram", "MCP request latency.")
+        for (method, name), stats in items:
+            _histogram_lines(lines, "mcp_request_duration_seconds", stats.latency, EXPORTED_LATENCY_EVERY,
+                             lambda **extra: labels(method, name, **extra))
+        family("mcp_request_duration_quantile_seconds", "gauge",
+               "MCP request latency quantiles, estimated from the histogram since startup.")
+        for (method, name), stats in items:
+            for q in QUANTILES:
+                value = stats.latency.quantile(q)
+                if value is not None:
+                    lines.append(f"mcp_request_duration_quantile_seconds{labels(method, name, quantile=q)} {value:.6g}")
+
+        for metric, attribute, help_text in (
+                ("mcp_request_size_bytes", "request_bytes", "Size of MCP request arguments."),
+                ("mcp_response_size_bytes", "response_bytes", "Size of MCP response content.")):
+            family(metric, "histogram", help_text)
+            for (method, name), stats in items:
+                _histogram_lines(lines, metric, getattr(stats, attribute), 1,
+                                 lambda **extra: labels(method, name, **extra))
+
+        family("mcp_server_start_time_seconds", "gauge", "Unix time the metrics started.")
+        lines.append(f"mcp_server_start_time_seconds {self.started:.3f}")
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(lines: list[str], metric: str, histogram: Histogram, every: int, labels):
+    for bound, count in histogram.cumulative(every):
+        le = "+Inf" if bound == float("inf") else (str(int(bound)) if bound >= 1 and bound == int(bound) else f"{bound:.6g}")
+        lines.append(f"{metric}_bucket{labels(le=le)} {count}")
+    lines.append(f"{metric}_sum{labels()} {histogram.sum:.6g}")
+    lines.append(f"{metric}_count{labels()} {histogram.count}")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
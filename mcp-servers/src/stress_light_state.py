@@ -0,0 +1,131 @@
+"""Stress test: concurrent light mutations must not lose updates.
+
+Usage:
+  python stress_light_state.py [toggles] [threads]
+  python stress_light_state.py --url http://localhost:8000/mcp [toggles]
+
+In-process mode hammers one `OfficeLightsService` (journaled to a temp
+directory) from a thread pool, the way tool handlers run once they are
+offloaded to executors:
+1. `toggles` toggles on a few hot locations. Each final state must match the
+   parity of its toggle count, and the version must have moved once per toggle.
+2. Transactions that flip a whole group of lights together, racing with
+   `set_state_many` and `set_zone_state` on the same lights. Every group must end
+   uniform.
+3. The journal is replayed into a fresh service, which must match the live state.
+
+With `--url`, `toggles` concurrent `change_state` calls go to a running server
+and the final states are checked with `get_state`.
+"""
+import asyncio
+import json
+import random
+import sys
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from services.office_lights import OfficeLightsService
+
+HOT_LOCATIONS = 8
+GROUPS = 4
+GROUP_SIZE = 5
+
+
+def make_fixtures() -> list[dict]:
+    fixtures = [{"location": f"hot {i}", "state": "off", "floor": 1} for i in range(HOT_LOCATIONS)]
+    for group in range(GROUPS):
+        fixtures += [{"location": f"group {group} light {i}", "state": "off", "floor": 2, "zone": f"group {group}"}
+                     for i in range(GROUP_SIZE)]
+    return fixtures
+
+
+def check(label: str, ok: bool, detail: str = ""):
+    print(f"{'PASS' if ok else 'FAIL'}  {label}{' - ' + detail if detail else ''}")
+    return ok
+
+
+def flip_group(service: OfficeLightsService, group: int):
+    locations = [f"group {group} light {i}" for i in range(GROUP_SIZE)]
+    with service.transaction(locations) as transaction:
+        target = "off" if transaction.get(locations[0]) == "on" else "on"
+        for location in locations:
+            transaction.set(location, target)
+
+
+def set_group(service: OfficeLightsService, group: int, state: str, by_zone: bool):
+    if by_zone:
+        service.set_zone_state(state, zone=f"group {group}")
+    else:
+        service.set_state_many({f"group {group} light {i}": state for i in range(GROUP_SIZE)})
+
+
+def run_in_process(toggles: int, threads: int) -> bool:
+    ok = True
+    with tempfile.TemporaryDirectory() as state_dir:
+        service = OfficeLightsService(make_fixtures(), state_dir=state_dir)
+        start_version = service.version
+        targets = [f"hot {random.randrange(HOT_LOCATIONS)}" for _ in range(toggles)]
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(service.toggle_office_lights, targets))
+        counts = Counter(targets)
+        wrong = [location for location in counts
+                 if service.get_office_light(location)[location] != ("on" if counts[location] % 2 else "off")]
+        ok &= check(f"{toggles} concurrent toggles on {HOT_LOCATIONS} lights", not wrong, f"lost updates on {wrong}" if wrong else "")
+        ok &= check("one version per toggle", service.version - start_version == toggles,
+                    f"version moved {service.version - start_version}")
+
+        operations = []
+        for _ in range(toggles // 4):
+            group = random.randrange(GROUPS)
+            kind = random.random()
+            if kind < 0.6:
+                operations.append(lambda group=group: flip_group(service, group))
+            else:
+                state = random.choice(("on", "off"))
+                operations.append(lambda group=group, state=state, by_zone=kind < 0.8: set_group(service, group, state, by_zone))
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lambda operation: operation(), operations))
+        lights = service.get_office_lights()
+        mixed = [group for group in range(GROUPS)
+                 if len({lights[f"group {group} light {i}"] for i in range(GROUP_SIZE)}) != 1]
+        ok &= check(f"{len(operations)} concurrent group transactions", not mixed, f"groups left mixed: {mixed}" if mixed else "")
+
+        delta = service.changes_since(start_version)
+        ok &= check("changes_since replays to the live state",
+                    all(lights[location] == state for location, state in delta["lights"].items()))
+
+        service.close()
+        restored = OfficeLightsService(make_fixtures(), state_dir=state_dir)
+        ok &= check("journal replay matches the live state", restored.get_office_lights() == lights)
+        restored.close()
+    return ok
+
+
+async def run_against_server(url: str, toggles: int) -> bool:
+    from fastmcp import Client
+
+    async with Client(url) as client:
+        contents = await client.read_resource("resource://building/lights")
+        locations = list(json.loads(contents[0].text))[:HOT_LOCATIONS]
+        before = {location: json.loads((await client.call_tool("get_state", {"location": location})).content[0].text)[location]
+                  for location in locations}
+        targets = [random.choice(locations) for _ in range(toggles)]
+        await asyncio.gather(*(client.call_tool("change_state", {"location": location}) for location in targets))
+        counts = Counter(targets)
+        wrong = []
+        for location in locations:
+            after = json.loads((await client.call_tool("get_state", {"location": location})).content[0].text)[location]
+            flipped = counts[location] % 2 == 1
+            if (after != before[location]) != flipped:
+                wrong.append(location)
+    return check(f"{toggles} concurrent change_state calls via {url}", not wrong, f"lost updates on {wrong}" if wrong else "")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--url":
+        passed = asyncio.run(run_against_server(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 2000))
+    else:
+        toggles = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+        threads = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+        passed = run_in_process(toggles, threads)
+    sys.exit(0 if passed else 1)
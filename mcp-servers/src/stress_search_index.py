@@ -0,0 +1,93 @@
+"""Stress test: concurrent searches while the tree changes must stay consistent.
+
+Usage:
+  python stress_search_index.py [searches] [threads]
+
+Builds a temp tree for one `FileService` with `search_refresh_interval` 0, so every
+search re-scans the tree. `threads` workers run `searches` searches while a writer
+thread keeps rewriting files and moving a marker word between them:
+1. No search may return an error (e.g. "dictionary changed size during iteration").
+2. Once the writer stops, one more search must find the marker in exactly the file
+   that holds it now, and the postings must agree with a freshly built index.
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from services.file_service import FileService
+from services.search_index import TrigramIndex
+
+FILES = 200
+MARKER = "needle"
+
+
+def check(label: str, ok: bool, detail: str = ""):
+    print(f"{'PASS' if ok else 'FAIL'}  {label}{' - ' + detail if detail else ''}")
+    return ok
+
+
+def write_file(root: str, index: int, with_marker: bool):
+    words = [f"word{random.randrange(1000)}" for _ in range(50)]
+    if with_marker:
+        words.insert(random.randrange(len(words)), MARKER)
+    with open(os.path.join(root, f"file{index}.txt"), "w", encoding="utf-8") as f:
+        f.write(" ".join(words) + "\n")
+
+
+def rewrite_files(root: str, stop: threading.Event) -> int:
+    """Move the marker to a random file over and over; returns the file holding it last."""
+    holder = 0
+    while not stop.is_set():
+        previous, holder = holder, random.randrange(FILES)
+        write_file(root, previous, False)
+        write_file(root, holder, True)
+        # Churn the file list too, so refreshes add and remove entries
+        extra = os.path.join(root, f"extra{random.randrange(20)}.txt")
+        if os.path.exists(extra):
+            os.remove(extra)
+        else:
+            with open(extra, "w", encoding="utf-8") as f:
+                f.write(f"extra {random.randrange(1000)}\n")
+    return holder
+
+
+def run(searches: int, threads: int) -> bool:
+    ok = True
+    with tempfile.TemporaryDirectory() as root:
+        for i in range(FILES):
+            write_file(root, i, i == 0)
+        service = FileService(root)
+        service.search_refresh_interval = 0
+
+        stop = threading.Event()
+        queries = [MARKER, "word1", "word42", r"word\d+5"]
+        with ThreadPoolExecutor(max_workers=threads + 1) as pool:
+            writer = pool.submit(rewrite_files, root, stop)
+            results = list(pool.map(
+                lambda i: service.search_files(queries[i % len(queries)], regex=i % len(queries) == 3, max_results=5),
+                range(searches)))
+            stop.set()
+            holder = writer.result()
+
+        errors = [result["error"] for result in results if "error" in result]
+        ok &= check(f"{searches} concurrent searches on {threads} threads", not errors,
+                    f"{len(errors)} errors, first: {errors[0]}" if errors else "")
+
+        found = service.search_files(MARKER)
+        paths = sorted({match["path"] for match in found.get("matches", [])})
+        ok &= check("marker found only where it was last written", paths == [f"file{holder}.txt"], f"found in {paths}")
+
+        index = service._search_index
+        fresh = TrigramIndex(root)
+        fresh.refresh()
+        ok &= check("postings match a freshly built index",
+                    index.postings == fresh.postings and index.files.keys() == fresh.files.keys())
+    return ok
+
+
+if __name__ == "__main__":
+    searches = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    sys.exit(0 if run(searches, threads) else 1)